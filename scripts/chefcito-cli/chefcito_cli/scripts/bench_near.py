@@ -0,0 +1,53 @@
+import random
+import time
+from typing import Callable, List, Tuple
+import numpy as np
+from src.model.commons.distance import DistanceRanker
+from src.model.venues.data.spatial import GridIndex
+
+BATCH = 1000
+AREA = ((-35.0, -34.0), (-59.0, -58.0))
+
+def random_point(generator: random.Random) -> Tuple[float, float]:
+    return generator.uniform(*AREA[0]), generator.uniform(*AREA[1])
+
+def timed(call: Callable[[], object], repeat: int) -> float:
+    """
+        Mean milliseconds that call takes over repeat runs
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def rank_all(ids: List[str], coordinates: np.ndarray, center: Tuple[float, float], limit: int) -> List[Tuple[str, int]]:
+    ranker = DistanceRanker(center, limit)
+    for start in range(0, len(ids), BATCH):
+        ranker.add_batch(ids[start:start + BATCH], coordinates[start:start + BATCH])
+    return ranker.sort()[:limit]
+
+def run(sizes: List[int], queries: int = 20, limit: int = 50, radius: int = 10_000, ranker_max: int = 1_000_000, seed: int = 0) -> None:
+    """
+        Times the nearby venues search over random venues spread
+        on a one degree square, with the DistanceRanker over the
+        whole catalog and with the grid index. Sizes above
+        ranker_max skip the ranker
+    """
+    generator = random.Random(seed)
+    for size in sizes:
+        points = [(f"{i}", *random_point(generator)) for i in range(size)]
+        centers = [random_point(generator) for _ in range(queries)]
+        start = time.perf_counter()
+        index = GridIndex()
+        index.replace(points)
+        build = (time.perf_counter() - start) * 1000
+        nearest = timed(lambda: [index.nearest(center, limit, radius / 1000) for center in centers], 1) / queries
+        within = timed(lambda: [index.within(center, radius / 1000) for center in centers], 1) / queries
+        print(f"{size} venues ==> index build {build:.1f}ms, {limit} nearest {nearest:.3f}ms, within {radius}m {within:.3f}ms")
+        if size > ranker_max:
+            print(f"{size} venues ==> DistanceRanker skipped, above {ranker_max}")
+            continue
+        ids = [id for id, _, _ in points]
+        coordinates = np.array([(lat, lon) for _, lat, lon in points], dtype=np.float64)
+        ranked = timed(lambda: rank_all(ids, coordinates, centers[0], limit), 1)
+        print(f"{size} venues ==> DistanceRanker over the catalog {ranked:.1f}ms")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from sqlalchemy import create_engine, delete, insert, update
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import DeclarativeBase
@@ -65,6 +65,8 @@ class VenueSchema(Base):
     reservationLeadTime: Mapped[int] = mapped_column()
     menu: Mapped[str] = mapped_column()
     status: Mapped[str] = mapped_column()
+    lat: Mapped[Optional[float]] = mapped_column(nullable=True)
+    lon: Mapped[Optional[float]] = mapped_column(nullable=True)
     
     __table_args__ = (
         CheckConstraint("ARRAY_LENGTH(characteristics, 1) <= 30", name="max_characteristics"),
@@ -93,6 +95,22 @@ class VenueSchema(Base):
                 f"reservationLeadTime={self.reservationLeadTime}), menu={self.menu}, status={self.status}")
 
 
+class VenueChangeSchema(Base):
+    __tablename__ = "venue_changes"
+
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    venue_id: Mapped[str] = mapped_column()
+    op: Mapped[str] = mapped_column()
+    at: Mapped[datetime] = mapped_column(DateTime)
+
+
+class VenueVersionSchema(Base):
+    __tablename__ = "venue_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column()
+
+
 class ReservationSchema(Base):
     __tablename__ = "reservations"
 
@@ -102,6 +120,7 @@ class ReservationSchema(Base):
     time: Mapped[datetime] = mapped_column()
     people: Mapped[int] = mapped_column()
     status: Mapped[str] = mapped_column()
+    version: Mapped[int] = mapped_column(default=0)
 
     def __repr__(self) -> str:
         return f"{self.id}:{self.user}:{self.venue}/at:{self.time}/for:{self.people}/{self.status}"
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import Select, create_engine, text
+from src.model.commons.paging import EXACT_TOTAL, Explain
+from src.model.reservations.data.base import ReservationsBase
+from src.model.reservations.data.query import RelBuilder
+from src.model.reservations.reservation import Accepted, Assisted
+
+class CapturingBase(ReservationsBase):
+    """
+        Keeps the page queries the builder produces instead
+        of running them
+    """
+
+    def __init__(self):
+        self.queries: List[Select] = []
+
+    async def get_page(self, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[Any], Optional[int]]:
+        self.queries.append(query.limit(limit).offset(start))
+        return [], None
+
+def builder_query(**kwargs) -> Select:
+    base = CapturingBase()
+    args = {"id": None, "user": None, "status": None, "venue": None, "time": None, "people": None, "limit": 10, "start": 0}
+    args.update(kwargs)
+    asyncio.run(RelBuilder(base).get(**args))
+    return base.queries.pop()
+
+def expected_plans() -> Dict[str, Tuple[Select, Set[str]]]:
+    now = datetime.now()
+    return {
+        "venue history": (builder_query(venue="venue"), {"ix_reservations_venue_time"}),
+        "user history": (builder_query(user="user/user"), {"ix_reservations_user_time"}),
+        "user stats at venue": (builder_query(user="user/user", venue="venue", status=[Assisted().get_status()]),
+                                {"ix_reservations_venue_user_status", "ix_reservations_venue_time"}),
+        "accepted by time": (builder_query(status=[Accepted().get_status()], time=(now - timedelta(days=1), now)),
+                             {"ix_reservations_accepted_time"})
+    }
+
+def used_indexes(plan: Dict[str, Any]) -> Set[str]:
+    found = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= used_indexes(child)
+    return found
+
+def run(conn_string: str) -> bool:
+    """
+        Runs EXPLAIN over the queries of the reservations builder
+        and checks that each one reads through its index. Sequential
+        scans are disabled for the check, so a small local table
+        does not hide a missing index
+    """
+    engine = create_engine(conn_string)
+    ok = True
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for name, (query, expected) in expected_plans().items():
+            plan = connection.execute(Explain(query)).scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            used = used_indexes(plan[0]["Plan"])
+            passed = bool(used & expected)
+            ok = ok and passed
+            print(f"[{'ok' if passed else 'MISSING'}] {name} ==> uses {sorted(used) or 'no index'}, expected one of {sorted(expected)}")
+        connection.rollback()
+    return ok
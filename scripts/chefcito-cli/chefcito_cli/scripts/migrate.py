@@ -0,0 +1,193 @@
+import math
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import Column, Connection, DateTime, ForeignKey, Integer, MetaData, String, Table, create_engine, insert, inspect, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+migrations_metadata = MetaData()
+
+schema_migrations = Table(
+        "schema_migrations",
+        migrations_metadata,
+        Column("version", Integer, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("applied_at", DateTime, nullable=False)
+        )
+
+class Migration:
+
+    def __init__(self, version: int, name: str, upgrade: Callable[[Connection], None]):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+    def __repr__(self) -> str:
+        return f"{self.version:04d} {self.name}"
+
+def sql(*statements: str) -> Callable[[Connection], None]:
+    def upgrade(connection: Connection) -> None:
+        for statement in statements:
+            connection.execute(text(statement))
+    return upgrade
+
+# Tables as the services mapped them when migrations were introduced.
+# They are frozen here, later schema changes belong in their own migration
+baseline_metadata = MetaData()
+
+Table("user_types", baseline_metadata,
+      Column("type", String, primary_key=True))
+Table("users", baseline_metadata,
+      Column("uid", String, primary_key=True),
+      Column("email", String, nullable=False),
+      Column("user_type", String, ForeignKey("user_types.type"), nullable=False))
+Table("permissions", baseline_metadata,
+      Column("user_type", String, ForeignKey("user_types.type"), primary_key=True),
+      Column("endpoint", String, primary_key=True))
+Table("users_data", baseline_metadata,
+      Column("uid", String, ForeignKey("users.uid"), primary_key=True),
+      Column("name", String, nullable=False),
+      Column("phone_number", String, nullable=False))
+Table("numbers", baseline_metadata,
+      Column("id", String, primary_key=True),
+      Column("number", String, nullable=False))
+Table("points", baseline_metadata,
+      Column("total", Integer, nullable=False),
+      Column("user", String, primary_key=True),
+      Column("last_updated", DateTime, nullable=False))
+Table("reservations", baseline_metadata,
+      Column("id", String, primary_key=True),
+      Column("user", String, nullable=False),
+      Column("venue", String, nullable=False),
+      Column("time", DateTime, nullable=False),
+      Column("people", Integer, nullable=False),
+      Column("status", String, nullable=False))
+Table("venues", baseline_metadata,
+      Column("id", String, primary_key=True),
+      Column("name", String, nullable=False),
+      Column("location", String, nullable=False),
+      Column("capacity", Integer, nullable=False),
+      Column("logo", String, nullable=False),
+      Column("pictures", ARRAY(String), nullable=False),
+      Column("slots", ARRAY(DateTime), nullable=False),
+      Column("characteristics", ARRAY(String), nullable=False),
+      Column("features", ARRAY(String), nullable=False),
+      Column("vacations", ARRAY(DateTime), nullable=False),
+      Column("reservationLeadTime", Integer, nullable=False),
+      Column("menu", String, nullable=False),
+      Column("status", String, nullable=False))
+
+def baseline(connection: Connection) -> None:
+    """
+        Databases that were loaded before migrations
+        existed already have these tables
+    """
+    baseline_metadata.create_all(connection, checkfirst=True)
+
+def reservation_version(connection: Connection) -> None:
+    columns = [column["name"] for column in inspect(connection).get_columns("reservations")]
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE reservations ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+def parse_location(location: str) -> Tuple[Optional[float], Optional[float]]:
+    """
+        Coordinates of a "lat,lon" location as the venues
+        service read them when the columns were added
+    """
+    try:
+        lat, lon = (float(value) for value in location.split(","))
+    except (AttributeError, ValueError):
+        return None, None
+    if not (math.isfinite(lat) and math.isfinite(lon)) or abs(lat) > 90 or abs(lon) > 180:
+        return None, None
+    return lat, lon
+
+def venue_coordinates(connection: Connection) -> None:
+    """
+        Coordinates columns for the venues, filled from
+        the "lat,lon" location they already had
+    """
+    columns = [column["name"] for column in inspect(connection).get_columns("venues")]
+    for column in ["lat", "lon"]:
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE venues ADD COLUMN {column} DOUBLE PRECISION"))
+    for id, location in connection.execute(text("SELECT id, location FROM venues WHERE lat IS NULL")).all():
+        lat, lon = parse_location(location)
+        if lat is not None:
+            connection.execute(text("UPDATE venues SET lat = :lat, lon = :lon WHERE id = :id"),
+                               {"lat": lat, "lon": lon, "id": id})
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_venues_lat_lon ON venues (lat, lon)"))
+
+change_log_metadata = MetaData()
+
+Table("venue_changes", change_log_metadata,
+      Column("version", Integer, primary_key=True, autoincrement=False),
+      Column("venue_id", String, nullable=False),
+      Column("op", String, nullable=False),
+      Column("at", DateTime, nullable=False))
+Table("venue_version", change_log_metadata,
+      Column("id", Integer, primary_key=True, autoincrement=False),
+      Column("version", Integer, nullable=False))
+
+def venue_change_log(connection: Connection) -> None:
+    """
+        Change log the venues followers tail, with the
+        counter row that hands out its versions
+    """
+    change_log_metadata.create_all(connection, checkfirst=True)
+    if connection.scalar(text("SELECT COUNT(*) FROM venue_version")) == 0:
+        connection.execute(text("INSERT INTO venue_version (id, version) VALUES (1, 0)"))
+
+# numbers, users_data and points are looked up by their primary key,
+# the indexes below cover the reservation queries of the builders
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline tables", baseline),
+    Migration(2, "reservation indexes", sql(
+        'CREATE INDEX IF NOT EXISTS ix_reservations_venue_time ON reservations (venue, time DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_reservations_user_time ON reservations ("user", time DESC, id DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_reservations_venue_user_status ON reservations (venue, "user", status)',
+        "CREATE INDEX IF NOT EXISTS ix_reservations_accepted_time ON reservations (time) WHERE status = 'Accepted'"
+        )),
+    Migration(3, "reservation version", reservation_version),
+    Migration(4, "venue coordinates", venue_coordinates),
+    Migration(5, "venue change log", venue_change_log)
+]
+
+def applied_versions(connection: Connection) -> List[int]:
+    migrations_metadata.create_all(connection, checkfirst=True)
+    return list(connection.scalars(select(schema_migrations.c.version).order_by(schema_migrations.c.version)))
+
+def upgrade(connection: Connection, migrations: List[Migration] = MIGRATIONS, target: Optional[int] = None) -> List[Migration]:
+    """
+        Applies, in order, every migration not recorded yet up to
+        target (all of them by default). Each one runs in its own
+        transaction together with its record
+    """
+    with connection.begin():
+        applied = set(applied_versions(connection))
+    done = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in applied or (target is not None and migration.version > target):
+            continue
+        with connection.begin():
+            migration.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(version=migration.version,
+                                                                name=migration.name,
+                                                                applied_at=datetime.now()))
+        done.append(migration)
+    return done
+
+def run(conn_string: str, target: Optional[int] = None) -> None:
+    engine = create_engine(conn_string)
+    with engine.connect() as connection:
+        done = upgrade(connection, target=target)
+    for migration in done:
+        print(f"Applied ==> {migration}")
+    if not done:
+        print("Database already up to date")
+
+def status(conn_string: str) -> None:
+    engine = create_engine(conn_string)
+    with engine.begin() as connection:
+        applied = set(applied_versions(connection))
+    for migration in MIGRATIONS:
+        print(f"[{'x' if migration.version in applied else ' '}] {migration}")
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+CLI_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(CLI_ROOT))
+
+# runs the CLI in a fresh interpreter where the services' package cannot be imported
+WITHOUT_SERVICES = """
+import sys
+sys.modules['src'] = None
+from typer.testing import CliRunner
+from chefcito_cli.main import app
+result = CliRunner().invoke(app, sys.argv[1:])
+print(result.output)
+sys.exit(result.exit_code)
+"""
+
+def cli(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([CLI_ROOT, PROJECT_ROOT])}
+    return subprocess.run([sys.executable, "-c", WITHOUT_SERVICES, *args], env=env, capture_output=True, text=True)
+
+def test_the_cli_starts_without_the_services_code():
+    result = cli("--help")
+    assert result.returncode == 0, result.stderr
+    assert "bench-near" in result.stdout
+
+def test_commands_that_need_the_services_code_say_so():
+    result = cli("bench-near", "--size", "10")
+    assert result.returncode == 1
+    assert "needs the services' code" in result.stdout
@@ -0,0 +1,77 @@
+from sqlalchemy import create_engine, inspect, text
+from chefcito_cli.scripts.explain import expected_plans, used_indexes
+from chefcito_cli.scripts.migrate import MIGRATIONS, applied_versions, baseline_metadata, upgrade
+from src.model.reservations.data.schema import ReservationsBase
+
+
+def test_migrations_apply_once_and_in_order(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    ReservationsBase.metadata.create_all(engine)
+    migrations = MIGRATIONS[1:3]
+    with engine.connect() as connection:
+        done = upgrade(connection, migrations)
+        again = upgrade(connection, migrations)
+        with connection.begin():
+            versions = applied_versions(connection)
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("reservations")}
+    assert [migration.version for migration in done] == [2, 3]
+    assert again == []
+    assert versions == [2, 3]
+    assert indexes["ix_reservations_venue_time"]["column_names"] == ["venue", "time", "id"]
+    assert indexes["ix_reservations_user_time"]["column_names"] == ["user", "time", "id"]
+    assert "ix_reservations_accepted_time" in indexes
+
+def test_target_stops_the_upgrade(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    with engine.connect() as connection:
+        assert upgrade(connection, MIGRATIONS, target=0) == []
+        with connection.begin():
+            assert applied_versions(connection) == []
+
+def test_every_checked_query_comes_from_the_builder():
+    plans = expected_plans()
+    assert set(plans) == {"venue history", "user history", "user stats at venue", "accepted by time"}
+    for query, expected in plans.values():
+        assert "ORDER BY reservations.time DESC, reservations.id DESC" in str(query)
+        assert all(index.startswith("ix_reservations_") for index in expected)
+
+def test_indexes_are_found_in_nested_plans():
+    plan = {"Node Type": "Limit", "Plans": [{"Node Type": "Index Scan", "Index Name": "ix_reservations_venue_time"}]}
+    assert used_indexes(plan) == {"ix_reservations_venue_time"}
+
+def test_version_column_is_added_to_existing_reservations(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE reservations (id VARCHAR PRIMARY KEY, "user" VARCHAR, venue VARCHAR, time DATETIME, people INTEGER, status VARCHAR)'))
+        connection.execute(text("INSERT INTO reservations VALUES ('1', 'user/a', 'venue', '2024-05-17 21:00:00', 2, 'Accepted')"))
+    with engine.connect() as connection:
+        upgrade(connection, MIGRATIONS[1:3])
+        version = connection.scalar(text("SELECT version FROM reservations WHERE id = '1'"))
+    assert version == 0
+
+def test_venue_coordinates_are_filled_from_the_location(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE venues (id VARCHAR PRIMARY KEY, location VARCHAR)"))
+        connection.execute(text("INSERT INTO venues VALUES ('near', '-34.6,-58.45'), ('nowhere', '123 Main St')"))
+    with engine.connect() as connection:
+        upgrade(connection, MIGRATIONS[3:])
+        rows = dict(connection.execute(text("SELECT id, lat FROM venues")).all())
+    indexes = {index["name"] for index in inspect(engine).get_indexes("venues")}
+    assert rows == {"near": -34.6, "nowhere": None}
+    assert "ix_venues_lat_lon" in indexes
+
+def test_venue_change_log_starts_at_version_zero(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    with engine.connect() as connection:
+        upgrade(connection, MIGRATIONS[4:])
+        upgrade(connection, MIGRATIONS[4:])
+        versions = connection.execute(text("SELECT id, version FROM venue_version")).all()
+    assert versions == [(1, 0)]
+    assert "venue_changes" in inspect(engine).get_table_names()
+
+def test_baseline_tables_do_not_follow_later_schema_changes():
+    tables = baseline_metadata.tables
+    assert set(tables) == {"user_types", "users", "permissions", "users_data", "numbers", "points", "reservations", "venues"}
+    assert "version" not in tables["reservations"].columns
+    assert not {"lat", "lon"} & set(tables["venues"].columns.keys())
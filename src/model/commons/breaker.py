@@ -0,0 +1,163 @@
+"""
+Breaker keeps per-target circuit breakers and retry budgets,
+so a degraded downstream gets less traffic instead of more
+"""
+import random
+import time
+from typing import Callable, Dict
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpen(Exception):
+    pass
+
+class ResiliencePolicy(BaseModel):
+    """
+        Per-target configuration, providers can pass their own
+        to tune how their dependency is protected
+    """
+    failure_threshold: int = 5
+    reset_timeout: float = 5.0
+    half_open_calls: int = 1
+    max_retries: int = 2
+    retry_ratio: float = 0.2
+    retries_per_second: float = 1.0
+    backoff_base: float = 0.05
+    backoff_cap: float = 2.0
+
+class CircuitBreaker:
+    """
+        Opens after failure_threshold consecutive failures, lets
+        half_open_calls probes through once reset_timeout passes
+        and closes again when one of them succeeds
+    """
+
+    def __init__(self, policy: ResiliencePolicy, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.policy.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self.probes = 0
+        if self.state == HALF_OPEN:
+            if self.probes >= self.policy.half_open_calls:
+                return False
+            self.probes += 1
+        return True
+
+    def cancel(self) -> None:
+        """
+            Gives back the probe of a call that was abandoned
+            before it got an answer
+        """
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.policy.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self.clock()
+
+class RetryBudget:
+    """
+        Token bucket that allows retries only while they stay under
+        retry_ratio of the requests, plus a small per second allowance
+    """
+
+    def __init__(self, policy: ResiliencePolicy, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self.clock = clock
+        self.capacity = max(1.0, policy.retries_per_second * 10)
+        self.tokens = self.capacity
+        self.last = clock()
+
+    def __refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.policy.retries_per_second)
+        self.last = now
+
+    def deposit(self) -> None:
+        self.__refill()
+        self.tokens = min(self.capacity, self.tokens + self.policy.retry_ratio)
+
+    def withdraw(self) -> bool:
+        self.__refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class Target:
+
+    def __init__(self, name: str, policy: ResiliencePolicy, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.policy = policy
+        self.breaker = CircuitBreaker(policy, clock)
+        self.budget = RetryBudget(policy, clock)
+
+    def backoff(self, attempt: int) -> float:
+        """
+            Full jitter exponential backoff for the given retry
+        """
+        ceiling = min(self.policy.backoff_cap, self.policy.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def snapshot(self) -> Dict[str, float | str]:
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "retry_tokens": self.budget.tokens
+            }
+
+def target_name(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class TargetRegistry:
+
+    def __init__(self):
+        self.policies: Dict[str, ResiliencePolicy] = {}
+        self.targets: Dict[str, Target] = {}
+
+    def configure(self, url: str, policy: ResiliencePolicy) -> None:
+        name = target_name(url)
+        self.policies[name] = policy
+        self.targets[name] = Target(name, policy)
+
+    def get(self, url: str) -> Target:
+        name = target_name(url)
+        target = self.targets.get(name)
+        if target is None:
+            target = Target(name, self.policies.get(name, ResiliencePolicy()))
+            self.targets[name] = target
+        return target
+
+    def snapshot(self) -> Dict[str, Dict[str, float | str]]:
+        return {name: target.snapshot() for name, target in self.targets.items()}
+
+targets = TargetRegistry()
+
+def configure_target(url: str, policy: ResiliencePolicy | None) -> None:
+    """
+        Registers the policy for every call made to url's host,
+        providers call this with their service url
+    """
+    if policy is not None:
+        targets.configure(url, policy)
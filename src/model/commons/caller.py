@@ -1,64 +1,172 @@
 """
 Caller provides a simple interface to manage aihttp calls
 """
-from typing import Any, Awaitable, Callable, List
-import aiohttp
 import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+import aiohttp
+from multidict import CIMultiDict
 
 from fastapi import status
+from src.model.commons import codec
+from src.model.commons.breaker import CircuitOpen, targets
+from src.model.commons.client import ClientSettings, registry
+from src.model.commons.flight import flight_key, flights
+from src.model.commons.hedge import hedgers
+from src.model.commons import metrics, tracing
+
+
+class CallResponse:
+    """
+        Fully read response of an inter-service call, the
+        connection is already back in the pool when built
+    """
+
+    def __init__(self, status: int, headers: CIMultiDict[str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    async def json(self) -> Any:
+        return codec.loads(self.body)
 
+    def close(self) -> None:
+        return
 
-type HTTPMethod = Callable[..., Awaitable[aiohttp.ClientResponse]]
+class BodyTooLarge(Exception):
+    pass
 
-async def __call(method: HTTPMethod, url: str, body: dict, headers: dict, params: dict) -> aiohttp.ClientResponse:
-    client = aiohttp.ClientSession()
-    response = await method(client, url, json=body, headers=headers,  params=params)
-    await client.close()
-    return response
+type HTTPMethod = Callable[..., Awaitable[CallResponse]]
 
-async def recover_json_data(response: aiohttp.ClientResponse) -> Any:
-    data = await asyncio.wait_for(response.json(), 0.5)
-    response.close()
-    return data
+async def open_client(settings: ClientSettings | None = None) -> None:
+    await registry.open(settings)
 
-async def get(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:  
-    return await __call(aiohttp.ClientSession.get, url, body, data, params) 
+async def close_client() -> None:
+    await registry.close()
 
-async def put(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:
-    return await __call(aiohttp.ClientSession.put, url, body, data, params)
+async def __read(response: aiohttp.ClientResponse) -> bytes:
+    """
+        Streams the body in chunks, the read timeout applies to
+        each chunk so big bodies are fine as long as data keeps
+        arriving, while oversized ones are rejected early
+    """
+    limit = registry.settings.http_max_body_size
+    if response.content_length is not None and response.content_length > limit:
+        raise BodyTooLarge(f"Response of {response.content_length} bytes exceeds {limit}")
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(registry.settings.http_read_chunk_size):
+        body.extend(chunk)
+        if len(body) > limit:
+            raise BodyTooLarge(f"Response exceeds {limit} bytes")
+    return bytes(body)
 
-async def delete(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:
-    return await __call(aiohttp.ClientSession.delete, url, body, data, params)
+def __finish(method: str, url: str, wall: float, start: float, status: Optional[int] = None, error: Optional[str] = None) -> None:
+    duration = time.perf_counter() - start
+    tracing.record(method, url, wall, duration, status=status, error=error)
+    metrics.observe_downstream(method, url, duration, status=status, error=error)
 
-async def post(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:
-   return await __call(aiohttp.ClientSession.post, url, body, data, params) 
+async def __call(method: str, url: str, body: Any, headers: dict, params: dict) -> CallResponse:
+    target = targets.get(url)
+    if not target.breaker.allow():
+        raise CircuitOpen(f"Circuit open for {target.name}")
+    client = registry.get()
+    data = None
+    headers = tracing.outgoing_headers(headers)
+    if body:
+        data = codec.dumps(body)
+        headers = {"Content-Type": "application/json", **headers}
+    wall = time.time()
+    start = time.perf_counter()
+    try:
+        async with client.request(method, url, data=data, headers=headers, params=codec.encode_params(params)) as response:
+            content = await __read(response)
+    except BodyTooLarge as e:
+        target.breaker.success()
+        __finish(method, url, wall, start, error=type(e).__name__)
+        raise
+    except asyncio.CancelledError:
+        target.breaker.cancel()
+        __finish(method, url, wall, start, error="cancelled")
+        raise
+    except Exception as e:
+        target.breaker.failure()
+        __finish(method, url, wall, start, error=type(e).__name__)
+        raise
+    __finish(method, url, wall, start, status=response.status)
+    if response.status >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+        target.breaker.failure()
+    else:
+        target.breaker.success()
+    return CallResponse(response.status, CIMultiDict(response.headers), content)
 
-async def with_retry(method: HTTPMethod, url: str, body: dict = {}, data: dict = {}, params: dict = {}, expected_status: List[int] = [status.HTTP_200_OK]) -> Any:
-    max_tries = 3
-    count = 0
-    while count < max_tries:
+async def recover_json_data(response: CallResponse) -> Any:
+    if not response.body:
+        return None
+    return codec.loads(response.body)
+
+async def get(url: str, body: dict = {}, data: dict = {}, params: dict = {}, hedge: bool = False) -> CallResponse:
+    """
+        Identical concurrent reads share a single call. Idempotent
+        reads can also set hedge to send a second attempt when the
+        first one is slower than usual for its target
+    """
+    key = flight_key("GET", url, codec.encode_params(params), data, codec.dumps(body) if body else None)
+    if hedge:
+        return await flights.do(key, lambda: hedgers.get(url).run(lambda: __call("GET", url, body, data, params)))
+    return await flights.do(key, lambda: __call("GET", url, body, data, params))
+
+async def put(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> CallResponse:
+    return await __call("PUT", url, body, data, params)
+
+async def delete(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> CallResponse:
+    return await __call("DELETE", url, body, data, params)
+
+async def post(url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> CallResponse:
+   return await __call("POST", url, body, data, params)
+
+async def with_retry(method: HTTPMethod, url: str, body: dict = {}, data: dict = {}, params: dict = {}, expected_status: List[int] = [status.HTTP_200_OK], target: str | None = None) -> Any:
+    """
+        Retries while the target's budget allows it, waiting a
+        jittered backoff between tries, an open circuit fails
+        right away
+    """
+    destination = targets.get(target or url)
+    destination.budget.deposit()
+    attempt = 0
+    while True:
+        token = tracing.attempt.set(attempt)
         try:
             response = await method(url, body=body, data=data, params=params)
-            if response.status not in expected_status:
-                count += 1
-            else:
+            if response.status in expected_status:
                 return response
+        except CircuitOpen:
+            raise
         except Exception:
-            count += 1
-    raise Exception("Failed retry")
+            pass
+        finally:
+            tracing.attempt.reset(token)
+        if attempt >= destination.policy.max_retries or not destination.budget.withdraw():
+            raise Exception("Failed retry")
+        await asyncio.sleep(destination.backoff(attempt))
+        attempt += 1
 
-async def back_off(method: HTTPMethod, url: str, body: dict = {}, data: dict = {}, params: dict = {}) -> Any:
+async def back_off(method: HTTPMethod, url: str, body: dict = {}, data: dict = {}, params: dict = {}, target: str | None = None) -> Any:
+    destination = targets.get(target or url)
+    destination.budget.deposit()
     wait_time = 0.5
+    attempt = 0
     while wait_time <= 4:
-        response = None
+        token = tracing.attempt.set(attempt)
         try:
-            response = await method(url, body=body, data=data, params=params)
-            returnable_data = await asyncio.wait_for(response.json(), wait_time)
-            response.close()
-            return returnable_data
+            response = await asyncio.wait_for(method(url, body=body, data=data, params=params), wait_time)
+            return await recover_json_data(response)
         except TimeoutError:
-            if response is not None:
-                response.close()
             wait_time *= 2
+        finally:
+            tracing.attempt.reset(token)
+        if not destination.budget.withdraw():
+            break
+        await asyncio.sleep(destination.backoff(attempt))
+        attempt += 1
 
     raise Exception("Failed to connect to firebase server")
@@ -0,0 +1,80 @@
+"""
+Client holds the pooled aiohttp sessions shared by the
+inter-service calls and the span exporters
+"""
+import asyncio
+from typing import Dict
+import aiohttp
+from pydantic_settings import BaseSettings
+
+class ClientSettings(BaseSettings):
+    """
+        Connection pool configuration for the shared client,
+        services extend their Settings from this one so every
+        value can be tuned through the environment
+    """
+    http_pool_size: int = 100
+    http_pool_size_per_host: int = 20
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 30
+    http_connect_timeout: float = 2
+    http_read_timeout: float = 10
+    http_total_timeout: float = 30
+    http_max_body_size: int = 32 * 1024 * 1024
+    http_read_chunk_size: int = 64 * 1024
+
+class ClientRegistry:
+    """
+        Keeps one pooled ClientSession per event loop, so
+        every call made from the same process reuses
+        the same keep-alive connections
+    """
+
+    def __init__(self):
+        self.settings = ClientSettings()
+        self.clients: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def configure(self, settings: ClientSettings) -> None:
+        self.settings = settings
+
+    def __create(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+                limit=self.settings.http_pool_size,
+                limit_per_host=self.settings.http_pool_size_per_host,
+                ttl_dns_cache=self.settings.http_dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.settings.http_keepalive_timeout
+                )
+        timeout = aiohttp.ClientTimeout(
+                total=self.settings.http_total_timeout,
+                sock_connect=self.settings.http_connect_timeout,
+                sock_read=self.settings.http_read_timeout
+                )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    def get(self) -> aiohttp.ClientSession:
+        """
+            Returns the session for the running loop, creating
+            it if the service did not open one on startup
+        """
+        loop = asyncio.get_running_loop()
+        for stale in [key for key in self.clients if key.is_closed()]:
+            self.clients.pop(stale)
+        client = self.clients.get(loop)
+        if client is None or client.closed:
+            client = self.__create()
+            self.clients[loop] = client
+        return client
+
+    async def open(self, settings: ClientSettings | None = None) -> aiohttp.ClientSession:
+        if settings is not None:
+            self.configure(settings)
+        return self.get()
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        client = self.clients.pop(loop, None)
+        if client is not None and not client.closed:
+            await client.close()
+
+registry = ClientRegistry()
@@ -0,0 +1,53 @@
+"""
+Codec holds the JSON wire format of the calls made through
+the caller, the apps answer with FastAPI's ORJSONResponse
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import orjson
+from pydantic import BaseModel
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def __default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """
+        Serializes the value, datetimes, UUIDs and pydantic models
+        are handled without any previous conversion
+    """
+    return orjson.dumps(value, default=__default, option=OPTIONS)
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data)
+
+def __param(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+def encode_params(params: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+        Converts a dict into query parameters, sequences are
+        sent as repeated keys and None values are skipped
+    """
+    encoded = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            encoded.extend((key, __param(item)) for item in value)
+        else:
+            encoded.append((key, __param(value)))
+    return encoded
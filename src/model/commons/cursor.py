@@ -0,0 +1,41 @@
+"""
+Cursor holds the opaque tokens used for keyset pagination.
+A token carries the sort key of the last row of a page, the
+next page starts right after it instead of skipping rows
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from src.model.commons import codec
+
+def encode(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(codec.dumps(list(values))).decode().rstrip("=")
+
+def decode(token: str, *types: Callable[[Any], Any]) -> List[Any]:
+    """
+        Recovers the key stored in the token, converting each value
+        with the type given for its position. Fails with ValueError
+        for tokens that were not created by encode
+    """
+    try:
+        values = codec.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(f"Invalid cursor: {token}")
+    try:
+        return [datetime.fromisoformat(value) if kind is datetime else kind(value)
+                for kind, value in zip(types, values)]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+def next_cursor[T](rows: Sequence[T], limit: int, key: Callable[[T], Sequence[Any]]) -> Optional[str]:
+    """
+        Token for the page after rows, None once a page comes back
+        shorter than the limit
+    """
+    if not rows or len(rows) < limit:
+        return None
+    return encode(key(rows[-1]))
@@ -1,5 +1,37 @@
-from typing import List, Self, Tuple
+import math
+from typing import List, Optional, Self, Sequence, Tuple
 import haversine as hs
+import numpy as np
+
+EARTH_RADIUS = 6371.0088
+
+def bounding_box(center: Tuple[float, float], radius: float) -> Tuple[float, float, float, float]:
+    """
+        South, west, north and east bounds that hold every
+        point at most radius km away from center. Near the
+        poles or across the antimeridian all longitudes are taken
+    """
+    lat, lon = center
+    angle = radius / EARTH_RADIUS
+    south = max(lat - math.degrees(angle), -90.0)
+    north = min(lat + math.degrees(angle), 90.0)
+    if math.sin(angle) >= math.cos(math.radians(lat)) or south == -90.0 or north == 90.0:
+        return south, -180.0, north, 180.0
+    delta_lon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    west, east = lon - delta_lon, lon + delta_lon
+    if west < -180.0 or east > 180.0:
+        return south, -180.0, north, 180.0
+    return south, west, north, east
+
+def haversine_to(center: Tuple[float, float], coordinates: np.ndarray) -> np.ndarray:
+    """
+        Km from center to each (lat, lon) row of coordinates,
+        computed as haversine.haversine does for a single pair
+    """
+    lat, lon = np.radians(center[0]), np.radians(center[1])
+    lats, lons = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+    d = np.sin((lats - lat) * 0.5) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) * 0.5) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(d))
 
 class LocalPosition:
 
@@ -23,78 +55,40 @@ class LocalPosition:
         return isinstance(other, LocalPosition) and \
         self.id == other.id and self.location == other.location
 
-class RelativeDistance:
-
-    def __init__(self, point: LocalPosition, to: LocalPosition):
-        self.point = point
-        self.to = to
-        self.distance = point.distance_to(to)
-
-    def __eq__(self, value: object) -> bool:
-        """
-            Returns if to distances are equal:
-            two places are considered equally away if their
-            distances relative to the position do not difere
-            more than 10 meter (0.01 km)
-        """
-        return isinstance(value, RelativeDistance) and \
-                abs(self.distance - value.distance) <= 0.01
-    
-    def __ne__(self, value: object) -> bool:
-        return not (self == value)
-    
-    def __lt__(self, value: object) -> bool:
-        return isinstance(value, RelativeDistance) and \
-                self.distance - value.distance < -0.01
-    
-    def __le__(self, value: object) -> bool:
-        return self == value or self < value
-
-    def __gt__(self, value: object) -> bool:
-        return not (self <= value)
-    
-    def __ge__(self, value: object) -> bool:
-        return self == value or self > value
-
-    
-
 class DistanceRanker:
+    """
+        Ranks ids by the distance from their (lat, lon) rows to
+        point. The distances of a batch are computed at once, and
+        with a limit only the closest limit ids are kept between
+        batches
+    """
 
-    def __init__(self, point: LocalPosition):
-        self.rank: List[List[RelativeDistance]] = []
+    def __init__(self, point: Tuple[float, float], limit: Optional[int] = None):
         self.point = point
+        self.limit = limit
+        self.ids: List[np.ndarray] = []
+        self.distances: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.ids)
 
-    def add_batch(self, batch: List[LocalPosition]) -> None:
-        processed = list(
-            map(
-                lambda point: RelativeDistance(self.point, point),
-                batch
-            )
-        ) 
-        processed.sort()
-        self.rank.append(processed)
+    def add_batch(self, ids: Sequence[str], coordinates: np.ndarray) -> None:
+        if not len(ids):
+            return
+        self.ids.append(np.asarray(ids, dtype=object))
+        self.distances.append(haversine_to(self.point, np.asarray(coordinates, dtype=np.float64)))
+        if self.limit is not None and len(self) > self.limit:
+            self.__keep_closest(self.limit)
 
-    def __merge_two(self) -> None:
-        right = self.rank.pop()
-        left = self.rank.pop()
-        result = []
-        while right and left:
-            if right[0] < left[0]:
-                result.append(right.pop(0))
-            else:
-                result.append(left.pop(0))
-        while right:
-            result.append(right.pop(0))
-        while left:
-            result.append(left.pop(0))
-        self.rank.append(result)
+    def __keep_closest(self, amount: int) -> None:
+        ids, distances = np.concatenate(self.ids), np.concatenate(self.distances)
+        kept = np.sort(np.argpartition(distances, amount - 1)[:amount]) if amount > 0 else np.empty(0, dtype=np.intp)
+        self.ids = [ids[kept]]
+        self.distances = [distances[kept]]
 
-    def sort(self) -> List[Tuple[LocalPosition, int]]:
-        while len(self.rank) > 1:
-            self.__merge_two()
-        return list(
-            map(
-            lambda value: (value.to, int(value.distance*1000)),  
-            self.rank[0]
-            )
-        )
+    def sort(self) -> List[Tuple[str, int]]:
+        if not self.ids:
+            return []
+        ids, distances = np.concatenate(self.ids), np.concatenate(self.distances)
+        order = np.argsort(distances, kind="stable")[:self.limit]
+        return [(ids[index], int(distances[index] * 1000)) for index in order]
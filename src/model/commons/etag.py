@@ -0,0 +1,35 @@
+"""
+Etag adds conditional GET support, responses carry a strong
+validator derived from their content and matching If-None-Match
+requests are answered with an empty 304
+"""
+from hashlib import blake2b
+from typing import Any
+
+from fastapi import Request, Response, status
+
+from src.model.commons import codec
+
+def compute_etag(body: bytes) -> str:
+    return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+def matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+def conditional_response(request: Request, content: Any, status_code: int | None = None) -> Response:
+    """
+        Serializes content and answers 304 when the client
+        already holds the same representation
+    """
+    body = codec.dumps(content)
+    status_code = status_code or status.HTTP_200_OK
+    if status_code != status.HTTP_200_OK:
+        return Response(content=body, status_code=status_code, media_type="application/json")
+    etag = compute_etag(body)
+    headers = {"ETag": etag}
+    if matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,44 @@
+"""
+Flight collapses identical concurrent calls into a single one,
+every caller waiting on the same key shares its result. Nothing
+is kept once the call finishes, so no answer is ever stale
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+
+    def __init__(self):
+        self.calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+        self.shared = 0
+
+    def __finish(self, key: Tuple[asyncio.AbstractEventLoop, Hashable], future: asyncio.Future) -> None:
+        if self.calls.get(key) is future:
+            self.calls.pop(key)
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+            Runs call unless one with the same key is already in
+            flight, in which case its result is awaited instead
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        future = self.calls.get(flight_key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.calls[flight_key] = future
+            future.add_done_callback(lambda done: self.__finish(flight_key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        return len(self.calls)
+
+flights = SingleFlight()
+
+def flight_key(method: str, url: str, params: Any, headers: Dict[str, str], body: bytes | None) -> Hashable:
+    return (method, url, tuple(params), tuple(sorted(headers.items())), body)
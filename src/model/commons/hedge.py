@@ -0,0 +1,147 @@
+"""
+Hedge sends a second copy of an idempotent call when the
+first one takes longer than what the target usually takes,
+keeping the extra load under a fixed ratio of the requests
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from src.model.commons.breaker import target_name
+
+T = TypeVar("T")
+
+class HedgePolicy(BaseModel):
+    percentile: float = 0.95
+    min_delay: float = 0.01
+    max_delay: float = 1.0
+    window: int = 200
+    min_samples: int = 20
+    max_hedge_ratio: float = 0.1
+
+class LatencyWindow:
+    """
+        Keeps the latest latencies of a target to estimate
+        its percentiles
+    """
+
+    def __init__(self, size: int):
+        self.samples: deque[float] = deque(maxlen=size)
+
+    def add(self, sample: float) -> None:
+        self.samples.append(sample)
+
+    def percentile(self, value: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(value * len(ordered)))
+        return ordered[index]
+
+class Hedger:
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self.latencies = LatencyWindow(policy.window)
+        self.capacity = max(1.0, policy.max_hedge_ratio * policy.window)
+        self.tokens = 1.0
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def delay(self) -> float:
+        if len(self.latencies.samples) < self.policy.min_samples:
+            return self.policy.max_delay
+        estimate = self.latencies.percentile(self.policy.percentile) or self.policy.max_delay
+        return min(self.policy.max_delay, max(self.policy.min_delay, estimate))
+
+    def __allow_hedge(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    async def __timed(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+            Records how long the attempt took, a cancelled loser
+            records the time it ran for so slow attempts still
+            count towards the percentile
+        """
+        start = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            self.latencies.add(time.monotonic() - start)
+            raise
+        self.latencies.add(time.monotonic() - start)
+        return result
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+            Runs call, firing a hedge if it does not answer within
+            the current delay, the first successful answer wins and
+            the other attempt is cancelled
+        """
+        self.requests += 1
+        self.tokens = min(self.capacity, self.tokens + self.policy.max_hedge_ratio)
+        first = asyncio.ensure_future(self.__timed(call))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if done or not self.__allow_hedge():
+                return await first
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(self.__timed(call)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.wins += 1
+                        return task.result()
+            tasks[1].exception()
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "delay": self.delay()
+            }
+
+class HedgerRegistry:
+
+    def __init__(self):
+        self.policies: Dict[str, HedgePolicy] = {}
+        self.hedgers: Dict[str, Hedger] = {}
+
+    def configure(self, url: str, policy: HedgePolicy) -> None:
+        name = target_name(url)
+        self.policies[name] = policy
+        self.hedgers[name] = Hedger(policy)
+
+    def get(self, url: str) -> Hedger:
+        name = target_name(url)
+        hedger = self.hedgers.get(name)
+        if hedger is None:
+            hedger = Hedger(self.policies.get(name, HedgePolicy()))
+            self.hedgers[name] = hedger
+        return hedger
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: hedger.snapshot() for name, hedger in self.hedgers.items()}
+
+hedgers = HedgerRegistry()
+
+def configure_hedging(url: str, policy: HedgePolicy | None) -> None:
+    if policy is not None:
+        hedgers.configure(url, policy)
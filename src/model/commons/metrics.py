@@ -0,0 +1,255 @@
+"""
+Metrics every service exposes at /metrics in the Prometheus text
+format: request latency by route template, requests in flight,
+latency of downstream calls by target, database sessions and pool
+usage, default executor queue depth and Mongo command timings
+"""
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pymongo import monitoring
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.model.commons.breaker import CLOSED, target_name, targets
+from src.model.commons.cache import LRUCache
+from src.model.commons.hedge import hedgers
+
+METRICS_PATH = "/metrics"
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+requests_latency = Histogram(
+        "chefcito_http_request_duration_seconds",
+        "Time spent serving a request, by route template",
+        ["service", "method", "route", "status"],
+        buckets=LATENCY_BUCKETS
+        )
+requests_in_flight = Gauge(
+        "chefcito_http_requests_in_flight",
+        "Requests currently being served",
+        ["service"]
+        )
+downstream_latency = Histogram(
+        "chefcito_downstream_request_duration_seconds",
+        "Time spent on calls to other services, by target",
+        ["target", "method", "outcome"],
+        buckets=LATENCY_BUCKETS
+        )
+db_sessions = Gauge(
+        "chefcito_db_sessions_open",
+        "Database sessions currently open"
+        )
+db_checked_out = Gauge(
+        "chefcito_db_connections_checked_out",
+        "Connections currently checked out of the pool",
+        ["engine"]
+        )
+db_connects = Counter(
+        "chefcito_db_connections_opened_total",
+        "New connections opened against the database",
+        ["engine"]
+        )
+db_pool_wait = Histogram(
+        "chefcito_db_pool_wait_seconds",
+        "Time spent waiting for a connection of the pool",
+        ["engine"],
+        buckets=LATENCY_BUCKETS
+        )
+executor_queued = Gauge(
+        "chefcito_executor_queue_depth",
+        "Jobs waiting for a thread of the default executor"
+        )
+executor_running = Gauge(
+        "chefcito_executor_running",
+        "Jobs running on the default executor"
+        )
+mongo_latency = Histogram(
+        "chefcito_mongo_command_duration_seconds",
+        "Time spent on Mongo commands",
+        ["command", "outcome"],
+        buckets=LATENCY_BUCKETS
+        )
+
+class ResilienceCollector(Collector):
+    """
+        Reports the state of circuit breakers, retry budgets and
+        hedgers when scraped
+    """
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        state = GaugeMetricFamily("chefcito_breaker_open", "1 when the breaker of the target is not closed", labels=["target", "state"])
+        failures = GaugeMetricFamily("chefcito_breaker_failures", "Consecutive failures seen by the breaker", labels=["target"])
+        tokens = GaugeMetricFamily("chefcito_retry_budget_tokens", "Retries left in the budget of the target", labels=["target"])
+        for name, snapshot in targets.snapshot().items():
+            state.add_metric([name, str(snapshot["state"])], 0 if snapshot["state"] == CLOSED else 1)
+            failures.add_metric([name], float(snapshot["failures"]))
+            tokens.add_metric([name], float(snapshot["retry_tokens"]))
+        hedges = GaugeMetricFamily("chefcito_hedges_sent", "Hedged attempts sent to the target", labels=["target"])
+        wins = GaugeMetricFamily("chefcito_hedges_won", "Hedged attempts that answered first", labels=["target"])
+        for name, snapshot in hedgers.snapshot().items():
+            hedges.add_metric([name], snapshot["hedges"])
+            wins.add_metric([name], snapshot["wins"])
+        yield from (state, failures, tokens, hedges, wins)
+
+class PoolCollector(Collector):
+    """
+        Reports size and overflow of every watched pool that has them
+    """
+
+    def __init__(self):
+        self.engines: Dict[str, Engine] = {}
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        size = GaugeMetricFamily("chefcito_db_pool_size", "Configured size of the pool", labels=["engine"])
+        overflow = GaugeMetricFamily("chefcito_db_pool_overflow", "Connections opened over the pool size", labels=["engine"])
+        for name, engine in self.engines.items():
+            pool: Any = engine.pool
+            if hasattr(pool, "size") and hasattr(pool, "overflow"):
+                size.add_metric([name], pool.size())
+                overflow.add_metric([name], max(0, pool.overflow()))
+        yield from (size, overflow)
+
+class CacheCollector(Collector):
+    """
+        Reports hits, misses and size of every watched cache
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, LRUCache] = {}
+
+    def collect(self) -> Iterable[Any]:
+        hits = CounterMetricFamily("chefcito_cache_hits", "Lookups answered by the cache", labels=["cache"])
+        misses = CounterMetricFamily("chefcito_cache_misses", "Lookups the cache could not answer", labels=["cache"])
+        entries = GaugeMetricFamily("chefcito_cache_entries", "Entries currently held by the cache", labels=["cache"])
+        for name, cache in self.caches.items():
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            entries.add_metric([name], len(cache))
+        yield from (hits, misses, entries)
+
+pools = PoolCollector()
+caches = CacheCollector()
+REGISTRY.register(ResilienceCollector())
+REGISTRY.register(pools)
+REGISTRY.register(caches)
+
+def watch_cache(cache: LRUCache, name: str) -> LRUCache:
+    """
+        Reports the counters of cache under name
+    """
+    caches.caches[name] = cache
+    return cache
+
+def watch_engine[E: (Engine, AsyncEngine)](engine: E, name: str | None = None) -> E:
+    """
+        Tracks connections checked out of the pool of the engine
+    """
+    sync_engine: Engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    name = name or sync_engine.url.render_as_string(hide_password=True).rsplit("@", 1)[-1]
+    pools.engines[name] = sync_engine
+    event.listen(sync_engine, "connect", lambda *_: db_connects.labels(name).inc())
+    event.listen(sync_engine, "checkout", lambda *_: db_checked_out.labels(name).inc())
+    event.listen(sync_engine, "checkin", lambda *_: db_checked_out.labels(name).dec())
+    return engine
+
+def observe_downstream(method: str, url: str, duration: float, status: Optional[int] = None, error: Optional[str] = None) -> None:
+    outcome = str(status) if status is not None else (error or "error")
+    downstream_latency.labels(target_name(url), method, outcome).observe(duration)
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """
+        Thread pool that reports how many jobs are waiting for
+        a thread and how many are running
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        executor_queued.inc()
+        def run():
+            executor_queued.dec()
+            executor_running.inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                executor_running.dec()
+        return super().submit(run)
+
+def instrument_executor(loop: asyncio.AbstractEventLoop) -> None:
+    if isinstance(getattr(loop, "_default_executor", None), InstrumentedExecutor):
+        return
+    loop.set_default_executor(InstrumentedExecutor(thread_name_prefix="chefcito"))
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """
+        Times every command sent through the Mongo clients
+        it is registered on
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        return
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        mongo_latency.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        mongo_latency.labels(event.command_name, "failed").observe(event.duration_micros / 1e6)
+
+mongo_timer = MongoCommandTimer()
+
+class MetricsMiddleware:
+    """
+        Times every request under the template of the route it
+        matched, so /venues/{venue} is one series no matter the venue.
+        On startup it also instruments the default executor
+    """
+
+    def __init__(self, app: ASGIApp, service: str) -> None:
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            instrument_executor(asyncio.get_running_loop())
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = requests_in_flight.labels(self.service)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            requests_latency.labels(
+                    self.service,
+                    scope["method"],
+                    route.path if route is not None else UNMATCHED_ROUTE,
+                    str(status)
+                    ).observe(time.perf_counter() - start)
+
+def instrument(app: FastAPI, service: str) -> None:
+    """
+        Adds the metrics middleware and the /metrics endpoint
+    """
+    app.add_middleware(MetricsMiddleware, service=service)
+
+    @app.get(METRICS_PATH, include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
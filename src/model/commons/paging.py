@@ -0,0 +1,77 @@
+"""
+Paging fetches a page of rows together with the total of rows
+matching the query in a single statement, by adding a
+count(*) OVER () column to the page query
+"""
+import json
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import ClauseElement, Executable, Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+
+EXACT_TOTAL = "exact"
+ESTIMATED_TOTAL = "estimated"
+NO_TOTAL = "none"
+
+TOTAL_COLUMN = "paging_total"
+
+def total_mode(include_total: bool = True, estimate_total: bool = False) -> str:
+    """
+        Maps the flags exposed by listing endpoints to a mode
+    """
+    if not include_total:
+        return NO_TOTAL
+    return ESTIMATED_TOTAL if estimate_total else EXACT_TOTAL
+
+class Explain(Executable, ClauseElement):
+    """
+        EXPLAIN (FORMAT JSON) over a statement, keeping its
+        bound parameters
+    """
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+@compiles(Explain, "postgresql")
+def __compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+async def __count(session: AsyncSession, query: Select) -> int:
+    count = select(func.count()).select_from(query.order_by(None).limit(None).offset(None).subquery())
+    return (await session.execute(count)).scalar() or 0
+
+async def __estimate(session: AsyncSession, query: Select) -> int:
+    """
+        Row estimate of the planner for the query, does not read
+        the rows. Other dialects get the exact count instead
+    """
+    if session.bind.dialect.name != "postgresql":
+        return await __count(session, query)
+    plan = (await session.execute(Explain(query.order_by(None).limit(None).offset(None)))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def fetch_page(session: AsyncSession, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[Any], Optional[int]]:
+    """
+        Runs query for the page [start, start + limit) and returns
+        its rows (the first entity of each) together with the total.
+        In exact mode the total travels with the rows, a second
+        statement is only needed when the page comes back empty
+        past the first one
+    """
+    page = query.limit(limit).offset(start)
+    if total != EXACT_TOTAL:
+        rows = list(await session.scalars(page))
+        if total == NO_TOTAL:
+            return rows, None
+        return rows, await __estimate(session, query)
+
+    counted = page.add_columns(func.count().over().label(TOTAL_COLUMN))
+    result = (await session.execute(counted)).all()
+    if result:
+        return [row[0] for row in result], getattr(result[0], TOTAL_COLUMN)
+    if start == 0:
+        return [], 0
+    return [], await __count(session, query)
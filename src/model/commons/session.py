@@ -1,33 +1,248 @@
-from collections.abc import Callable
-from typing import Any
-from sqlalchemy.orm import Session
-from sqlalchemy import Engine
+import asyncio
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List
+from pydantic_settings import BaseSettings
+from sqlalchemy import URL, make_url, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from src.model.commons.logger import Logger
+from src.model.commons.metrics import db_pool_wait, db_sessions, watch_engine
 
-def with_session(call: Callable[[Session], Any]) -> Callable[[Engine], Any]:
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite"
+}
+
+def async_url(conn_string: str) -> URL:
+    """
+        Points the connection string at the asyncio driver
+        of its backend, so the same settings work for both
+        sync scripts and the services
+    """
+    url = make_url(conn_string.replace("postgres://", "postgresql://", 1))
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.drivername == driver:
+        return url
+    return url.set(drivername=driver)
+
+class PoolSettings(BaseSettings):
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 15000
+    db_pool_warmup: int = 2
+    db_replicas: List[str] = []
+    db_replica_ejection: float = 30
+
+class TimedPool(AsyncAdaptedQueuePool):
+    """
+        Queue pool that keeps track of how long callers wait
+        to get a connection, opening it included when the pool
+        has to grow
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.waited = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.waits += 1
+            self.waited += elapsed
+            db_pool_wait.labels(self.logging_name or "default").observe(elapsed)
+
+def __connect_args(url: URL, settings: PoolSettings) -> Dict[str, Any]:
+    if url.drivername != ASYNC_DRIVERS["postgresql"] or settings.db_statement_timeout_ms <= 0:
+        return {}
+    return {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+
+def create_engine(conn_string: str, name: str, settings: PoolSettings | None = None) -> AsyncEngine:
+    """
+        Creates the pooled asyncio engine a base runs its
+        sessions on, every service shares the same pool
+        configuration through its settings
+    """
+    settings = settings or PoolSettings()
+    url = async_url(conn_string)
+    engine = create_async_engine(
+            url,
+            poolclass=TimedPool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_logging_name=name,
+            connect_args=__connect_args(url, settings)
+            )
+    return watch_engine(engine, name)
+
+class Engines:
+    """
+        The primary engine of a base together with its read
+        replicas. Readers are handed out round-robin, a replica
+        that fails to answer is left out for a while and reads
+        fall back to the primary when none is left
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine] = [], ejection: float = 30):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.__ejection = ejection
+        self.__ejected: Dict[int, float] = {}
+        self.__turns = itertools.count()
+
+    def reader(self) -> AsyncEngine:
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = next(self.__turns) % len(self.replicas)
+            if self.__ejected.get(index, 0) <= now:
+                return self.replicas[index]
+        return self.primary
+
+    def eject(self, replica: AsyncEngine) -> None:
+        for index, engine in enumerate(self.replicas):
+            if engine is replica:
+                Logger.info(f"Ejecting replica {engine.pool.logging_name} for {self.__ejection}s")
+                self.__ejected[index] = time.monotonic() + self.__ejection
+
+    def all(self) -> List[AsyncEngine]:
+        return [self.primary, *self.replicas]
+
+def create_engines(conn_string: str, name: str, settings: PoolSettings | None = None) -> Engines:
+    """
+        Creates the primary engine and one engine per replica
+        in the settings, all with the same pool configuration
+    """
+    settings = settings or PoolSettings()
+    replicas = [create_engine(replica, f"{name}-replica-{index}", settings)
+                for index, replica in enumerate(settings.db_replicas)]
+    return Engines(create_engine(conn_string, name, settings), replicas, settings.db_replica_ejection)
+
+__primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+        Sends the reads done inside the block to the primary,
+        for paths that must see their own writes
+    """
+    token = __primary_reads.set(True)
+    try:
+        yield
+    finally:
+        __primary_reads.reset(token)
+
+def reads_primary() -> bool:
+    return __primary_reads.get()
+
+def __unavailable(error: Exception) -> bool:
+    """
+        Only failures to reach the database count, a slow or
+        failing query says nothing about the replica health
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return False
+    if isinstance(error, OSError):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+async def warm_up(engine: AsyncEngine | Engines, connections: int) -> None:
+    """
+        Opens connections up front so the first requests
+        do not pay for the connection setup. A database that
+        is not reachable yet is logged and left for later
+    """
+    if isinstance(engine, Engines):
+        await asyncio.gather(*(warm_up(one, connections) for one in engine.all()))
+        return
+
+    async def open_one():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    connections = min(connections, engine.pool.size()) if isinstance(engine.pool, TimedPool) else connections
+    try:
+        await asyncio.gather(*(open_one() for _ in range(connections)))
+    except Exception as e:
+        Logger.info(f"Could not warm up pool {engine.pool.logging_name}: {e}")
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, float]:
+    pool = engine.pool
+    if not isinstance(pool, TimedPool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "waits": pool.waits,
+        "wait_seconds": pool.waited
+        }
+
+def with_session(call: Callable[[AsyncSession], Awaitable[Any]]) -> Callable[[AsyncEngine | Engines], Awaitable[Any]]:
     """
         Returns a wrapper over the function passed
         as an argument that takes care of creating, commiting
-        and closing the session
+        and closing the session. Always runs on the primary
     """
-    def callee(engine: Engine) -> Any:
-        session = Session(engine)
-        result = call(session)
-        session.commit()
-        session.close()
+    async def callee(engine: AsyncEngine | Engines) -> Any:
+        if isinstance(engine, Engines):
+            engine = engine.primary
+        db_sessions.inc()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                result = await call(session)
+                await session.commit()
+        finally:
+            db_sessions.dec()
         return result
 
     return callee
 
-def with_no_commit(call: Callable[[Session], Any]) -> Callable[[Engine], Any]:
+def with_no_commit(call: Callable[[AsyncSession], Awaitable[Any]], primary: bool = False) -> Callable[[AsyncEngine | Engines], Awaitable[Any]]:
     """
         Same as with_session, but does not call commit.
         Works for queries that require to select a value/values
-        but that do not change the underlying data
+        but that do not change the underlying data. Given the
+        engines of a base it reads from a replica, unless primary
+        is set or the call runs inside primary_reads. A replica
+        that cannot be reached is ejected and the read is retried
+        on the primary, other errors reach the caller
     """
-    def callee(engine: Engine) -> Any:
-        session = Session(engine)
-        result = call(session)
-        session.close()
+    async def run(engine: AsyncEngine) -> Any:
+        db_sessions.inc()
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                result = await call(session)
+        finally:
+            db_sessions.dec()
         return result
 
+    async def callee(engine: AsyncEngine | Engines) -> Any:
+        if not isinstance(engine, Engines):
+            return await run(engine)
+        if primary or reads_primary():
+            return await run(engine.primary)
+        reader = engine.reader()
+        if reader is engine.primary:
+            return await run(reader)
+        try:
+            return await run(reader)
+        except Exception as e:
+            if not __unavailable(e):
+                raise
+            engine.eject(reader)
+            return await run(engine.primary)
+
     return callee
@@ -0,0 +1,214 @@
+"""
+Tracing follows a request across services. The first service
+hit assigns a request id, every call made through the caller
+forwards it and records a span, and the answer carries the
+spans of the hop in a Server-Timing header
+"""
+import asyncio
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.model.commons import codec
+from src.model.commons.client import registry
+from src.model.commons.logger import Logger
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+collected: ContextVar[Optional[List['Span']]] = ContextVar("collected", default=None)
+attempt: ContextVar[int] = ContextVar("attempt", default=0)
+
+class Span(BaseModel):
+    request_id: str
+    service: str
+    name: str
+    url: str
+    status: Optional[int] = None
+    start: float
+    duration_ms: float
+    retries: int = 0
+    error: Optional[str] = None
+
+class TracingSettings(BaseSettings):
+    trace_file: str = ""
+    trace_endpoint: str = ""
+
+class SpanExporter:
+
+    async def export(self, spans: List[Span]) -> None:
+        raise Exception("Interface method should not be called")
+
+class NoExporter(SpanExporter):
+
+    async def export(self, spans: List[Span]) -> None:
+        return
+
+class FileSpanExporter(SpanExporter):
+    """
+        Appends spans as JSON lines to a local collector file,
+        the writes run in the default executor off the event loop
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __write(self, lines: bytes) -> None:
+        with self.lock:
+            with open(self.path, "ab") as file:
+                file.write(lines)
+
+    async def export(self, spans: List[Span]) -> None:
+        lines = b"".join(codec.dumps(span) + b"\n" for span in spans)
+        await asyncio.get_running_loop().run_in_executor(None, self.__write, lines)
+
+class OTLPSpanExporter(SpanExporter):
+    """
+        Posts spans to an OTLP/HTTP JSON compatible collector
+        through the shared client session, errors are logged
+        and never reach the request
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = f"{endpoint.rstrip('/')}/v1/traces"
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for span in spans:
+            by_service.setdefault(span.service, []).append({
+                "traceId": span.request_id.replace("-", "")[:32].ljust(32, "0"),
+                "spanId": uuid4().hex[:16],
+                "name": span.name,
+                "kind": 3,
+                "startTimeUnixNano": int(span.start * 1e9),
+                "endTimeUnixNano": int((span.start + span.duration_ms / 1000) * 1e9),
+                "attributes": [
+                    {"key": "http.url", "value": {"stringValue": span.url}},
+                    {"key": "http.status_code", "value": {"intValue": span.status or 0}},
+                    {"key": "retries", "value": {"intValue": span.retries}}
+                    ],
+                "status": {"code": 2 if span.error else 1}
+                })
+        return {"resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "chefcito"}, "spans": service_spans}]
+            }
+            for service, service_spans in by_service.items()
+            ]}
+
+    async def export(self, spans: List[Span]) -> None:
+        try:
+            session = registry.get()
+            async with session.post(self.endpoint, data=codec.dumps(self.payload(spans)),
+                                    headers={"Content-Type": "application/json"}) as response:
+                await response.read()
+        except Exception as e:
+            Logger.info(f"Could not export spans: {e}")
+
+def exporter_from(settings: TracingSettings) -> SpanExporter:
+    if settings.trace_endpoint:
+        return OTLPSpanExporter(settings.trace_endpoint)
+    if settings.trace_file:
+        return FileSpanExporter(settings.trace_file)
+    return NoExporter()
+
+def outgoing_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """
+        Adds the current request id to the headers of a call
+    """
+    current = request_id.get()
+    if current is None or REQUEST_ID_HEADER in headers:
+        return headers
+    return {**headers, REQUEST_ID_HEADER: current}
+
+def record(method: str, url: str, start: float, duration: float, status: Optional[int] = None, error: Optional[str] = None) -> None:
+    spans = collected.get()
+    current = request_id.get()
+    if spans is None or current is None:
+        return
+    spans.append(Span(
+        request_id=current,
+        service=urlsplit(url).hostname or "",
+        name=f"{method} {urlsplit(url).path}",
+        url=url,
+        status=status,
+        start=start,
+        duration_ms=duration * 1000,
+        retries=attempt.get(),
+        error=error
+        ))
+
+def __metric_name(span: Span, position: int) -> str:
+    return f"{re.sub(r'[^A-Za-z0-9_-]', '_', span.service) or 'call'}-{position}"
+
+def server_timing(spans: List[Span], total: float) -> str:
+    entries = [
+        f'{__metric_name(span, position)};dur={span.duration_ms:.1f};desc="{span.name} {span.status or span.error}"'
+        for position, span in enumerate(spans)
+        ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+class TracingMiddleware:
+    """
+        Adopts the incoming request id or generates one, collects the
+        spans of every call made while serving and reports them in
+        Server-Timing and to the exporter
+    """
+
+    def __init__(self, app: ASGIApp, service: str, exporter: SpanExporter | None = None) -> None:
+        self.app = app
+        self.service = service
+        self.exporter = exporter or NoExporter()
+        self.exports: Set[asyncio.Task] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        current = Headers(scope=scope).get(REQUEST_ID_HEADER) or uuid4().hex
+        spans: List[Span] = []
+        id_token = request_id.set(current)
+        spans_token = collected.set(spans)
+        wall = time.time()
+        start = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(REQUEST_ID_HEADER, current)
+                headers.append("Server-Timing", server_timing(spans, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            spans.append(Span(
+                request_id=current,
+                service=self.service,
+                name=f"{scope['method']} {scope['path']}",
+                url=scope["path"],
+                status=status,
+                start=wall,
+                duration_ms=(time.perf_counter() - start) * 1000
+                ))
+            request_id.reset(id_token)
+            collected.reset(spans_token)
+            if not isinstance(self.exporter, NoExporter):
+                task = asyncio.create_task(self.exporter.export(spans))
+                self.exports.add(task)
+                task.add_done_callback(self.exports.discard)
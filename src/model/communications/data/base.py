@@ -1,13 +1,11 @@
-from typing import Callable
-from sqlalchemy import create_engine, select
-from sqlalchemy.pool import NullPool
-from src.model.commons.session import with_no_commit, with_session
+from typing import Awaitable, Callable
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.model.commons.session import PoolSettings, create_engines, warm_up, with_no_commit, with_session
 from src.model.communications.data.user_schema import UserSchema
 from src.model.communications.user import User
-from sqlalchemy.orm import Session
 
 
-DEFAULT_POOL_SIZE = 5
 
 class CommunicationsBase():
 
@@ -22,42 +20,45 @@ class CommunicationsBase():
 
 class RelCommunicationsBase(CommunicationsBase):
 
-    def __init__(self, conn_string: str, **kwargs):
-        self.__engine = create_engine(conn_string, poolclass=NullPool)
+    def __init__(self, conn_string: str, pool: PoolSettings | None = None):
+        self.__engines = create_engines(conn_string, "communications", pool)
 
-    def __store_call(self, user: User) -> Callable[[Session], None]:
-        def call(session: Session):
+    async def warm_up(self, connections: int) -> None:
+        await warm_up(self.__engines, connections)
+
+    def __store_call(self, user: User) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession):
             schema = user.into_schema()
             session.add(schema)
         return call
 
-    def __get_call(self, id: str) -> Callable[[Session], User | None]:
-        def call(session: Session) -> User | None:
+    def __get_call(self, id: str) -> Callable[[AsyncSession], Awaitable[User | None]]:
+        async def call(session: AsyncSession) -> User | None:
             query = select(UserSchema).where(UserSchema.id.__eq__(id))
-            result = session.execute(query).scalar()
+            result = (await session.execute(query)).scalar()
             return User.from_schema(result)
 
         return call
 
-    def __update_call(self, user: User) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
+    def __update_call(self, user: User) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
             query = select(UserSchema).where(UserSchema.id.__eq__(user.localid))
-            recovered = session.execute(query).scalar()
+            recovered = (await session.execute(query)).scalar()
             if recovered:
                 recovered.number = user.number
         return call
 
     async def store_user(self, user: User) -> None:
         call = self.__store_call(user)
-        with_session(call)(self.__engine)
+        await with_session(call)(self.__engines)
 
     async def get_user(self, user_id: str) -> User | None:
         call = self.__get_call(user_id)
-        return with_no_commit(call)(self.__engine)
+        return await with_no_commit(call)(self.__engines)
 
     async def update_user(self, user: User) -> None:
         call = self.__update_call(user)
-        with_session(call)(self.__engine)
+        await with_session(call)(self.__engines)
 
 class MockedCommunicationsBase(CommunicationsBase):
 
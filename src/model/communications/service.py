@@ -1,6 +1,7 @@
 import json
 from fastapi import HTTPException, logger, status
 from src.model.commons import error
+from src.model.commons.breaker import ResiliencePolicy, configure_target
 from src.model.commons.caller import post, put
 from src.model.communications.comms.messager import CommunicationsMessager, MockedCommunicationsMessager
 from src.model.communications.data.base import CommunicationsBase
@@ -73,8 +74,9 @@ class DummyCommunicationProvider(CommunicationProvider):
         return await super().update_user(user)
 
 class HttpCommunicationProvider(CommunicationProvider):
-    def __init__(self, url: str):
+    def __init__(self, url: str, policy: ResiliencePolicy | None = None):
         self.url = url
+        configure_target(url, policy)
 
     async def store_user(self, user: User) -> User:
         endpoint = "/user"
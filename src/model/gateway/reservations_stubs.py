@@ -44,6 +44,10 @@ class ReservationQuery(BaseModel):
     from_time: Optional[datetime] = None 
     to_time: Optional[datetime] = None
     people: Optional[Tuple[int, int]] = None
+    include_total: bool = True
+    estimate_total: bool = False
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None
 
     def with_user(self, user: str) -> query.ReservationQuery:
         value = query.ReservationQuery(
@@ -54,7 +58,11 @@ class ReservationQuery(BaseModel):
                 venue=self.venue,
                 from_time=self.from_time,
                 to_time=self.to_time,
-                people=self.people
+                people=self.people,
+                include_total=self.include_total,
+                estimate_total=self.estimate_total,
+                cursor=self.cursor,
+                fields=self.fields
                 )
         value.change_user(user)
         return value
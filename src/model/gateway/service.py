@@ -1,3 +1,4 @@
+import asyncio
 from ast import Dict
 from datetime import datetime
 from logging import log
@@ -25,6 +26,7 @@ import src.model.gateway.reservations_stubs as r_stubs
 from src.model.venues import venue
 from src.model.venues.venue import Venue
 from src.model.venues.venueQuery import VenueDistanceQueryResult, VenueQuery, VenueQueryResult
+from src.model.venues.data.location_finder import DEFAULT_LIMIT, DEFAULT_RADIUS
 from src.model.venues.service import VenuesService
 from src.model.venues.update import Update
 import src.model.gateway.venues_stubs as v_stubs
@@ -133,9 +135,9 @@ class GatewayService:
         Logger.info(f"Querying venues ==> {venue_query}")
         return await self.venues.get_venues(venue_query, response)
 
-    async def get_venues_near_to(self, location: Tuple[str, str], response: Response) -> VenueDistanceQueryResult | Error:
+    async def get_venues_near_to(self, location: Tuple[str, str], response: Response, radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT) -> VenueDistanceQueryResult | Error:
         Logger.info(f"Querying venues around ({location[0]}, {location[1]})")
-        return await self.venues.get_venues_near_to(location, response)
+        return await self.venues.get_venues_near_to(location, response, radius, limit)
 
     async def delete_venue(self, credentials: Annotated[HTTPAuthorizationCredentials, None], venue_id: str, response: Response) -> None:
         Logger.info(f"Deleting venue ==> {venue_id}")
@@ -185,7 +187,11 @@ class GatewayService:
             limit: int,
             start: int,
             venue: bool,
-            response: Response) -> ReservationQueryResponse | Error:
+            response: Response,
+            cursor: Optional[str] = None,
+            fields: Optional[List[str]] = None,
+            include_total: bool = True,
+            estimate_total: bool = False) -> ReservationQueryResponse | Error:
         user = await self.__get_user(credentials)
         user = f"user/{user}"
         venue_id = None
@@ -197,7 +203,11 @@ class GatewayService:
                                          from_time=from_time,
                                          to_time=to_time,
                                          limit=limit,
-                                         start=start).with_user('')
+                                         start=start,
+                                         cursor=cursor,
+                                         include_total=include_total,
+                                         estimate_total=estimate_total,
+                                         fields=fields).with_user('')
         query.user = user
         return await self.reservations.get_reservations(query, response)
 
@@ -269,7 +279,7 @@ class GatewayService:
             This method is mocked and should be changed when the promotional model
             is well stablished (only for demo purposes)
         """
-        results = [await self.venues.get_venues(VenueQuery(id=id), response) for id in PROMOTED_IDS]
+        results = await asyncio.gather(*[self.venues.get_venues(VenueQuery(id=id), response) for id in PROMOTED_IDS])
         if response.status_code is not None and response.status_code != status.HTTP_200_OK:
             print(response.status_code)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not get promoted venues")
@@ -5,9 +5,8 @@ from starlette.responses import Response
 from fastapi import status
 from starlette.types import ASGIApp
 import asyncio
-import aiohttp
 
-from src.model.commons.caller import post, recover_json_data, with_retry
+from src.model.commons.caller import CallResponse, post, recover_json_data, with_retry
 from src.model.users.auth_request import AuthRequest
 from src.model.users.user_data import UserToken 
 
@@ -67,7 +66,7 @@ class ProdMiddleware(Middleware):
         request._headers = headers
         return request, 'Bearer anonymous'
     
-    async def __call_if_authorized(self, request: Request, auth_response: aiohttp.ClientResponse, call_next: RequestResponseEndpoint) -> Response:
+    async def __call_if_authorized(self, request: Request, auth_response: CallResponse, call_next: RequestResponseEndpoint) -> Response:
         if auth_response.status == status.HTTP_200_OK:
             result = await call_next(request)
         else: 
@@ -75,7 +74,7 @@ class ProdMiddleware(Middleware):
         auth_response.close()
         return result
     
-    async def __auth_call(self, token: str, endpoint: str) -> aiohttp.ClientResponse:
+    async def __auth_call(self, token: str, endpoint: str) -> CallResponse:
         token = self.__parse_token(token)
         body = AuthRequest(id_token=token, endpoint=endpoint).model_dump()
         expected_status = [status.HTTP_200_OK, status.HTTP_403_FORBIDDEN] 
@@ -17,6 +17,9 @@ class OpinionSchema(Document):
             [
                 ("venue", pymongo.ASCENDING),
                 ("date", pymongo.DESCENDING)
+            ],
+            [
+                ("reservation", pymongo.ASCENDING)
             ]
         ]
 
@@ -6,6 +6,8 @@ from src.model.opinions.opinion import Opinion
 from src.model.opinions.opinion_query import OpinionQuery, OpinionQueryResponse
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from src.model.commons.cursor import next_cursor
+from src.model.commons.metrics import mongo_timer
 from beanie import init_beanie
 from beanie.odm.queries.find import FindMany
 
@@ -26,6 +28,13 @@ class OpinionsDB:
     async def get(self, query: OpinionQuery) -> OpinionQueryResponse:
         raise Exception("Interface method should not be called")
 
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        """
+            Opinions left for any of the reservations given,
+            newest first
+        """
+        raise Exception("Interface method should not be called")
+
     async def get_summaries(self, venue: str, since: datetime, limit: int = 3, skip: int = 0) -> List[Summary]:
         raise Exception("Interface method should not be called")
 
@@ -35,7 +44,7 @@ class MongoOpinionsDB(OpinionsDB):
         self.db = await init_beanie(database=self.client["chefcito-mongo-db"], document_models=[OpinionSchema, SummarySchema])
 
     def __init__(self, conn_string: str):
-        client = AsyncIOMotorClient(conn_string)
+        client = AsyncIOMotorClient(conn_string, event_listeners=[mongo_timer])
         self.client = client
         self.db = None 
     
@@ -49,12 +58,19 @@ class MongoOpinionsDB(OpinionsDB):
     async def get(self, query: OpinionQuery) -> OpinionQueryResponse:
         result = query.query() 
         
+        schemas = await result.to_list() if result else []
         opinions = list(map(
             lambda x: x.into_opinion(),
-            await result.to_list()
-            )) if result else []
-        total = await self.get_total(query)
-        return OpinionQueryResponse(result=opinions, total=total)
+            schemas
+            ))
+        total = await self.get_total(query) if not query.cursor else None
+        return OpinionQueryResponse(result=opinions,
+                                    total=total,
+                                    next_cursor=next_cursor(schemas, query.limit, lambda x: (x.date, str(x.id))))
+
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        query = OpinionSchema.find({"reservation": {"$in": reservations}}).sort("-date")
+        return [schema.into_opinion() for schema in await query.to_list()]
 
     async def store_summary(self, summary: Summary) -> None:
         schema = SummarySchema.from_summary(summary)
@@ -88,6 +104,8 @@ class MockedOpinionsDB(OpinionsDB):
         raise Exception("Total should not be called for Mocked Database")
 
     async def get(self, query: OpinionQuery) -> OpinionQueryResponse:
+        if query.cursor != None:
+            raise Exception("Cursor query not implemented")
         if not query.venue:
             return OpinionQueryResponse(result=[], total=0) 
 
@@ -110,6 +128,13 @@ class MockedOpinionsDB(OpinionsDB):
 
         return OpinionQueryResponse(result=venue, total=len(venue)) 
 
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        found = [opinion
+                 for venue in self.opinions.values()
+                 for opinion in venue.get('opinions', [])
+                 if opinion.reservation in reservations]
+        return sorted(found, key=lambda op: op.date, reverse=True)
+
     async def store_summary(self, summary: Summary) -> None:
         
         venue = self.opinions.get(summary.venue, {}).get('summaries', [])
@@ -1,14 +1,17 @@
 from collections.abc import Coroutine
 from datetime import datetime
 from typing import List, Optional
+from beanie import PydanticObjectId
 from beanie.odm.queries.find import FindMany
 from pydantic import BaseModel
+from src.model.commons.cursor import decode
 from src.model.opinions.data.OpinionSchema import OpinionSchema
 from src.model.opinions.opinion import Opinion
 
 class OpinionQueryResponse(BaseModel):
     result: List[Opinion]
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
 
 class OpinionQuery(BaseModel):
 
@@ -18,6 +21,7 @@ class OpinionQuery(BaseModel):
     reservation: Optional[str] = None
     limit: int = 10
     start: int =  0
+    cursor: Optional[str] = None
     
     def __base_query(self) -> FindMany[OpinionSchema] | None:
         if not self.venue and (not self.from_date or not self.to_date):
@@ -40,11 +44,26 @@ class OpinionQuery(BaseModel):
         return query
 
 
+    def __after_cursor(self, query: FindMany[OpinionSchema]) -> FindMany[OpinionSchema]:
+        date, id = decode(self.cursor, datetime, PydanticObjectId)
+        return query.find({"$or": [
+            {"date": {"$lt": date}},
+            {"date": date, "_id": {"$lt": id}}
+            ]})
+
     def query(self) -> FindMany[OpinionSchema] | None:
+        """
+            With a cursor the page starts right after the opinion
+            it points to and start is ignored
+        """
         query = self.__base_query()
         if query == None:
             return None
-        return query.limit(self.limit).skip(self.start).sort("-date")
+        if self.cursor:
+            query = self.__after_cursor(query)
+        else:
+            query = query.skip(self.start)
+        return query.limit(self.limit).sort([("date", -1), ("_id", -1)])
     
     async def total_query(self) -> int:
        query = self.__base_query()
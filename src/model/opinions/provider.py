@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any, List
 
+from src.model.commons.breaker import ResiliencePolicy, configure_target
+from src.model.commons.hedge import HedgePolicy, configure_hedging
 from src.model.commons.caller import get, post, recover_json_data
 from src.model.commons.error import Error
 from src.model.commons.logger import Logger
@@ -20,6 +22,9 @@ class OpinionsProvider:
     async def query_opinions(self, query: OpinionQuery) -> OpinionQueryResponse:
        raise Exception("Interface method should not be called")
 
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+       raise Exception("Interface method should not be called")
+
     async def create_venue_summary(self, venue: str) -> Summary:
         raise Exception("Interface method should not be called")
     
@@ -28,26 +33,28 @@ class OpinionsProvider:
 
 class HttpOpinionsProvider(OpinionsProvider):
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, policy: ResiliencePolicy | None = None, hedging: HedgePolicy | None = None):
         self.url = url
+        configure_target(url, policy)
+        configure_hedging(url, hedging)
 
     async def create_opinion(self, opinion: Opinion) -> Opinion:
         endpoint = "/opinions"
         body = opinion.model_dump()
-        body['date'] = body['date'].__str__()
         response = await post(f"{self.url}{endpoint}", body=body)
         return await recover_json_data(response)
 
     async def query_opinions(self, query: OpinionQuery) -> OpinionQueryResponse:
         endpoint = "/opinions"
         params = query.model_dump(exclude_none=True)
-        if params.get("from_time"):
-            params['from_time'] = params['from_time'].__str__()
-        if params.get('to_time'):
-            params['to_time'] = params['to_time'].__str__()
-        response = await get(f"{self.url}{endpoint}", params=params)
+        response = await get(f"{self.url}{endpoint}", params=params, hedge=True)
         return await recover_json_data(response)
 
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        endpoint = "/opinions/batch"
+        response = await post(f"{self.url}{endpoint}", body=list(dict.fromkeys(reservations)))
+        return [Opinion(**data) for data in await recover_json_data(response)]
+
     async def create_venue_summary(self, venue: str) -> Summary:
         endpoint = f"/summaries/{venue}"
         response = await post(f"{self.url}{endpoint}")
@@ -73,6 +80,10 @@ class LocalOpinionsProvider(OpinionsProvider):
     async def query_opinions(self, query: OpinionQuery) -> OpinionQueryResponse:
         Logger.info(f"Recieved opinions query: {query}")
         return await self.db.get(query)
+
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        Logger.info(f"Retrieving opinions for {len(reservations)} reservations")
+        return await self.db.get_by_reservations(reservations)
     
     async def create_venue_summary(self, venue: str) -> Summary:
         since = datetime.today() - timedelta(days=14)
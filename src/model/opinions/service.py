@@ -31,6 +31,15 @@ class OpinionsService:
         except Exception as e:
             return Error.from_exception(e)
 
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        try:
+            return await self.provider.get_by_reservations(reservations)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=e.__str__()
+            )
+
     async def get_summary(self, venue: str) -> Summary:
         try:
            return await self.provider.get_venue_summary(venue) 
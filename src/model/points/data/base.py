@@ -1,15 +1,12 @@
-import asyncio
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
-from sqlalchemy import Select, create_engine, select
-from sqlalchemy.pool import NullPool
-from src.model.commons.session import with_no_commit, with_session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.model.commons.session import PoolSettings, create_engines, warm_up, with_no_commit, with_session
 from src.model.points.data.schema import PointSchema
 from src.model.points.point import Point
-from sqlalchemy.orm import Session
 
-DEFAULT_POOL_BASE = 5
 DEFAULT_POINT_REBASE = timedelta(days=14)
 DEFAULT_POINT_DISCOUNT = 200
 
@@ -23,36 +20,37 @@ class PointBase():
 
 class RelPointBase(PointBase):
 
-    def __init__(self, url: str, **kwargs):
-        kwargs["pool_size"] = kwargs.get("pool_size", DEFAULT_POOL_BASE)
-        kwargs["pool_recyle"] = 30
-        self.__engine = create_engine(url, poolclass=NullPool)
+    def __init__(self, url: str, pool: PoolSettings | None = None):
+        self.__engines = create_engines(url, "points", pool)
+
+    async def warm_up(self, connections: int) -> None:
+        await warm_up(self.__engines, connections)
 
     def __update_if_nedeed(self, value: PointSchema):
         if datetime.now() - value.last_updated >= DEFAULT_POINT_REBASE:
             value.total = value.total - 200 if value.total >= 200 else 0
 
 
-    def __get_user_query(self, user: str) -> Callable[[Session], Optional[Point]]:
-        def call(session: Session) -> Optional[Point]:
+    def __get_user_query(self, user: str) -> Callable[[AsyncSession], Awaitable[Optional[Point]]]:
+        async def call(session: AsyncSession) -> Optional[Point]:
             query = select(PointSchema).where(PointSchema.user.__eq__(user))
-            result = session.scalar(query)
+            result = await session.scalar(query)
             if result is not None:
                 self.__update_if_nedeed(result)
             return result.into_points() if result else None
         return call
 
-    def __get_update_query(self, points: Point, time: datetime) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
-           value = session.get(PointSchema, points.user)
+    def __get_update_query(self, points: Point, time: datetime) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
+           value = await session.get(PointSchema, points.user)
            if value is None:
                return
            value.total = points.total
            value.last_updated = time
         return call
 
-    def __get_insertion_query(self, points: Point, time: datetime) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
+    def __get_insertion_query(self, points: Point, time: datetime) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
             schema = PointSchema.from_points(points)
             schema.last_updated = time
             session.add(schema)
@@ -60,18 +58,16 @@ class RelPointBase(PointBase):
 
     async def update_points(self, points: Point, time: datetime = datetime.now()) -> None:
         call = self.__get_user_query(points.user)
-        loop = asyncio.get_event_loop()
-        recovered_points = await loop.run_in_executor(None, with_session(call), self.__engine)
+        recovered_points = await with_session(call)(self.__engines)
         update = self.__get_insertion_query(points, time)
         if recovered_points:
            points.total += recovered_points.total
            update = self.__get_update_query(points, time)
-        await loop.run_in_executor(None, with_session(update), self.__engine)
+        await with_session(update)(self.__engines)
 
     async def recover_points(self, user: str) -> Point | None:
         call = self.__get_user_query(user)
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, with_session(call), self.__engine)
+        return await with_session(call)(self.__engines)
 
 
 class MockedPointBase(PointBase):
@@ -1,5 +1,7 @@
 from datetime import datetime
 from typing import List
+from src.model.commons.breaker import ResiliencePolicy, configure_target
+from src.model.commons.hedge import HedgePolicy, configure_hedging
 from src.model.commons.caller import post, get, recover_json_data
 from src.model.commons.logger import Logger
 from src.model.points.data.base import PointBase
@@ -21,8 +23,10 @@ class PointsProvider():
 
 class HttpPointsProvider(PointsProvider):
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, policy: ResiliencePolicy | None = None, hedging: HedgePolicy | None = None):
         self.url = url
+        configure_target(url, policy)
+        configure_hedging(url, hedging)
 
     async def update_points(self, points: Point, time: datetime = datetime.now()) -> None:
         endpoint = "/points"
@@ -32,7 +36,7 @@ class HttpPointsProvider(PointsProvider):
     async def get_points(self, user: str) -> PointResponse:
         endpoint = f"/points/{user}"
         print(f"{self.url}{endpoint}")
-        response = await get(f"{self.url}{endpoint}")
+        response = await get(f"{self.url}{endpoint}", hedge=True)
         return await recover_json_data(response)
 
 class LocalPointsProvider(PointsProvider):
@@ -1,20 +1,27 @@
-from collections.abc import Callable
-from typing import List
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session
-from src.model.commons.session import with_no_commit, with_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.model.commons.paging import EXACT_TOTAL, fetch_page
+from src.model.commons.session import PoolSettings, create_engines, warm_up, with_no_commit, with_session
 from src.model.reservations.data.schema import ReservationSchema
-from sqlalchemy import Select, create_engine, delete, select, update
+from sqlalchemy import Select, delete, func, select, tuple_, update
 
-# TODO: try to add this to configuration options
-DEFAULT_POOL_SIZE = 5
+
+class ReservationConflict(Exception):
+    """
+        The reservation changed since it was read, the update
+        was not applied
+    """
+    pass
 
 class ReservationsBase:
 
-    def get_by_eq(self, query: Select) -> List[ReservationSchema]:
+    async def get_by_eq(self, query: Select) -> List[ReservationSchema]:
         raise Exception("Interface method should not be used")
 
-    def store_reservation(self, reservation: ReservationSchema) -> None:
+    async def store_reservation(self, reservation: ReservationSchema) -> None:
         """
             Stores a reservation on the base,
             if the reservation is already stored then
@@ -22,27 +29,46 @@ class ReservationsBase:
         """
         raise Exception("Interface method should not be called")
 
-    def run_count(self, query: Select) -> int:
+    async def get_page(self, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[ReservationSchema], Optional[int]]:
         """
-            Runs a query that returns the total number of rows
-            based on certain restrictions (given in the Select query)
+            Runs a query for a page of reservations and returns
+            it together with the total number of rows that match
+            (exact, estimated or not counted depending on total)
         """
         raise Exception("Interface method should not be called")
 
-    def update_reservation(self, reservation: ReservationSchema) -> None:
+    async def update_reservation(self, reservation: ReservationSchema, version: int) -> ReservationSchema | None:
         """
-            Updates information about a reservation
+            Updates information about a reservation if it is
+            still at the version given and returns the updated
+            row. Returns None when the version does not match
         """
         raise Exception("Interface method should not be called")
 
-    def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
+    async def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
         """
             Searches for a reservation based on the id
             given
         """
         raise Exception("Interface method should not be called")
 
-    def delete_reservation(self, id: str) -> None:
+    async def transition_before(self, status: str, new_status: str, before: datetime, limit: int) -> List[ReservationSchema]:
+        """
+            Moves up to limit reservations in status, with a time
+            before the one given, to new_status and returns them
+            as they were left
+        """
+        raise Exception("Interface method should not be called")
+
+    async def count_by_status(self, pairs: List[Tuple[str, str]], statuses: List[str]) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """
+            Counts the reservations of each (user, venue) pair
+            in each of the statuses given. Pairs and statuses
+            without reservations are left out
+        """
+        raise Exception("Interface method should not be called")
+
+    async def delete_reservation(self, id: str) -> None:
         """
             Deletes a reservation
         """
@@ -50,98 +76,163 @@ class ReservationsBase:
 
 class RelBase(ReservationsBase):
 
-    def __init__(self, conn_string: str, **kwargs):
-        kwargs["pool_size"] = kwargs.get("pool_size", DEFAULT_POOL_SIZE)
-        kwargs["pool_recyle"] = 30
-        self.__engine = create_engine(conn_string)
+    def __init__(self, conn_string: str, pool: PoolSettings | None = None):
+        self.__engines = create_engines(conn_string, "reservations", pool)
 
-    def __get_by_eq(self, query: Select) -> Callable[[Session], List[ReservationSchema]]:
-        def call(session: Session):
-            result = list(session.execute(query).scalars())
+    async def warm_up(self, connections: int) -> None:
+        await warm_up(self.__engines, connections)
+
+    def __get_by_eq(self, query: Select) -> Callable[[AsyncSession], Awaitable[List[ReservationSchema]]]:
+        async def call(session: AsyncSession):
+            result = list(await session.scalars(query))
             return result
         return call
 
-    def run_count(self, query: Select) -> int:
-        call = with_no_commit(lambda s: s.execute(query).scalar())
-        return call(self.__engine)
+    def __get_page(self, query: Select, limit: int, start: int, total: str) -> Callable[[AsyncSession], Awaitable[Tuple[List[ReservationSchema], Optional[int]]]]:
+        async def call(session: AsyncSession) -> Tuple[List[ReservationSchema], Optional[int]]:
+            return await fetch_page(session, query, limit, start, total)
+        return call
+
+    async def get_page(self, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[ReservationSchema], Optional[int]]:
+        call = with_no_commit(self.__get_page(query, limit, start, total))
+        return await call(self.__engines)
 
-    def get_by_eq(self, query: Select) -> List[ReservationSchema]:
+    async def get_by_eq(self, query: Select) -> List[ReservationSchema]:
         call = with_no_commit(self.__get_by_eq(query))
-        return call(self.__engine)
+        return await call(self.__engines)
 
-    def __store_reservation(self, reservation: ReservationSchema) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
+    def __store_reservation(self, reservation: ReservationSchema) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
             session.add(reservation)
 
         return call
 
-    def store_reservation(self, reservation: ReservationSchema) -> None:
+    async def store_reservation(self, reservation: ReservationSchema) -> None:
         call = with_session(self.__store_reservation(reservation))
-        return call(self.__engine)
-
-    def __update_reservation(self, reservation: ReservationSchema) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
-            value = session.get(ReservationSchema, reservation.id)
-            if not value:
-                return
-            value.status = reservation.status
-            value.time = reservation.time
-            value.people = reservation.people
+        return await call(self.__engines)
+
+    def __update_reservation(self, reservation: ReservationSchema, version: int) -> Callable[[AsyncSession], Awaitable[ReservationSchema | None]]:
+        async def call(session: AsyncSession) -> ReservationSchema | None:
+            query = update(ReservationSchema)\
+                    .where(ReservationSchema.id.__eq__(reservation.id) & ReservationSchema.version.__eq__(version))\
+                    .values(status=reservation.status,
+                            time=reservation.time,
+                            people=reservation.people,
+                            version=ReservationSchema.version + 1)\
+                    .returning(ReservationSchema)\
+                    .execution_options(synchronize_session=False)
+            return await session.scalar(query)
         return call
 
-    def update_reservation(self, reservation: ReservationSchema) -> None:
-        call = with_session(self.__update_reservation(reservation))
-        return call(self.__engine)
+    async def update_reservation(self, reservation: ReservationSchema, version: int) -> ReservationSchema | None:
+        call = with_session(self.__update_reservation(reservation, version))
+        return await call(self.__engines)
 
-    def __get_reservation_by_id(self, id: str) -> Callable[[Session], ReservationSchema | None]:
-        def call(session: Session) -> ReservationSchema | None:
+    def __get_reservation_by_id(self, id: str) -> Callable[[AsyncSession], Awaitable[ReservationSchema | None]]:
+        async def call(session: AsyncSession) -> ReservationSchema | None:
             query = select(ReservationSchema).where(ReservationSchema.id.__eq__(id))
-            result = session.scalar(query)
+            result = await session.scalar(query)
             return result
         return call
 
-    def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
+    async def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
         call = with_no_commit(self.__get_reservation_by_id(id))
 
-        return call(self.__engine)
+        return await call(self.__engines)
+
+    def __transition_before(self, status: str, new_status: str, before: datetime, limit: int) -> Callable[[AsyncSession], Awaitable[List[ReservationSchema]]]:
+        async def call(session: AsyncSession) -> List[ReservationSchema]:
+            due = select(ReservationSchema.id)\
+                    .where(ReservationSchema.status.__eq__(status) & ReservationSchema.time.__le__(before))\
+                    .order_by(ReservationSchema.time)\
+                    .limit(limit)\
+                    .with_for_update(skip_locked=True)
+            query = update(ReservationSchema)\
+                    .where(ReservationSchema.id.in_(due))\
+                    .values(status=new_status, version=ReservationSchema.version + 1)\
+                    .returning(ReservationSchema)\
+                    .execution_options(synchronize_session=False)
+            return list(await session.scalars(query))
+        return call
+
+    async def transition_before(self, status: str, new_status: str, before: datetime, limit: int) -> List[ReservationSchema]:
+        call = with_session(self.__transition_before(status, new_status, before, limit))
+        return await call(self.__engines)
+
+    def __count_by_status(self, pairs: List[Tuple[str, str]], statuses: List[str]) -> Callable[[AsyncSession], Awaitable[Dict[Tuple[str, str], Dict[str, int]]]]:
+        async def call(session: AsyncSession) -> Dict[Tuple[str, str], Dict[str, int]]:
+            query = select(ReservationSchema.user, ReservationSchema.venue, ReservationSchema.status, func.count())\
+                    .where(tuple_(ReservationSchema.user, ReservationSchema.venue).in_(pairs))\
+                    .where(ReservationSchema.status.in_(statuses))\
+                    .group_by(ReservationSchema.user, ReservationSchema.venue, ReservationSchema.status)
+            counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+            for user, venue, status, count in await session.execute(query):
+                counts.setdefault((user, venue), {})[status] = count
+            return counts
+        return call
 
-    def __delete_reservation(self, id: str) -> Callable[[Session], None]:
-        def call(session: Session) -> None:
+    async def count_by_status(self, pairs: List[Tuple[str, str]], statuses: List[str]) -> Dict[Tuple[str, str], Dict[str, int]]:
+        if not pairs or not statuses:
+            return {}
+        call = with_no_commit(self.__count_by_status(list(set(pairs)), statuses))
+        return await call(self.__engines)
+
+    def __delete_reservation(self, id: str) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
             query = delete(ReservationSchema).where(ReservationSchema.id.__eq__(id))
-            session.execute(query)
+            await session.execute(query)
 
         return call
 
 
-    def delete_reservation(self, id: str) -> None:
+    async def delete_reservation(self, id: str) -> None:
         call = with_session(self.__delete_reservation(id))
-        call(self.__engine)
+        await call(self.__engines)
 
 class MockBase(ReservationsBase):
 
     def __init__(self):
         self.base: List[ReservationSchema] = []
 
-    def store_reservation(self, reservation: ReservationSchema) -> None:
+    async def store_reservation(self, reservation: ReservationSchema) -> None:
         for stored in self.base:
             if stored.id == reservation.id:
                 raise Exception("Reservation already exists")
         self.base.append(reservation)
 
 
-    def update_reservation(self, reservation: ReservationSchema) -> None:
+    async def update_reservation(self, reservation: ReservationSchema, version: int) -> ReservationSchema | None:
         for index, stored in enumerate(self.base):
             if stored.id == reservation.id:
+                if (stored.version or 0) != version:
+                    return None
+                reservation.version = version + 1
                 self.base[index] = reservation
-                return
+                return reservation
 
-    def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
+    async def get_reservation_by_id(self, id: str) -> ReservationSchema | None:
 
         for stored in self.base:
             if stored.id == id:
                 return stored
 
-    def delete_reservation(self, id: str) -> None:
+    async def transition_before(self, status: str, new_status: str, before: datetime, limit: int) -> List[ReservationSchema]:
+        due = sorted([stored for stored in self.base if stored.status == status and stored.time <= before],
+                     key=lambda stored: stored.time)[:limit]
+        for stored in due:
+            stored.status = new_status
+            stored.version = (stored.version or 0) + 1
+        return due
+
+    async def count_by_status(self, pairs: List[Tuple[str, str]], statuses: List[str]) -> Dict[Tuple[str, str], Dict[str, int]]:
+        counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for stored in self.base:
+            if (stored.user, stored.venue) in pairs and stored.status in statuses:
+                by_status = counts.setdefault((stored.user, stored.venue), {})
+                by_status[stored.status] = by_status.get(stored.status, 0) + 1
+        return counts
+
+    async def delete_reservation(self, id: str) -> None:
         for index, stored in enumerate(self.base):
             if stored.id == id:
                 self.base.pop(index)
@@ -1,11 +1,11 @@
-import asyncio
 from datetime import datetime
 from typing import Callable, List, Optional, Tuple
 
 from fastapi import Query
 from pydantic import BaseModel
-from sqlalchemy import Select, desc, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, desc, select, tuple_
+from src.model.commons.cursor import decode, next_cursor
+from src.model.commons.paging import EXACT_TOTAL, NO_TOTAL
 from src.model.reservations.data.base import MockBase, RelBase, ReservationsBase
 from src.model.reservations.data.schema import ReservationSchema
 
@@ -22,17 +22,18 @@ def get_builder(db: ReservationsBase) -> 'QueryBuilder':
 
 class QueryResult():
 
-    def __init__(self, result: List[ReservationSchema], total: int):
+    def __init__(self, result: List[ReservationSchema], total: Optional[int], next_cursor: Optional[str] = None):
         self.result = result
         self.total = total
+        self.next_cursor = next_cursor
 
 class QueryBuilder:
 
     def __init__(self, db: ReservationsBase) -> None:
         self.db = db
 
-    def _get_by_id(self, id: str) -> List[ReservationSchema]:
-        value = self.db.get_reservation_by_id(id)
+    async def _get_by_id(self, id: str) -> List[ReservationSchema]:
+        value = await self.db.get_reservation_by_id(id)
         return [value] if value else []
 
     def __filter_by_eq(self, user: Optional[str], venue: Optional[str]) -> List[ReservationSchema]:
@@ -47,62 +48,68 @@ class QueryBuilder:
             time: Optional[Tuple[datetime, datetime]],
             people: Optional[Tuple[int, int]],
             limit: int,
-            start: int) -> QueryResult:
+            start: int,
+            total: str = EXACT_TOTAL,
+            cursor: Optional[str] = None) -> QueryResult:
 
         raise Exception("Interface method should not be called")
 
 class RelBuilder(QueryBuilder):
-    def __add_user_filter(self, query: Select, count: Select, user: Optional[str]) -> Tuple[Select, Select]:
+    def __add_user_filter(self, query: Select, user: Optional[str]) -> Select:
         if user:
             query = query.where(ReservationSchema.user.__eq__(user))
-            count = count.where(ReservationSchema.user.__eq__(user))
-        return query,count
+        return query
 
-    def __add_venue_filter(self, query: Select, count: Select, venue: Optional[str]) -> Tuple[Select,Select]:
+    def __add_venue_filter(self, query: Select, venue: Optional[str]) -> Select:
         if venue:
             query = query.where(ReservationSchema.venue.__eq__(venue))
-            count = count.where(ReservationSchema.venue.__eq__(venue))
-        return query,count
+        return query
 
-    def __add_status_filter(self, query: Select, count:Select, status: Optional[List[str]]) -> Tuple[Select,Select]:
+    def __add_status_filter(self, query: Select, status: Optional[List[str]]) -> Select:
         if status:
             query = query.where(ReservationSchema.status.in_(status))
-            count = count.where(ReservationSchema.status.in_(status))
-        return query,count
+        return query
 
-    def __add_time_filter(self, query: Select, count: Select, limits: Optional[Tuple[datetime, datetime]]) -> Tuple[Select,Select]:
+    def __add_time_filter(self, query: Select, limits: Optional[Tuple[datetime, datetime]]) -> Select:
         if limits:
             query = query.where(ReservationSchema.time.__ge__(limits[0]) & ReservationSchema.time.__le__(limits[1]))
-            count = count.where(ReservationSchema.time.__ge__(limits[0]) & ReservationSchema.time.__le__(limits[1]))
-        return query,count
+        return query
 
-    def __add_people_filter(self, query: Select, count: Select, limits: Optional[Tuple[int, int]]) -> Tuple[Select,Select]:
+    def __add_people_filter(self, query: Select, limits: Optional[Tuple[int, int]]) -> Select:
         if limits:
             query = query.where(ReservationSchema.people.__ge__(limits[0]) & ReservationSchema.people.__le__(limits[1]))
-            count = count.where(ReservationSchema.people.__ge__(limits[0]) & ReservationSchema.people.__le__(limits[1]))
-        return query,count
-
-    def __get_initial(self, limit: int, start: int) -> Select:
-        return select(ReservationSchema).limit(limit).offset(start)
-
-    def __get_count(self) -> Select:
-        return select(func.count()).select_from(ReservationSchema)
-
-    async def get(self, id: Optional[str], user: Optional[str], status: Optional[List[str]], venue: Optional[str], time: Optional[Tuple[datetime, datetime]], people: Optional[Tuple[int, int]], limit: int, start: int) -> QueryResult:
-        loop = asyncio.get_event_loop()
+        return query
+
+    def __add_cursor_filter(self, query: Select, cursor: Optional[str]) -> Select:
+        if cursor:
+            time, id = decode(cursor, datetime, str)
+            query = query.where(tuple_(ReservationSchema.time, ReservationSchema.id) < tuple_(time, id))
+        return query
+
+    def __get_initial(self) -> Select:
+        return select(ReservationSchema)
+
+    async def get(self, id: Optional[str], user: Optional[str], status: Optional[List[str]], venue: Optional[str], time: Optional[Tuple[datetime, datetime]], people: Optional[Tuple[int, int]], limit: int, start: int, total: str = EXACT_TOTAL, cursor: Optional[str] = None) -> QueryResult:
+        """
+            With a cursor the page starts right after the reservation
+            it points to and start is ignored, the total is only
+            reported for offset pages
+        """
         if id:
-            return QueryResult(result=self._get_by_id(id), total=1)
-
-        query = self.__get_initial(limit, start)
-        count_query = self.__get_count()
-        query, count_query = self.__add_user_filter(query, count_query, user)
-        query, count_query = self.__add_status_filter(query, count_query, status)
-        query, count_query = self.__add_venue_filter(query,count_query, venue)
-        query, count_query = self.__add_time_filter(query,count_query, time)
-        query, count_query = self.__add_people_filter(query,count_query, people)
-        result = loop.run_in_executor(None,self.db.get_by_eq, query.order_by(desc(ReservationSchema.time)))
-        count = loop.run_in_executor(None, self.db.run_count,count_query)
-        return QueryResult(result=await result, total=await count)
+            return QueryResult(result=await self._get_by_id(id), total=1)
+
+        query = self.__get_initial()
+        query = self.__add_user_filter(query, user)
+        query = self.__add_status_filter(query, status)
+        query = self.__add_venue_filter(query, venue)
+        query = self.__add_time_filter(query, time)
+        query = self.__add_people_filter(query, people)
+        if cursor:
+            query = self.__add_cursor_filter(query, cursor)
+            start, total = 0, NO_TOTAL
+        query = query.order_by(desc(ReservationSchema.time), desc(ReservationSchema.id))
+        result, count = await self.db.get_page(query, limit, start, total)
+        return QueryResult(result=result, total=count, next_cursor=next_cursor(result, limit, lambda r: (r.time, r.id)))
 
 class MockedBuilder(QueryBuilder):
 
@@ -126,15 +133,17 @@ class MockedBuilder(QueryBuilder):
             return value.venue == venue
         return filter
 
-    async def get(self, id: Optional[str], user: Optional[str], status: Optional[List[str]], venue: Optional[str], time: Optional[Tuple[datetime, datetime]], people: Optional[Tuple[int, int]], limit: int, start: int) -> QueryResult:
+    async def get(self, id: Optional[str], user: Optional[str], status: Optional[List[str]], venue: Optional[str], time: Optional[Tuple[datetime, datetime]], people: Optional[Tuple[int, int]], limit: int, start: int, total: str = EXACT_TOTAL, cursor: Optional[str] = None) -> QueryResult:
         if time != None or people != None:
             raise Exception("Timed and people query not implemented")
+        if cursor != None:
+            raise Exception("Cursor query not implemented")
 
         if id:
-            return QueryResult(result=self._get_by_id(id),total=1)
+            return QueryResult(result=await self._get_by_id(id),total=1)
 
         result = self.__filter_by_eq(user, venue, limit, start)
-        return QueryResult(result=result, total=len(result))
+        return QueryResult(result=result, total=len(result) if total != NO_TOTAL else None)
 
 
     def __filter_by_eq(self, user: Optional[str], venue: Optional[str], limit: int, start: int) -> List[ReservationSchema]:
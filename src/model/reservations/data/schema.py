@@ -17,6 +17,7 @@ class ReservationSchema(ReservationsBase):
     time: Mapped[datetime] = mapped_column()
     people: Mapped[int] = mapped_column()
     status: Mapped[str] = mapped_column()
+    version: Mapped[int] = mapped_column(default=0, server_default=sqlalchemy.text("0"))
 
     def __repr__(self) -> str:
         return f"{self.id}:{self.user}:{self.venue}/at:{self.time}/for:{self.people}/{self.status}"
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from src.model.reservations.data.base import ReservationsBase
 from src.model.reservations.data.schema import ReservationSchema
 
+EXPIRY_DELAY = timedelta(minutes=15)
 
 def create_reservation(user: str, venue: str, time: datetime, people: int) -> 'Reservation':
     return Reservation(id="",
@@ -160,8 +161,8 @@ class Reservation(BaseModel):
                     )
 
     @staticmethod
-    def delete(id: str, database: ReservationsBase) -> None:
-        return database.delete_reservation(id)
+    async def delete(id: str, database: ReservationsBase) -> None:
+        return await database.delete_reservation(id)
 
     @classmethod
     def from_schema(cls, schema: ReservationSchema) -> Self:
@@ -1,17 +1,22 @@
 import asyncio
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from src.model.commons import logger
+from src.model.commons.paging import total_mode
 from src.model.commons.logger import Logger
 from src.model.opinions.opinion import Opinion
-from src.model.opinions.opinion_query import OpinionQuery
 from src.model.opinions.provider import OpinionsProvider
 from src.model.reservations.data.base import ReservationsBase
 from src.model.reservations.data.query import get_builder
-from src.model.reservations.reservation import Accepted, Assisted, Expired, Reservation, ReservationStatus
+from src.model.reservations.reservation import EXPIRY_DELAY, Accepted, Assisted, Expired, Reservation, ReservationStatus
 from src.model.users.service import UsersProvider
 
+# fields of a listing that need a lookup on another service,
+# the columns of the reservation always come
+USER_FIELD = "user"
+OPINIONS_FIELD = "opinions"
+
 class UserData(BaseModel):
     id: str
     name: str
@@ -22,7 +27,7 @@ class UserData(BaseModel):
 
 class ReservationResponse(BaseModel):
     id: str
-    user: UserData
+    user: Optional[UserData] = None
     venue: str
     time: datetime
     people: int
@@ -31,7 +36,7 @@ class ReservationResponse(BaseModel):
     def into_reservation(self) -> Reservation:
         return Reservation(
                 id=self.id,
-                user=self.user.id,
+                user=self.user.id if self.user else "",
                 venue=self.venue,
                 time=self.time,
                 people=self.people,
@@ -40,8 +45,7 @@ class ReservationResponse(BaseModel):
 
     def __expired(self) -> bool:
         actual_time = datetime.now().replace(tzinfo=timezone.utc)
-        delta_max = timedelta(minutes=15)
-        return delta_max <= (actual_time - self.time.replace(tzinfo=timezone.utc))
+        return EXPIRY_DELAY <= (actual_time - self.time.replace(tzinfo=timezone.utc))
 
     def should_change_to_expired(self) -> bool:
         return self.__expired() and self.status.get_status() == Accepted().get_status()
@@ -50,7 +54,8 @@ class ReservationResponse(BaseModel):
 class ReservationQueryResponse(BaseModel):
     result: List[ReservationResponse]
     opinions: Dict[str, Opinion]
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class ReservationQuery(BaseModel):
@@ -64,55 +69,97 @@ class ReservationQuery(BaseModel):
     from_time: Optional[datetime] = None
     to_time: Optional[datetime] = None
     people: Optional[Tuple[int, int]] = None
+    include_total: bool = True
+    estimate_total: bool = False
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None
 
     def change_user(self, user: str):
         self.user = f"user/{user}"
 
-    async def __search_opinions(self, reservations: List[Reservation], opinions: OpinionsProvider) -> Dict[str, Opinion]:
-        final = {}
-        promises = list(
-            map(
-                lambda x: opinions.query_opinions(OpinionQuery(venue=x.venue, reservation=x.id)),
-                reservations
-            )
-        )
-        for result in promises:
-            value = await result
-            if isinstance(value, dict) and value['total'] > 0:
-                op = value['result'].pop()
-                final[op['reservation']] = op
-            elif not isinstance(value, dict) and value.total > 0:
-                op = value.result.pop()
-                final[op.reservation] = op
+    def expands(self, field: str) -> bool:
+        """
+            Whether the listing should look up field, all of
+            them are looked up when no fields were asked for
+        """
+        return self.fields is None or field in self.fields
+
+    async def __nothing(self) -> Dict:
+        return {}
 
+    async def __search_opinions(self, reservations: List[Reservation], opinions: OpinionsProvider) -> Dict[str, Opinion]:
+        """
+            Recovers the opinions of every reservation in the page with a single call
+        """
+        if not reservations:
+            return {}
+        try:
+            found = await opinions.get_by_reservations([reservation.id for reservation in reservations])
+        except Exception as e:
+            Logger.info(f"Could not recover opinions: {e}")
+            return {}
+        final: Dict[str, Opinion] = {}
+        for opinion in found:
+            final.setdefault(opinion.reservation, opinion)
         return final
 
-    async def get_user_data(self, user: str, venue: str, users: UsersProvider, db: ReservationsBase) -> UserData:
-        builder = get_builder(db)
-        assited = await builder.get(None, user, [Assisted().get_status()], venue, None, None, 10, 0)
-        not_assited = await builder.get(None, user, [Expired().get_status()], venue, None, None, 10, 0)
-        user_data = await users.get_user(user)
+    async def __search_users(self, reservations: List[Reservation], users: UsersProvider) -> Dict[str, Any]:
+        """
+            Recovers the data of every user in the page with a single call
+        """
+        if not reservations:
+            return {}
+        try:
+            found = await users.get_users([reservation.user for reservation in reservations])
+        except Exception as e:
+            Logger.info(f"Could not recover users data: {e}")
+            return {}
+        return {
+            data['localid'] if isinstance(data, dict) else data.localid: data
+            for data in found
+            }
+
+    async def __search_attendance(self, reservations: List[Reservation], db: ReservationsBase) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """
+            Recovers how many times each user of the page attended or
+            missed a reservation at its venue with a single query
+        """
+        if not reservations:
+            return {}
+        return await db.count_by_status([(reservation.user, reservation.venue) for reservation in reservations],
+                                        [Assisted().get_status(), Expired().get_status()])
+
+    def get_user_data(self, user_data: Any, attendance: Dict[str, int]) -> UserData:
         try:
             return UserData(id=user_data['localid'] if isinstance(user_data, dict) else user_data.localid,
                         name=user_data['name'] if isinstance(user_data, dict) else user_data.name,
-                        phone=user_data['phone_number']if isinstance(user_data, dict) else user_data.name,
-                        times_expired=not_assited.total,
-                        times_assisted=assited.total)
+                        phone=user_data['phone_number']if isinstance(user_data, dict) else user_data.phone_number,
+                        times_expired=attendance.get(Expired().get_status(), 0),
+                        times_assisted=attendance.get(Assisted().get_status(), 0))
         except Exception as e:
             return UserData(id="None", name="None", phone="None", times_expired=0, times_assisted=0)
 
     async def query(self, db: ReservationsBase, opinions: OpinionsProvider, users: UsersProvider) -> ReservationQueryResponse:
         builder = get_builder(db)
         time = (self.from_time, self.to_time) if self.from_time != None and self.to_time != None else None
-        result = await builder.get(self.id, self.user, self.status, self.venue, time, self.people, self.limit, self.start)
+        result = await builder.get(self.id, self.user, self.status, self.venue, time, self.people, self.limit, self.start,
+                                   total_mode(self.include_total, self.estimate_total), self.cursor)
         reservations = [Reservation.from_schema(value) for value in result.result]
-        user_datas = [await self.get_user_data(reservation.user, reservation.venue, users, db) for reservation in reservations]
+        with_users = self.expands(USER_FIELD)
+        found_users, attendance, opinions_result = await asyncio.gather(
+                self.__search_users(reservations, users) if with_users else self.__nothing(),
+                self.__search_attendance(reservations, db) if with_users else self.__nothing(),
+                self.__search_opinions(reservations, opinions) if self.expands(OPINIONS_FIELD) else self.__nothing())
+        user_datas = [self.get_user_data(found_users.get(reservation.user.removeprefix("user/")),
+                                         attendance.get((reservation.user, reservation.venue), {}))
+                      if with_users else None
+                      for reservation in reservations]
         result_reservations = list(map(
             lambda d: ReservationResponse(user=d[0], id=d[1].id, venue=d[1].venue, time=d[1].time, people=d[1].people, status=d[1].status),
             zip(user_datas, reservations)
             ))
-        opinions_result = await self.__search_opinions(reservations, opinions)
         Logger.info(f"Queried reservations and obtained: {reservations}, {opinions_result}")
         return ReservationQueryResponse(result=result_reservations,
                                         opinions=opinions_result,
-                                        total=result.total)
+                                        total=result.total,
+                                        next_cursor=result.next_cursor)
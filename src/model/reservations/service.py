@@ -1,11 +1,14 @@
+import asyncio
 from datetime import datetime, timedelta, timezone, tzinfo
 from logging import log
 import logging
 from typing import List
 from fastapi import HTTPException, Response, status
 
+from src.model.commons.breaker import ResiliencePolicy, configure_target
 from src.model.commons.caller import delete, get, post, put, recover_json_data
 from src.model.commons.error import Error
+from src.model.commons.session import primary_reads
 from src.model.communications.message import Message
 from src.model.communications.service import CommunicationProvider, DummyCommunicationProvider
 from src.model.opinions.opinion import Opinion
@@ -13,9 +16,9 @@ from src.model.opinions.opinion_query import OpinionQuery, OpinionQueryResponse
 from src.model.opinions.provider import OpinionsProvider
 from src.model.points.point import Point, PointResponse
 from src.model.points.provider import PointsProvider
-from src.model.reservations.data.base import ReservationsBase
+from src.model.reservations.data.base import ReservationConflict, ReservationsBase
 from src.model.reservations.data.schema import ReservationSchema
-from src.model.reservations.reservation import Assisted, CreateInfo, Expired, Reservation, ReservationStatus
+from src.model.reservations.reservation import EXPIRY_DELAY, Accepted, Assisted, CreateInfo, Expired, Reservation, ReservationStatus
 from src.model.reservations.update import Update
 from src.model.reservations.reservationQuery import ReservationQuery, ReservationQueryResponse
 from src.model.stats.provider import StatsProvider
@@ -78,6 +81,9 @@ class ReservationsService:
     async def update_reservation(self, reservation: str, update: Update, response: Response) -> Reservation | Error:
         try:
            return await self.provider.update_reservation(reservation, update)
+        except ReservationConflict as e:
+           response.status_code = status.HTTP_409_CONFLICT
+           return Error.from_exception(e)
         except Exception as e:
            response.status_code = status.HTTP_400_BAD_REQUEST
            return Error.from_exception(e)
@@ -156,36 +162,28 @@ class ReservationsService:
                     )
 
 class HttpReservationsProvider(ReservationsProvider):
-    def __init__(self, service_url: str):
+    def __init__(self, service_url: str, policy: ResiliencePolicy | None = None):
         self.url = service_url
+        configure_target(service_url, policy)
 
     async def create_reservation(self, reservation: CreateInfo) -> Reservation:
         endpoint = "/reservations"
         body = reservation.model_dump()
-        body['time'] = body['time'].__str__()
         Logger.info(f"Sending create reservation request with data: {body}")
         response = await post(f"{self.url}{endpoint}", body=body)
-        data = await recover_json_data(response)
-        data['time'] = datetime.fromisoformat(data['time'])
-        return data
+        return Reservation(**await recover_json_data(response))
 
     async def update_reservation(self, reservation_id: str, reservation_update: Update) -> Reservation:
         endpoint = "/reservations"
         body = reservation_update.model_dump(exclude_none=True)
-        if body.get('time'):
-            body['time'] = body['time'].__str__()
         response = await put(f"{self.url}{endpoint}/{reservation_id}", body=body)
-        data = await recover_json_data(response)
-        data['time'] = datetime.fromisoformat(data['time'])
-        return data
+        if response.status == status.HTTP_409_CONFLICT:
+            raise ReservationConflict(Error(**await recover_json_data(response)).description)
+        return Reservation(**await recover_json_data(response))
 
     async def get_reservations(self, query: ReservationQuery) -> ReservationQueryResponse:
         endpoint = "/reservations"
         body = query.model_dump(exclude_none=True)
-        if body.get('from_time'):
-            body['from_time'] = body['from_time'].__str__()
-        if body.get('to_time'):
-            body['to_time'] = body['to_time'].__str__()
         response = await get(f"{self.url}{endpoint}", params=body)
         return await recover_json_data(response)
 
@@ -197,17 +195,12 @@ class HttpReservationsProvider(ReservationsProvider):
     async def create_opinion(self, opinion: Opinion, user: str) -> Opinion:
         endpoint = "/opinions"
         body = opinion.model_dump()
-        body['date'] = body['date'].__str__()
         response = await post(f"{self.url}{endpoint}/{user}", body=body)
         return await recover_json_data(response)
 
     async def get_opinions(self, query: OpinionQuery) -> OpinionQueryResponse:
         endpoint = "/opinions"
         params = query.model_dump(exclude_none=True)
-        if params.get("from_time"):
-            params["from_time"] = params["from_time"].__str__()
-        if params.get("to_time"):
-            params["to_time"] = params["to_time"].__str__()
         response = await get(f"{self.url}{endpoint}", params=params)
         return await recover_json_data(response)
 
@@ -265,13 +258,16 @@ class LocalReservationsProvider(ReservationsProvider):
             return result['total'] != 0
         return result.total != 0 # type: ignore
 
-    async def __notify_state_change(self, to: str, venue_id: str, new_state: ReservationStatus):
+    async def __venue_name(self, venue_id: str) -> str:
         venue = await self.venues.get_venues(VenueQuery(id=venue_id))
+        if isinstance(venue, dict):
+            return venue['result'].pop()['name']
+        return venue.result.pop().name
+
+    async def __notify_state_change(self, to: str, venue_id: str, new_state: ReservationStatus, name: str | None = None):
         try:
-            if isinstance(venue, dict):
-                name = venue['result'].pop()['name']
-            else:
-                name = venue.result.pop().name
+            if name is None:
+                name = await self.__venue_name(venue_id)
 
             message = f"Tienes un cambio de estado en tu reserva en {name}!\n{new_state.status_message()}"
             await self.communications.send_message(Message(user=to.removeprefix("user/"), message=message))
@@ -287,7 +283,7 @@ class LocalReservationsProvider(ReservationsProvider):
         persistance = reservation.into_reservation().persistance()
         Logger.info("=Persisted reservation schema created")
         response = Reservation.from_schema(persistance)
-        self.db.store_reservation(persistance)
+        await self.db.store_reservation(persistance)
         Logger.info("=Stored reservation in database")
         await self.__notify_user(
             reservation.user,
@@ -302,15 +298,25 @@ class LocalReservationsProvider(ReservationsProvider):
         return response
 
     async def update_reservation(self, reservation_id: str, reservation_update: Update) -> Reservation:
+        """
+            The new state is written only if the reservation was not
+            changed since it was read, in a single UPDATE ... RETURNING.
+            Otherwise ReservationConflict is raised and nothing is
+            notified
+        """
         Logger.info(f"Update request for reservation: {Update}")
-        schema = self.db.get_reservation_by_id(reservation_id)
+        with primary_reads():
+            schema = await self.db.get_reservation_by_id(reservation_id)
         if schema:
             Logger.info("Updating reservation from schema")
-            reservation = Reservation.from_schema(schema)
-            reservation = await reservation_update.modify(reservation, self.stats, self.points)
+            reservation = reservation_update.apply(Reservation.from_schema(schema))
             Logger.info(f"Modified reservation: {reservation}")
-            self.db.update_reservation(reservation.persistance())
+            updated = await self.db.update_reservation(reservation.persistance(), schema.version)
+            if updated is None:
+                raise ReservationConflict(f"Reservation {reservation_id} was modified by another request")
+            reservation = Reservation.from_schema(updated)
             Logger.info("Persisted reservation")
+            await reservation_update.notify(reservation, self.stats, self.points)
             await self.__notify_user(
                 reservation.venue,
                 message=f"Tienes una modeficacion en la reserva ({reservation.id}): del dia {schema.time.date()}!\nPodes ver las modificaciones de la reserva en la web"
@@ -325,15 +331,50 @@ class LocalReservationsProvider(ReservationsProvider):
         response = await query.query(self.db, self.opinions, self.users)
         for reservation in response.result:
             if reservation.should_change_to_expired():
-                update = Update(user="", advance_forward=False)
-                await self.update_reservation(reservation.id, update)
                 reservation.status = Expired()
             reservation.time = reservation.time - timedelta(hours=3)
         return response
 
+    async def expire_reservations(self, batch_size: int = 500) -> int:
+        """
+            Moves the accepted reservations that are past their time
+            by more than EXPIRY_DELAY to expired, a batch per statement,
+            and dispatches the side effects of each batch together.
+            Listings only show them as expired until this runs
+        """
+        before = datetime.now() - EXPIRY_DELAY
+        expired = 0
+        while True:
+            batch = await self.db.transition_before(Accepted().get_status(), Expired().get_status(), before, batch_size)
+            expired += len(batch)
+            await self.__after_expiry([Reservation.from_schema(schema) for schema in batch])
+            if len(batch) < batch_size:
+                Logger.info(f"Expired {expired} reservations")
+                return expired
+
+    async def __after_expiry(self, reservations: List[Reservation]) -> None:
+        if not reservations:
+            return
+        venues = list({reservation.venue for reservation in reservations})
+        names = await asyncio.gather(*(self.__venue_name(venue) for venue in venues), return_exceptions=True)
+        names = {venue: name for venue, name in zip(venues, names) if isinstance(name, str)}
+        results = await asyncio.gather(*(self.__expired(reservation, names.get(reservation.venue))
+                                         for reservation in reservations), return_exceptions=True)
+        for reservation, result in zip(reservations, results):
+            if isinstance(result, Exception):
+                logging.error(f"Could not dispatch expiry of {reservation.id}: {result}")
+
+    async def __expired(self, reservation: Reservation, venue_name: str | None) -> None:
+        await Update(user="", advance_forward=False).notify(reservation, self.stats, self.points)
+        await self.__notify_user(
+            reservation.venue,
+            message=f"Tienes una modeficacion en la reserva ({reservation.id}): del dia {reservation.time.date()}!\nPodes ver las modificaciones de la reserva en la web"
+        )
+        await self.__notify_state_change(reservation.user, reservation.venue, reservation.status, venue_name)
+
     async def delete_reservation(self, reservation_id: str) -> None:
         Logger.info(f"Reservation deletion for reservation id: {reservation_id}")
-        Reservation.delete(reservation_id, self.db)
+        await Reservation.delete(reservation_id, self.db)
 
     async def create_opinion(self, opinion: Opinion, user: str) -> Opinion:
         Logger.info(f"Opinion creation for reservation {opinion.reservation}")
@@ -341,7 +382,8 @@ class LocalReservationsProvider(ReservationsProvider):
             id=opinion.reservation,
             status=[Assisted().get_status()]
         )
-        result = await self.get_reservations(query)
+        with primary_reads():
+            result = await self.get_reservations(query)
         if result.total == 0 and user not in result.result[0].user.id:
             raise Exception("Reservation was not done by user")
         Logger.info("Creating opinion")
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from src.model.commons.logger import Logger
+from src.model.reservations.service import LocalReservationsProvider
+
+
+class ExpirySweeper:
+    """
+        Expires reservations in the background of the service,
+        every interval seconds. Several instances can sweep at
+        the same time, rows locked by one are skipped by the rest
+    """
+
+    def __init__(self, provider: LocalReservationsProvider, interval: float, batch_size: int):
+        self.provider = provider
+        self.interval = interval
+        self.batch_size = batch_size
+        self.__task: asyncio.Task | None = None
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                await self.provider.expire_reservations(self.batch_size)
+            except Exception as e:
+                logging.error(f"Expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.__task is not None:
+            return
+        Logger.info(f"Sweeping expired reservations every {self.interval}s")
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
@@ -21,7 +21,14 @@ class Update(BaseModel):
         self.user = f"user/{new_user}"
 
     async def modify(self, reservation: Reservation, stats: StatsProvider, points: PointsProvider) -> Reservation:
+        reservation = self.apply(reservation)
+        await self.notify(reservation, stats, points)
+        return reservation
 
+    def apply(self, reservation: Reservation) -> Reservation:
+        """
+            Applies the state transition, without side effects
+        """
         if self.cancel:
             reservation.cancel()
 
@@ -36,9 +43,14 @@ class Update(BaseModel):
         if self.people:
             reservation.people = self.people
             reservation.modified()
+        return reservation
+
+    async def notify(self, reservation: Reservation, stats: StatsProvider, points: PointsProvider) -> None:
+        """
+            Reports the new state to stats and points, once
+            it was persisted
+        """
         Logger.info(f"update: {reservation.status} && {reservation.notifiable()}")
         if reservation.notifiable():
             await stats.update(reservation)
             await points.update_points(Point.from_reservation(reservation, updater=self.user))
-
-        return reservation
@@ -5,6 +5,7 @@ from src.model.stats.data.user_data import UserDataDocument
 from src.model.stats.data.venue_data import VenueDataDocument
 from src.model.stats.user_data import UserStatData
 from motor.motor_asyncio import AsyncIOMotorClient
+from src.model.commons.metrics import mongo_timer
 
 from src.model.stats.venue_data import VenueStatData
 
@@ -30,7 +31,7 @@ class MongoStatsDB(StatsDB):
         self.db = await init_beanie(database=self.client["chefcito-mongo-db"], document_models=[UserDataDocument, VenueDataDocument])
 
     def __init__(self, conn_string: str):
-        client = AsyncIOMotorClient(conn_string)
+        client = AsyncIOMotorClient(conn_string, event_listeners=[mongo_timer])
         self.client = client
         self.db = None 
 
@@ -1,3 +1,4 @@
+from src.model.commons.breaker import ResiliencePolicy, configure_target
 from src.model.commons.caller import get, post, recover_json_data
 from src.model.commons.logger import Logger
 from src.model.reservations.reservation import Reservation
@@ -24,14 +25,13 @@ class StatsProvider():
 
 class HttpStatsProvider(StatsProvider):
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, policy: ResiliencePolicy | None = None):
         self.url = url
+        configure_target(url, policy)
 
     async def update(self, update: Reservation) -> None:
         endpoint = f"{self.url}{UPDATE_ENDPOINT}"
         body = update.model_dump()
-        if body.get('time'):
-            body['time'] = body['time'].__str__()
         await post(endpoint, body=body)
 
     async def get_user(self, user: str) -> UserStatData:
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import List
+from src.model.commons.breaker import ResiliencePolicy, configure_target
 from src.model.commons.caller import get, post, recover_json_data
 from src.model.commons.error import Error
 from src.model.summarizer.summary import Summary
@@ -35,13 +36,14 @@ class SummarizerService:
 
 class HttpSummarizerProvider(SummarizerProvider):
     
-    def __init__(self, host: str):
+    def __init__(self, host: str, policy: ResiliencePolicy | None = None):
         self.host = host
+        configure_target(host, policy)
 
     async def create_summary(self, venue: str, since: datetime) -> Summary:
         endpoint = f"/summaries/{venue}"
         params = {
-            "since": since.__str__()
+            "since": since
         }
         response = await post(f"{self.host}{endpoint}", params=params)
         return await recover_json_data(response)
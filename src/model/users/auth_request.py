@@ -14,8 +14,8 @@ class AuthRequest(UserToken):
         if self.id_token == ANONYMOUS_TOKEN:
             return await self.__anonymous_allowed(db) 
         data = await self.get_data(firebase, db)
-        return data.allowed_to(self.endpoint, db)
+        return await data.allowed_to(self.endpoint, db)
 
     async def __anonymous_allowed(self, db:Database) -> bool:
         user = User.get_anonymous()
-        return db.is_allowed(user, self.endpoint)
+        return await db.is_allowed(user, self.endpoint)
@@ -1,9 +1,8 @@
 from typing import Callable, Dict, Any
 
 from fastapi import status
-from src.model.commons.caller import HTTPMethod, back_off, post, recover_json_data
+from src.model.commons.caller import CallResponse, HTTPMethod, back_off, post, recover_json_data
 import src.model.users.firebase.exceptions as fe
-import aiohttp
 
 class FirebaseAuth():
    
@@ -29,13 +28,13 @@ class FirebaseClient(FirebaseAuth):
     def __init__(self, key: str):
         self.api_key = key
     
-    async def call_endpoint(self, endpoint: str, data: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:
+    async def call_endpoint(self, endpoint: str, data: dict = {}, params: dict = {}) -> CallResponse:
         endpoint = f"{self.host}{endpoint}"
         response = await post(endpoint, body=data, params=params)
         return response
 
     def __get_backoff_method(self) -> HTTPMethod:
-        async def method(endpoint: str, data: dict = {}, body: dict = {}, params: dict = {}) -> aiohttp.ClientResponse:
+        async def method(endpoint: str, data: dict = {}, body: dict = {}, params: dict = {}) -> CallResponse:
             response = await self.call_endpoint(endpoint, data=data, params=params)
             if response.status != status.HTTP_200_OK:
                 raise fe.InvalidToken()
@@ -45,7 +44,7 @@ class FirebaseClient(FirebaseAuth):
     async def get_data(self, token: str) -> Dict[str, str]:
         endpoint = "/v1/accounts:lookup"
         method =  self.__get_backoff_method()
-        return (await back_off(method, endpoint, data={"idToken": token}, params={"key": self.api_key}))['users'][0]
+        return (await back_off(method, endpoint, data={"idToken": token}, params={"key": self.api_key}, target=self.host))['users'][0]
     
     async def sign_in(self, email: str, password: str) -> Dict[str, Any]:
         endpoint = "/v1/accounts:signInWithPassword"
@@ -1,13 +1,11 @@
-from typing import Tuple
-from sqlalchemy import BinaryExpression, Column, create_engine, select
-from sqlalchemy.orm import Session
-from sqlalchemy.pool import NullPool
+from typing import List, Tuple
+from sqlalchemy import BinaryExpression, Column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.model.commons.session import PoolSettings, create_engine, warm_up
 from src.model.users.permissions.schema import AssociatedData, User, Permission
 from src.model.users.update import UserUpdate
 
 
-# TODO: This pool size makes more sense if it is configurable
-DEFAULT_POOL_SIZE = 5
 
 class Database():
 
@@ -16,19 +14,25 @@ class Database():
         splitted[position] = "param"
         return "/".join(splitted)
 
-    def get_user(self, uid: str) -> Tuple[User | None, AssociatedData | None]:
+    async def get_user(self, uid: str) -> Tuple[User | None, AssociatedData | None]:
         """
         Returns a user from the database
         """
         raise Exception("Interface method")
 
-    def is_allowed(self, user: User, endpoint: str) -> bool:
+    async def get_users(self, uids: List[str]) -> List[Tuple[User, AssociatedData]]:
+        """
+        Returns every user found among uids together with its data
+        """
+        raise Exception("Interface method")
+
+    async def is_allowed(self, user: User, endpoint: str) -> bool:
         """
         Checks if a certain user is allowed to access an endpoint
         """
         raise Exception("Interface method")
 
-    def insert_user(self, user: User, data: AssociatedData) -> None:
+    async def insert_user(self, user: User, data: AssociatedData) -> None:
         """
         Inserts a new user into the database
         """
@@ -42,60 +46,63 @@ class Database():
 
 class DBEngine(Database):
 
-    def __init__(self, conn_string: str, **kwargs):
+    def __init__(self, conn_string: str, pool: PoolSettings | None = None):
         super().__init__()
-        kwargs["pool_size"] = kwargs.get("pool_size", DEFAULT_POOL_SIZE)
-        kwargs["pool_recyle"] = 30
-        self.__engine = create_engine(conn_string, poolclass=NullPool)
-
-    def get_user(self, uid: str) -> Tuple[User | None,AssociatedData | None]:
-        session = Session(self.__engine)
-
-        user_query = select(User).where(User.uid.__eq__(uid))
-        data_query = select(AssociatedData).where(AssociatedData.uid.__eq__(uid))
-        result = session.scalar(user_query)
-        data_result = session.scalar(data_query)
-        session.close()
+        self.__engine = create_engine(conn_string, "users", pool)
+
+    async def warm_up(self, connections: int) -> None:
+        await warm_up(self.__engine, connections)
+
+    async def get_user(self, uid: str) -> Tuple[User | None,AssociatedData | None]:
+        async with AsyncSession(self.__engine) as session:
+            user_query = select(User).where(User.uid.__eq__(uid))
+            data_query = select(AssociatedData).where(AssociatedData.uid.__eq__(uid))
+            result = await session.scalar(user_query)
+            data_result = await session.scalar(data_query)
         return result,data_result
 
+    async def get_users(self, uids: List[str]) -> List[Tuple[User, AssociatedData]]:
+        if not uids:
+            return []
+        async with AsyncSession(self.__engine) as session:
+            users_query = select(User, AssociatedData)\
+                            .join(AssociatedData, AssociatedData.uid.__eq__(User.uid))\
+                            .where(User.uid.in_(uids))
+            result = [(user, data) for user, data in await session.execute(users_query)]
+        return result
+
     def __get_condition(self, endpoint: str) -> BinaryExpression[bool]:
         endpoints = [endpoint, super()._add_param_at(endpoint)]
         return Permission.endpoint.in_(endpoints)
 
-    def is_allowed(self, user: User, endpoint: str) -> bool:
-        session = Session(self.__engine)
+    async def is_allowed(self, user: User, endpoint: str) -> bool:
         """SELECT *
         FROM permissions
         JOIN users ON users.user_type = permissions.user_type
         WHERE permissions.endpoint = {endpoint} AND users.user_type = permissions.type"""
-        param_endpoint = endpoint.split("/")
-        param_endpoint[-1] = 'param'
-        param_endpoint = '/'.join(param_endpoint)
         authorization_query = select(Permission)\
                                 .where(self.__get_condition(endpoint))\
                                 .where(Permission.user_type.__eq__(user.user_type))
 
-        result = session.scalar(authorization_query) != None
-        session.close()
+        async with AsyncSession(self.__engine) as session:
+            result = await session.scalar(authorization_query) != None
         return result
 
-    def insert_user(self, user: User, data: AssociatedData) -> None:
-        session = Session(self.__engine)
-        session.add(user)
-        session.commit()
-        session.add(data)
-        session.commit()
-        session.close()
+    async def insert_user(self, user: User, data: AssociatedData) -> None:
+        async with AsyncSession(self.__engine, expire_on_commit=False) as session:
+            session.add(user)
+            await session.commit()
+            session.add(data)
+            await session.commit()
 
     async def update_data(self, user: str, update: UserUpdate) -> None:
-        session = Session(self.__engine)
-        value = session.scalar(select(AssociatedData).where(AssociatedData.uid.__eq__(user)))
-        if value and update.name:
-            value.name = update.name
-        if value and update.phone:
-            value.phone_number = update.phone
-        session.commit()
-        session.close()
+        async with AsyncSession(self.__engine) as session:
+            value = await session.scalar(select(AssociatedData).where(AssociatedData.uid.__eq__(user)))
+            if value and update.name:
+                value.name = update.name
+            if value and update.phone:
+                value.phone_number = update.phone
+            await session.commit()
 
 class DBMock(Database):
 
@@ -104,7 +111,7 @@ class DBMock(Database):
        self.base = base_mock
        self.permissions = permissions
 
-    def get_user(self, uid: str) -> Tuple[User | None, AssociatedData | None]:
+    async def get_user(self, uid: str) -> Tuple[User | None, AssociatedData | None]:
 
         user_type = self.base.get(uid, None)
         if user_type:
@@ -112,6 +119,9 @@ class DBMock(Database):
 
         return User(uid=uid, email="", user_type="anonymous"), AssociatedData(uid=uid, name="", phone_number="")
 
+    async def get_users(self, uids: List[str]) -> List[Tuple[User, AssociatedData]]:
+        return [await self.get_user(uid) for uid in dict.fromkeys(uids)] # type: ignore
+
     def __check_all(self, endpoint: str, user_type: str) -> bool:
         endpoints = [endpoint, self._add_param_at(endpoint)]
         return any(
@@ -120,11 +130,11 @@ class DBMock(Database):
                 )
 
 
-    def  is_allowed(self, user: User, endpoint: str) -> bool:
+    async def  is_allowed(self, user: User, endpoint: str) -> bool:
 
         return self.__check_all(endpoint, user.user_type)
 
-    def insert_user(self, user: User, data: AssociatedData) -> None:
+    async def insert_user(self, user: User, data: AssociatedData) -> None:
         self.base[user.uid] = (user,data)
 
     async def update_data(self, user: str, update: UserUpdate) -> None:
@@ -1,5 +1,7 @@
-from typing import Annotated, Any, Dict, Self
+from typing import Annotated, Any, Dict, List, Self
 from fastapi import Body, HTTPException, Query, status, Response
+from src.model.commons.breaker import ResiliencePolicy, configure_target
+from src.model.commons.hedge import HedgePolicy, configure_hedging
 from src.model.commons.caller import get, post, put, recover_json_data, with_retry
 from src.model.commons.error import Error
 from src.model.commons.logger import Logger
@@ -23,6 +25,9 @@ class UsersProvider:
     async def get_user(self, user: str) -> UserData:
         raise Exception("Interface method should not be called")
 
+    async def get_users(self, users: List[str]) -> List[UserData]:
+        raise Exception("Interface method should not be called")
+
     async def is_allowed(self, auth: Annotated[AuthRequest, Body()]) -> int:
         raise Exception("Interface method should not be called")
 
@@ -31,8 +36,10 @@ class UsersProvider:
 
 class HttpUsersProvider(UsersProvider):
 
-    def __init__(self, users_host: str) -> None:
+    def __init__(self, users_host: str, policy: ResiliencePolicy | None = None, hedging: HedgePolicy | None = None) -> None:
         self.host = users_host
+        configure_target(users_host, policy)
+        configure_hedging(users_host, hedging)
 
     async def sign_up(self, user_type: str, token: Annotated[UserToken, Body()], name: str, phone_number: str) -> UserData:
         endpoint = f"{self.host}/users/signup/{user_type}"
@@ -60,9 +67,15 @@ class HttpUsersProvider(UsersProvider):
 
     async def get_user(self, user: str) -> UserData:
         endpoint = f"{self.host}/{user}"
-        users_response = await get(endpoint)
+        users_response = await get(endpoint, hedge=True)
         return await recover_json_data(users_response)
 
+    async def get_users(self, users: List[str]) -> List[UserData]:
+        endpoint = f"{self.host}/users/batch"
+        ids = list(dict.fromkeys(user.removeprefix("user/") for user in users))
+        users_response = await post(endpoint, body=ids)
+        return [UserData(**data) for data in await recover_json_data(users_response)]
+
     async def update(self, auth: Annotated[UserToken, Body()], update: UserUpdate) -> UserData:
         endpoint = f"{self.host}/users"
         update_body = update.model_dump()
@@ -88,7 +101,7 @@ class LocalUsersProvider(UsersProvider):
         if phone_number:
             user.phone_number = phone_number
         Logger.info(f"New user ==> {user.localid} retrieved")
-        user.insert_into(user_type, self.database)
+        await user.insert_into(user_type, self.database)
         await self.communications.store_user(c.User(localid=user.localid, number=user.phone_number))
         Logger.info(f"New user ==> {user.localid} persisted")
         return user
@@ -111,11 +124,16 @@ class LocalUsersProvider(UsersProvider):
         return data
 
     async def get_user(self, user: str) -> UserData:
-        recovered, data = self.database.get_user(user)
+        recovered, data = await self.database.get_user(user)
         assert recovered is not None
         assert data is not None
         return UserData(localid=recovered.uid, email=recovered.email, name=data.name, phone_number=data.phone_number)
 
+    async def get_users(self, users: List[str]) -> List[UserData]:
+        Logger.info(f"Retrieving data for {len(users)} users")
+        return [UserData(localid=user.uid, email=user.email, name=data.name, phone_number=data.phone_number)
+                for user, data in await self.database.get_users(users)]
+
 class UsersService:
 
     def __init__(self, provider: UsersProvider) -> None:
@@ -168,3 +186,12 @@ class UsersService:
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=e.__str__()
                     )
+
+    async def get_users(self, users: List[str]) -> List[UserData]:
+        try:
+            return await self.provider.get_users(users)
+        except Exception as e:
+            raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=e.__str__()
+                    )
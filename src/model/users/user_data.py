@@ -15,17 +15,17 @@ class UserData(BaseModel):
     name: str
     phone_number: str
 
-    def allowed_to(self, endpoint: str, base: Database) -> bool:
-        user, _ = base.get_user(self.localid)
-        return user != None and base.is_allowed(user, endpoint)
+    async def allowed_to(self, endpoint: str, base: Database) -> bool:
+        user, _ = await base.get_user(self.localid)
+        return user != None and await base.is_allowed(user, endpoint)
 
-    def insert_into(self, user_type: str, base: Database) -> None:
-        base.insert_user(
+    async def insert_into(self, user_type: str, base: Database) -> None:
+        await base.insert_user(
             User(uid=self.localid, email=self.email, user_type=user_type),
             AssociatedData(uid=self.localid, name=self.name, phone_number=self.phone_number)) 
 
-    def get_type(self, base: Database) -> str:
-        user, _ = base.get_user(self.localid)
+    async def get_type(self, base: Database) -> str:
+        user, _ = await base.get_user(self.localid)
         return User.check_anonymous(user).user_type 
     
     async def update(self, update: UserUpdate, base: Database) -> None:
@@ -48,7 +48,7 @@ class UserToken(BaseModel):
 
 async def recover_data(token: str, auth: FirebaseAuth, base: Database) -> 'UserData':
     data = await auth.get_data(token)
-    user, user_data = base.get_user(data['localId'])
+    user, user_data = await base.get_user(data['localId'])
     if not user:
         user = User(uid=data['localId'], email=data['email'])
     if not user_data:
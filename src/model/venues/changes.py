@@ -0,0 +1,19 @@
+from typing import List
+from pydantic import BaseModel
+
+CREATED = "create"
+UPDATED = "update"
+DELETED = "delete"
+
+class VenueChange(BaseModel):
+    version: int
+    venue_id: str
+    op: str
+
+class VenueChanges(BaseModel):
+    """
+        Changes after the version asked for, oldest first, and
+        the version the follower should ask from next
+    """
+    changes: List[VenueChange]
+    version: int
@@ -1,21 +1,25 @@
-from typing import Any, Callable, List, Tuple
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 
-from sqlalchemy.pool import NullPool
-from src.model.commons.session import with_no_commit
-from src.model.venues.data.schema import VenueSchema
-from sqlalchemy import Engine, Result, Select, create_engine, select, update, delete
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from src.model.commons.paging import EXACT_TOTAL, fetch_page
+from src.model.commons.session import PoolSettings, create_engines, warm_up, with_no_commit, with_session
+from src.model.venues.changes import CREATED, DELETED, UPDATED, VenueChange
+from src.model.venues.data.schema import VenueChangeSchema, VenueSchema, VenueVersionSchema
+from sqlalchemy import Select, select, update, delete
 from uuid import UUID
 
-# TODO: try to add this to configuration options
-DEFAULT_POOL_SIZE = 5
 
 class VenuesBase:
 
-    def get_by_eq(self, query: Select, count: Select) -> Tuple[List[VenueSchema], int]:
+    async def get_page(self, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[VenueSchema], Optional[int]]:
+        """
+            Runs a query for a page of venues and returns it
+            together with the total number of rows that match
+        """
         raise Exception("Interface method should not be used")
 
-    def store_venue(self, venue: VenueSchema) -> None:
+    async def store_venue(self, venue: VenueSchema) -> None:
         """
             Stores a venue on the base,
             if the venue is already stored then
@@ -25,83 +29,191 @@ class VenuesBase:
 
 
 
-    def update_venue(self, venue: VenueSchema) -> None:
+    async def update_venue(self, venue: VenueSchema) -> None:
         """
             Updates information about a venue
         """
         raise Exception("Interface method should not be called")
 
-    def delete_venue(self, id: str) -> None:
+    async def delete_venue(self, id: str) -> None:
         """
             Deletes a venue
         """
         raise Exception("Interface method should not be called")
 
-    def get_venue_by_id(self, id: str) -> VenueSchema | None:
+    async def get_venue_by_id(self, id: str) -> VenueSchema | None:
 
         """
             Searches for a venue based on the id
             given
         """
         raise Exception("Interface method should not be called")
-from sqlalchemy.orm import sessionmaker, scoped_session
+
+    async def get_in_box(self, south: float, west: float, north: float, east: float) -> List[VenueSchema]:
+        """
+            Venues whose coordinates fall inside the
+            bounds given
+        """
+        raise Exception("Interface method should not be called")
+
+    async def get_venues_by_ids(self, ids: List[str]) -> List[VenueSchema]:
+        """
+            Venues with any of the ids given, in no
+            particular order
+        """
+        raise Exception("Interface method should not be called")
+
+    async def get_coordinates(self) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        """
+            Id and coordinates of every venue
+        """
+        raise Exception("Interface method should not be called")
+
+    async def get_changes(self, since: int, limit: int) -> List[VenueChange]:
+        """
+            Changes recorded after version since, oldest
+            first. Every store, update and delete of a venue
+            records one
+        """
+        raise Exception("Interface method should not be called")
+
+    async def latest_version(self) -> int:
+        """
+            Version of the last change recorded, 0 when
+            there are none
+        """
+        raise Exception("Interface method should not be called")
 
 class RelBase(VenuesBase):
-    def __init__(self, conn_string: str, **kwargs):
-        kwargs["pool_size"] = kwargs.get("pool_size", DEFAULT_POOL_SIZE)
-        kwargs["pool_recyle"] = 30
-        self.__engine = create_engine(conn_string, poolclass=NullPool)
+    def __init__(self, conn_string: str, pool: PoolSettings | None = None):
+        self.__engines = create_engines(conn_string, "venues", pool)
 
-    def __get_runnable_select(self, query: Select) -> Callable[[Engine], Result]:
-        def call(session: Session) -> List[Any]:
-            return list(session.execute(query).scalars())
+    async def warm_up(self, connections: int) -> None:
+        await warm_up(self.__engines, connections)
+
+    def __get_page(self, query: Select, limit: int, start: int, total: str) -> Callable[[AsyncEngine], Awaitable[Tuple[List[VenueSchema], Optional[int]]]]:
+        async def call(session: AsyncSession) -> Tuple[List[VenueSchema], Optional[int]]:
+            return await fetch_page(session, query, limit, start, total)
 
         return with_no_commit(call)
 
-    def get_by_eq(self, query: Select, count: Select) -> Tuple[List[VenueSchema], int]:
-        venues: List[VenueSchema] = self.__get_runnable_select(query)(self.__engine) # type: ignore
-        total: int = self.__get_runnable_select(count)(self.__engine).pop() # type: ignore
-        return venues, total
-
-    def store_venue(self, venue: VenueSchema) -> None:
-        session = Session(self.__engine)
-        session.add(venue)
-        session.commit()
-        session.close()
-
-    def update_venue(self, venue: VenueSchema) -> None:
-        session = Session(self.__engine)
-        value = session.get(VenueSchema, venue.id)
-        if not value:
-            return
-        value.name = venue.name
-        value.location = venue.location
-        value.capacity = venue.capacity
-        value.logo = venue.logo
-        value.pictures = venue.pictures
-        value.slots = venue.slots
-        value.characteristics = venue.characteristics
-        value.features = venue.features
-        value.vacations = venue.vacations
-        value.reservationLeadTime = venue.reservationLeadTime
-        value.menu = venue.menu
-        value.status = venue.status
-        session.commit()
-        session.close()
-
-    def get_venue_by_id(self, id: str) -> VenueSchema | None:
-        session = Session(self.__engine)
-        query = select(VenueSchema).where(VenueSchema.id.__eq__(id))
-        result = session.scalar(query)
-        session.close()
-        return result
-
-    def delete_venue(self, id: str) -> None:
-        session = Session(self.__engine)
-        query = delete(VenueSchema).where(VenueSchema.id.__eq__(id))
-        session.execute(query)
-        session.commit()
-        session.close()
+    async def get_page(self, query: Select, limit: int, start: int, total: str = EXACT_TOTAL) -> Tuple[List[VenueSchema], Optional[int]]:
+        return await self.__get_page(query, limit, start, total)(self.__engines)
+
+    async def __record(self, session: AsyncSession, venue_id: str, op: str) -> None:
+        query = update(VenueVersionSchema) \
+                .where(VenueVersionSchema.id.__eq__(1)) \
+                .values(version=VenueVersionSchema.version + 1) \
+                .returning(VenueVersionSchema.version)
+        version = await session.scalar(query)
+        if version is None:
+            version = 1
+            session.add(VenueVersionSchema(id=1, version=version))
+        session.add(VenueChangeSchema(version=version, venue_id=venue_id, op=op, at=datetime.now()))
+
+    def __store_venue(self, venue: VenueSchema) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
+            session.add(venue)
+            await self.__record(session, venue.id, CREATED)
+        return call
+
+    async def store_venue(self, venue: VenueSchema) -> None:
+        await with_session(self.__store_venue(venue))(self.__engines)
+
+    def __update_venue(self, venue: VenueSchema) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
+            value = await session.get(VenueSchema, venue.id)
+            if not value:
+                return
+            value.name = venue.name
+            value.location = venue.location
+            value.capacity = venue.capacity
+            value.logo = venue.logo
+            value.pictures = venue.pictures
+            value.slots = venue.slots
+            value.characteristics = venue.characteristics
+            value.features = venue.features
+            value.vacations = venue.vacations
+            value.reservationLeadTime = venue.reservationLeadTime
+            value.menu = venue.menu
+            value.status = venue.status
+            await self.__record(session, venue.id, UPDATED)
+        return call
+
+    async def update_venue(self, venue: VenueSchema) -> None:
+        await with_session(self.__update_venue(venue))(self.__engines)
+
+    def __get_venue_by_id(self, id: str) -> Callable[[AsyncSession], Awaitable[VenueSchema | None]]:
+        async def call(session: AsyncSession) -> VenueSchema | None:
+            query = select(VenueSchema).where(VenueSchema.id.__eq__(id))
+            return await session.scalar(query)
+        return call
+
+    async def get_venue_by_id(self, id: str) -> VenueSchema | None:
+        return await with_no_commit(self.__get_venue_by_id(id))(self.__engines)
+
+    def __get_in_box(self, south: float, west: float, north: float, east: float) -> Callable[[AsyncSession], Awaitable[List[VenueSchema]]]:
+        async def call(session: AsyncSession) -> List[VenueSchema]:
+            query = select(VenueSchema).where(VenueSchema.lat.between(south, north),
+                                              VenueSchema.lon.between(west, east))
+            return list(await session.scalars(query))
+        return call
+
+    async def get_in_box(self, south: float, west: float, north: float, east: float) -> List[VenueSchema]:
+        return await with_no_commit(self.__get_in_box(south, west, north, east))(self.__engines)
+
+    def __get_venues_by_ids(self, ids: List[str]) -> Callable[[AsyncSession], Awaitable[List[VenueSchema]]]:
+        async def call(session: AsyncSession) -> List[VenueSchema]:
+            query = select(VenueSchema).where(VenueSchema.id.in_(ids))
+            return list(await session.scalars(query))
+        return call
+
+    async def get_venues_by_ids(self, ids: List[str]) -> List[VenueSchema]:
+        if not ids:
+            return []
+        return await with_no_commit(self.__get_venues_by_ids(ids))(self.__engines)
+
+    def __get_coordinates(self) -> Callable[[AsyncSession], Awaitable[List[Tuple[str, Optional[float], Optional[float]]]]]:
+        async def call(session: AsyncSession) -> List[Tuple[str, Optional[float], Optional[float]]]:
+            query = select(VenueSchema.id, VenueSchema.lat, VenueSchema.lon).where(VenueSchema.lat.is_not(None))
+            return [(id, lat, lon) for id, lat, lon in await session.execute(query)]
+        return call
+
+    async def get_coordinates(self) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        return await with_no_commit(self.__get_coordinates())(self.__engines)
+
+    def __get_changes(self, since: int, limit: int) -> Callable[[AsyncSession], Awaitable[List[VenueChange]]]:
+        async def call(session: AsyncSession) -> List[VenueChange]:
+            query = select(VenueChangeSchema) \
+                    .where(VenueChangeSchema.version.__gt__(since)) \
+                    .order_by(VenueChangeSchema.version) \
+                    .limit(limit)
+            return [VenueChange(version=change.version, venue_id=change.venue_id, op=change.op)
+                    for change in await session.scalars(query)]
+        return call
+
+    async def get_changes(self, since: int, limit: int) -> List[VenueChange]:
+        return await with_no_commit(self.__get_changes(since, limit), primary=True)(self.__engines)
+
+    def __latest_version(self) -> Callable[[AsyncSession], Awaitable[int]]:
+        async def call(session: AsyncSession) -> int:
+            query = select(VenueVersionSchema.version).where(VenueVersionSchema.id.__eq__(1))
+            return await session.scalar(query) or 0
+        return call
+
+    async def latest_version(self) -> int:
+        return await with_no_commit(self.__latest_version(), primary=True)(self.__engines)
+
+    def __delete_venue(self, id: str) -> Callable[[AsyncSession], Awaitable[None]]:
+        async def call(session: AsyncSession) -> None:
+            query = delete(VenueSchema).where(VenueSchema.id.__eq__(id))
+            result: Any = await session.execute(query)
+            if result.rowcount:
+                await self.__record(session, id, DELETED)
+        return call
+
+    async def delete_venue(self, id: str) -> None:
+        await with_session(self.__delete_venue(id))(self.__engines)
         return
 
 
@@ -112,29 +224,53 @@ class MockBase(VenuesBase):
 
     def __init__(self):
         self.base: List[VenueSchema] = []
+        self.changes: List[VenueChange] = []
 
-    def store_venue(self, venue: VenueSchema) -> None:
+    def __record(self, venue_id: str, op: str) -> None:
+        self.changes.append(VenueChange(version=len(self.changes) + 1, venue_id=venue_id, op=op))
+
+    async def store_venue(self, venue: VenueSchema) -> None:
         for stored in self.base:
             if stored.id == venue.id:
                 raise Exception("Venue already exists")
         self.base.append(venue)
+        self.__record(venue.id, CREATED)
 
 
-    def update_venue(self, venue: VenueSchema) -> None:
+    async def update_venue(self, venue: VenueSchema) -> None:
         for index, stored in enumerate(self.base):
             if stored.id == venue.id:
                 self.base[index] = venue
+                self.__record(venue.id, UPDATED)
                 return
 
 
-    def get_venue_by_id(self, id: str) -> VenueSchema | None:
+    async def get_venue_by_id(self, id: str) -> VenueSchema | None:
         for stored in self.base:
             if stored.id == id:
                 return stored
 
-    def delete_venue(self, id: str) -> None:
+    async def get_in_box(self, south: float, west: float, north: float, east: float) -> List[VenueSchema]:
+        return [stored for stored in self.base
+                if stored.lat is not None and stored.lon is not None
+                and south <= stored.lat <= north and west <= stored.lon <= east]
+
+    async def get_venues_by_ids(self, ids: List[str]) -> List[VenueSchema]:
+        return [stored for stored in self.base if stored.id in ids]
+
+    async def get_coordinates(self) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        return [(stored.id, stored.lat, stored.lon) for stored in self.base if stored.lat is not None]
+
+    async def get_changes(self, since: int, limit: int) -> List[VenueChange]:
+        return [change for change in self.changes if change.version > since][:limit]
+
+    async def latest_version(self) -> int:
+        return len(self.changes)
+
+    async def delete_venue(self, id: str) -> None:
         for index, stored in enumerate(self.base):
             if stored.id == id:
                 self.base.pop(index)
+                self.__record(id, DELETED)
                 return
         return
@@ -1,34 +1,57 @@
 import asyncio
 from typing import List, Tuple
-from src.model.commons.distance import DistanceRanker, LocalPosition
-from src.model.venues.data.base import RelBase, VenuesBase
+import numpy as np
+from src.model.commons.distance import DistanceRanker, LocalPosition, bounding_box
+from src.model.venues.data.base import VenuesBase
+from src.model.venues.data.spatial import GridIndex
 from src.model.venues.venue import Venue
-from src.model.venues.venueQuery import VenueDistance, VenueQuery
+from src.model.venues.venueQuery import VenueDistance
 
-RANKER_LIMIT = 1000
+DEFAULT_RADIUS = 100_000
+DEFAULT_LIMIT = 50
 
 class Ranker:
+    """
+        Ranks the venues at most radius meters away from
+        location. Only the venues inside the bounding box
+        of the radius are read, and only those are measured
+    """
 
-    def __init__(self, database: VenuesBase, location: Tuple[str, str]):
+    def __init__(self, database: VenuesBase, location: Tuple[str, str], radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT):
         self.initial_point = LocalPosition("ranker", location[0], location[1])
         self.database = database
-        self.base_query = VenueQuery(
-            limit=RANKER_LIMIT            
-        )
+        self.radius = radius
+        self.limit = limit
 
     async def rank(self) -> List[VenueDistance]:
         event_loop = asyncio.get_event_loop()
-        first_result = await event_loop.run_in_executor(None, self.base_query.query, self.database)
-        loops = (first_result.total // RANKER_LIMIT)
-        rank = DistanceRanker(self.initial_point)
-        rank.add_batch([value.get_location() for value in first_result.result]) 
-        for i in range(loops):
-            self.base_query.start = (1 + i) * RANKER_LIMIT
-            result = await event_loop.run_in_executor(None, self.base_query.query, self.database)
-            rank.add_batch([value.get_location() for value in result.result])
-        return list(
-                map(lambda x: VenueDistance(venue=Venue.from_schema(x[0]),distance=x[1]), #type: ignore 
-                filter(lambda x: x != None, 
-                       [(self.database.get_venue_by_id(venue.id),distance) for (venue, distance) in await event_loop.run_in_executor(None, rank.sort)])
-                )
-        )
+        candidates = await self.database.get_in_box(*bounding_box(self.initial_point.location, self.radius / 1000))
+        by_id = {venue.id: venue for venue in candidates}
+        rank = DistanceRanker(self.initial_point.location, self.limit)
+        rank.add_batch([venue.id for venue in candidates],
+                       np.array([(venue.lat, venue.lon) for venue in candidates], dtype=np.float64).reshape(-1, 2))
+        ranked = await event_loop.run_in_executor(None, rank.sort) if candidates else []
+        return [VenueDistance(venue=Venue.from_schema(by_id[id]), distance=distance)
+                for (id, distance) in ranked
+                if distance <= self.radius][:self.limit]
+
+
+class IndexRanker:
+    """
+        Ranks the venues around location with the in memory
+        index, the database is only read for the venues returned
+    """
+
+    def __init__(self, database: VenuesBase, index: GridIndex, location: Tuple[str, str], radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT):
+        self.initial_point = LocalPosition("ranker", location[0], location[1])
+        self.database = database
+        self.index = index
+        self.radius = radius
+        self.limit = limit
+
+    async def rank(self) -> List[VenueDistance]:
+        ranked = self.index.nearest(self.initial_point.location, self.limit, self.radius / 1000)
+        by_id = {venue.id: venue for venue in await self.database.get_venues_by_ids([id for id, _ in ranked])}
+        return [VenueDistance(venue=Venue.from_schema(by_id[id]), distance=int(distance * 1000))
+                for id, distance in ranked
+                if id in by_id]
@@ -1,8 +1,9 @@
 from typing import Callable, List, Optional, Tuple
 
 from fastapi import Query
-from sqlalchemy import Select, func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from src.model.commons.cursor import decode, next_cursor
+from src.model.commons.paging import EXACT_TOTAL, NO_TOTAL
 from src.model.venues.data.base import MockBase, RelBase, VenuesBase
 from src.model.venues.data.schema import VenueSchema
 import datetime
@@ -25,12 +26,12 @@ class QueryBuilder:
 
 
 
-    def _get_by_id(self, id: str) -> List[VenueSchema]:
-        value = self.db.get_venue_by_id(id)
+    async def _get_by_id(self, id: str) -> List[VenueSchema]:
+        value = await self.db.get_venue_by_id(id)
         return [value] if value else []
 
 
-    def get(self,
+    async def get(self,
             id: Optional[str],
             name: Optional[str],
             location: Optional[str],
@@ -44,51 +45,60 @@ class QueryBuilder:
             reservationLeadTime: Optional[int],
             menu: Optional[str],
             limit: int,
-            start: int) -> Tuple[List[VenueSchema], int]:
+            start: int,
+            total: str = EXACT_TOTAL,
+            cursor: Optional[str] = None) -> Tuple[List[VenueSchema], Optional[int], Optional[str]]:
 
         raise Exception("Interface method should not be called")
 
 class RelBuilder(QueryBuilder):
 
-    def __get_total(self) -> Select:
-        return select(func.count()).select_from(VenueSchema)
+    def __get_query(self) -> Select:
+        return select(VenueSchema).order_by(VenueSchema.id)
 
-    def __get_query(self, limit: int, start: int) -> Select:
-        return select(VenueSchema).order_by(VenueSchema.id).limit(limit).offset(start)
-
-    def __add_name_filter(self, name: Optional[str], query: Select, count: Select) -> Tuple[Select, Select]:
+    def __add_name_filter(self, name: Optional[str], query: Select) -> Select:
         if name: 
             query = query.where(VenueSchema.name.__eq__(name))
-            count = count.where(VenueSchema.name.__eq__(name))
-        return query, count
+        return query
     
-    def __add_characteristic_filter(self, characteristic: Optional[List[str]], query: Select, count: Select) -> Tuple[Select, Select]:
+    def __add_characteristic_filter(self, characteristic: Optional[List[str]], query: Select) -> Select:
         if characteristic: 
             query = query.where(VenueSchema.characteristics.contains(characteristic))
-            count = count.where(VenueSchema.characteristics.contains(characteristic))
-        return query, count
+        return query
     
-    def __add_feature_filter(self, feature: Optional[List[str]], query: Select, count: Select) -> Tuple[Select, Select]:
+    def __add_feature_filter(self, feature: Optional[List[str]], query: Select) -> Select:
         if feature: 
             query = query.where(VenueSchema.features.contains(feature))
-            count = count.where(VenueSchema.features.contains(feature))
-        return query, count
-
-    def get(self, id: Optional[str], name: Optional[str], location: Optional[str], capacity: Optional[int], logo: Optional[str], pictures: Optional[List[str]], slots: Optional[List[datetime.datetime]], characteristic: Optional[List[str]], feature: Optional[List[str]], vacations: Optional[List[datetime.datetime]], reservationLeadTime: Optional[int], menu: Optional[str],limit: int, start: int) -> Tuple[List[VenueSchema],int]:
+        return query
+
+    def __add_cursor_filter(self, cursor: Optional[str], query: Select) -> Select:
+        if cursor:
+            [id] = decode(cursor, str)
+            query = query.where(VenueSchema.id.__gt__(id))
+        return query
+
+    async def get(self, id: Optional[str], name: Optional[str], location: Optional[str], capacity: Optional[int], logo: Optional[str], pictures: Optional[List[str]], slots: Optional[List[datetime.datetime]], characteristic: Optional[List[str]], feature: Optional[List[str]], vacations: Optional[List[datetime.datetime]], reservationLeadTime: Optional[int], menu: Optional[str],limit: int, start: int, total: str = EXACT_TOTAL, cursor: Optional[str] = None) -> Tuple[List[VenueSchema], Optional[int], Optional[str]]:
+        """
+            With a cursor the page starts right after the venue
+            it points to and start is ignored, the total is only
+            reported for offset pages
+        """
         if capacity != None or location != None or logo != None or pictures != None or slots != None  or vacations != None or reservationLeadTime != None or menu != None:
             raise Exception("Capacity, location, logo, pictures, menu and slots query not implemented")
         if id:
-            result = self._get_by_id(id)
-            return result, 1 if result else 0
-
-        query = self.__get_query(limit, start)
-        count = self.__get_total()
+            result = await self._get_by_id(id)
+            return result, 1 if result else 0, None
 
-        query, count = self.__add_name_filter(name, query, count)
-        query, count = self.__add_characteristic_filter(characteristic, query, count)  
-        query, count = self.__add_feature_filter(feature, query, count) 
+        query = self.__get_query()
+        query = self.__add_name_filter(name, query)
+        query = self.__add_characteristic_filter(characteristic, query)
+        query = self.__add_feature_filter(feature, query)
+        if cursor:
+            query = self.__add_cursor_filter(cursor, query)
+            start, total = 0, NO_TOTAL
 
-        return self.db.get_by_eq(query, count)     
+        result, count = await self.db.get_page(query, limit, start, total)
+        return result, count, next_cursor(result, limit, lambda venue: (venue.id,))
 
 class MockedBuilder(QueryBuilder):
 
@@ -118,17 +128,19 @@ class MockedBuilder(QueryBuilder):
             return any([c in value.features for c in feature])
         return filter
 
-    def get(self, id: Optional[str], name: Optional[str], location: Optional[str], capacity: Optional[int] , logo: Optional[str], pictures: Optional[List[str]], slots: Optional[List[datetime.datetime]], characteristic: Optional[List[str]], feature: Optional[List[str]], vacations: Optional[List[datetime.datetime]], reservationLeadTime: Optional[int], menu: Optional[str], limit: int, start: int) -> Tuple[List[VenueSchema], int]:
+    async def get(self, id: Optional[str], name: Optional[str], location: Optional[str], capacity: Optional[int] , logo: Optional[str], pictures: Optional[List[str]], slots: Optional[List[datetime.datetime]], characteristic: Optional[List[str]], feature: Optional[List[str]], vacations: Optional[List[datetime.datetime]], reservationLeadTime: Optional[int], menu: Optional[str], limit: int, start: int, total: str = EXACT_TOTAL, cursor: Optional[str] = None) -> Tuple[List[VenueSchema], Optional[int], Optional[str]]:
         if capacity != None or location != None or logo != None or pictures != None or slots != None or  vacations != None or reservationLeadTime != None or menu != None:
             raise Exception("Capacity, location, logo, pictures, menu and slots query not implemented")
+        if cursor != None:
+            raise Exception("Cursor query not implemented")
 
         if id:
-            result = self._get_by_id(id)
-            return result, 1 if result else 0
+            result = await self._get_by_id(id)
+            return result, 1 if result else 0, None
 
         result = self.__filter_by_eq(name, characteristic, feature, limit, start)
 
-        return result, len(result) 
+        return result, len(result) if total != NO_TOTAL else None, None
 
 
 
@@ -1,10 +1,11 @@
-from typing import Self
+from typing import Optional, Self, Tuple
+import math
 import uuid
 from typing import List
 import sqlalchemy
-from sqlalchemy.orm import DeclarativeBase, mapped_column
+from sqlalchemy.orm import DeclarativeBase, mapped_column, validates
 from sqlalchemy.orm import Mapped
-from sqlalchemy import String, DateTime
+from sqlalchemy import Index, String, DateTime
 from sqlalchemy.dialects.postgresql import ARRAY
 import datetime
 import os
@@ -33,6 +34,19 @@ def validate_features(features: List[str]):
         if feature not in FIXED_FEATURES:
             raise ValueError(f"Invalid feature: {feature}")
     return features
+
+def parse_location(location: str) -> Tuple[Optional[float], Optional[float]]:
+    """
+        Coordinates of a "lat,lon" location, (None, None)
+        when it does not hold valid ones
+    """
+    try:
+        lat, lon = (float(value) for value in location.split(","))
+    except (AttributeError, ValueError):
+        return None, None
+    if not (math.isfinite(lat) and math.isfinite(lon)) or abs(lat) > 90 or abs(lon) > 180:
+        return None, None
+    return lat, lon
         
 class VenuesBase(DeclarativeBase):
     pass
@@ -40,6 +54,9 @@ class VenuesBase(DeclarativeBase):
 
 class VenueSchema(VenuesBase):
     __tablename__ = "venues"
+    __table_args__ = (
+        Index("ix_venues_lat_lon", "lat", "lon"),
+    )
 
     id: Mapped[str] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column()
@@ -54,8 +71,17 @@ class VenueSchema(VenuesBase):
     reservationLeadTime: Mapped[int] = mapped_column()
     menu: Mapped[str] = mapped_column()
     status: Mapped[str] = mapped_column()
+    lat: Mapped[Optional[float]] = mapped_column(nullable=True)
+    lon: Mapped[Optional[float]] = mapped_column(nullable=True)
 
-
+    @validates("location")
+    def __locate(self, key: str, location: str) -> str:
+        """
+            Keeps the coordinates columns in line with
+            the location they come from
+        """
+        self.lat, self.lon = parse_location(location)
+        return location
 
     def __repr__(self) -> str:
         return (f"Venue(id={self.id}, name={self.name}, location={self.location}, "
@@ -71,3 +97,23 @@ class VenueSchema(VenuesBase):
         uid = uuid.uuid1()
         uid_string=uid.__str__()
         return cls(id=uid_string, name=name, location=location, capacity=capacity, status=status, logo=logo, pictures=pictures, slots=slots, characteristics=characteristics, features=features, vacations=vacations, reservationLeadTime=reservationLeadTime, menu=menu )
+
+
+class VenueChangeSchema(VenuesBase):
+    __tablename__ = "venue_changes"
+
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    venue_id: Mapped[str] = mapped_column()
+    op: Mapped[str] = mapped_column()
+    at: Mapped[datetime.datetime] = mapped_column(DateTime)
+
+
+class VenueVersionSchema(VenuesBase):
+    """
+        Single row counter of the change log, writers take
+        its lock so versions commit in the order they are given
+    """
+    __tablename__ = "venue_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column()
@@ -0,0 +1,150 @@
+"""
+Spatial keeps the coordinates of the venues in memory, on a
+grid of fixed size cells, so the venues near a point can be
+found without reading the database
+"""
+import asyncio
+import heapq
+import logging
+import math
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import haversine as hs
+from src.model.commons.distance import EARTH_RADIUS, bounding_box
+from src.model.commons.logger import Logger
+
+Cell = Tuple[int, int]
+
+CELL_DEGREES = 0.01
+
+class GridIndex:
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.points: Dict[str, Tuple[float, float]] = {}
+        self.cells: Dict[Cell, Set[str]] = {}
+
+    def __cell(self, lat: float, lon: float) -> Cell:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def add(self, id: str, lat: Optional[float], lon: Optional[float]) -> None:
+        """
+            Adds the venue, or moves it if it was already
+            indexed. Venues without coordinates are dropped
+        """
+        self.remove(id)
+        if lat is None or lon is None:
+            return
+        self.points[id] = (lat, lon)
+        self.cells.setdefault(self.__cell(lat, lon), set()).add(id)
+
+    def remove(self, id: str) -> None:
+        point = self.points.pop(id, None)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        members = self.cells[cell]
+        members.discard(id)
+        if not members:
+            del self.cells[cell]
+
+    def replace(self, points: Iterable[Tuple[str, Optional[float], Optional[float]]]) -> None:
+        self.points.clear()
+        self.cells.clear()
+        for id, lat, lon in points:
+            self.add(id, lat, lon)
+
+    def __candidates(self, center: Tuple[float, float], radius: float) -> Iterable[str]:
+        south, west, north, east = bounding_box(center, radius)
+        (low_lat, low_lon), (high_lat, high_lon) = self.__cell(south, west), self.__cell(north, east)
+        covered = (high_lat - low_lat + 1) * (high_lon - low_lon + 1)
+        if covered > len(self.cells):
+            cells = [cell for cell in self.cells
+                     if low_lat <= cell[0] <= high_lat and low_lon <= cell[1] <= high_lon]
+        else:
+            cells = [(i, j) for i in range(low_lat, high_lat + 1) for j in range(low_lon, high_lon + 1)]
+        for cell in cells:
+            yield from self.cells.get(cell, ())
+
+    def __measure(self, center: Tuple[float, float], radius: float) -> List[Tuple[str, float]]:
+        south, west, north, east = bounding_box(center, radius)
+        found = []
+        for id in self.__candidates(center, radius):
+            lat, lon = point = self.points[id]
+            if not (south <= lat <= north and west <= lon <= east):
+                continue
+            distance = hs.haversine(center, point)
+            if distance <= radius:
+                found.append((id, distance))
+        return found
+
+    def within(self, center: Tuple[float, float], radius: float) -> List[Tuple[str, float]]:
+        """
+            Venues at most radius km away from center, closest
+            first, with their distance in km
+        """
+        return sorted(self.__measure(center, radius), key=lambda value: value[1])
+
+    def __first_reach(self, center: Tuple[float, float], limit: int) -> float:
+        """
+            Radius that should hold limit venues, going by
+            how crowded the cell of center is
+        """
+        side = self.cell_degrees * math.pi * EARTH_RADIUS / 180
+        crowd = len(self.cells.get(self.__cell(*center), ()))
+        if crowd == 0:
+            return side
+        area = side * side * max(math.cos(math.radians(center[0])), 0.01)
+        return max(math.sqrt(limit * area / (math.pi * crowd)), side / 100)
+
+    def nearest(self, center: Tuple[float, float], limit: int, radius: float = math.pi * EARTH_RADIUS) -> List[Tuple[str, float]]:
+        """
+            The limit venues closest to center, at most radius km
+            away. The search starts around center and doubles its
+            reach until it holds enough venues
+        """
+        reach = min(self.__first_reach(center, limit), radius)
+        while True:
+            found = self.__measure(center, reach)
+            if len(found) >= limit or reach >= radius:
+                return heapq.nsmallest(limit, found, key=lambda value: value[1])
+            reach = min(reach * 2, radius)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
+class IndexRefresher:
+    """
+        Rebuilds the index from the database every interval
+        seconds, so changes made by other instances of the
+        service show up
+    """
+
+    def __init__(self, refresh: Callable[[], Awaitable[int]], interval: float):
+        self.refresh = refresh
+        self.interval = interval
+        self.__task: asyncio.Task | None = None
+
+    async def __run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"Spatial index refresh failed: {e}")
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.__task is not None:
+            return
+        Logger.info(f"Refreshing the spatial index every {self.interval}s")
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
@@ -0,0 +1,101 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.model.commons.cache import LRUCache
+from src.model.commons.logger import Logger
+from src.model.venues.changes import VenueChanges
+
+FeedReader = Callable[[Optional[int], float], Awaitable[VenueChanges]]
+
+class VenueReplica:
+    """
+        Local copy of the venues looked up by id, kept coherent
+        by tailing the change feed of the venues service. While
+        the feed cannot be followed every lookup goes to the service
+    """
+
+    def __init__(self, feed: FeedReader, size: int, wait: float = 5, retry: float = 1):
+        self.feed = feed
+        self.wait = wait
+        self.retry = retry
+        self.cache: LRUCache[Any] = LRUCache(size)
+        self.version: Optional[int] = None
+        self.__generation = 0
+        self.__loading = 0
+        self.__changed: Dict[str, int] = {}
+        self.__task: asyncio.Task | None = None
+
+    def __reset(self) -> None:
+        self.version = None
+        self.cache.clear()
+        self.__generation += 1
+
+    def apply(self, feed: VenueChanges) -> None:
+        if self.version is not None and feed.version < self.version:
+            Logger.info(f"Venues change feed went back to {feed.version}, dropping the replica")
+            self.__reset()
+        for change in feed.changes:
+            self.cache.pop(change.venue_id)
+            if self.__loading:
+                self.__changed[change.venue_id] = change.version
+        self.version = feed.version
+
+    def forget(self, venue_id: str) -> None:
+        self.cache.pop(venue_id)
+
+    async def get(self, venue_id: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+            The cached lookup of venue_id, or the one load returns.
+            A loaded venue is only kept when no change to it was
+            seen while it was being loaded. Callers get their own
+            copy, changing it does not change the cached one
+        """
+        if self.version is None:
+            return await load()
+        cached = self.cache.get(venue_id)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        seen, generation = self.version, self.__generation
+        self.__loading += 1
+        try:
+            result = await load()
+        finally:
+            self.__loading -= 1
+        changed = self.__changed.get(venue_id, seen)
+        if not self.__loading:
+            self.__changed.clear()
+        total = result.get("total") if isinstance(result, dict) else getattr(result, "total", None)
+        if generation == self.__generation and changed <= seen and total:
+            self.cache.put(venue_id, copy.deepcopy(result))
+        return result
+
+    async def __tail(self) -> None:
+        while True:
+            try:
+                if self.version is None:
+                    self.apply(await self.feed(None, 0))
+                    Logger.info(f"Following venue changes from version {self.version}")
+                    continue
+                self.apply(await self.feed(self.version, self.wait))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                Logger.error(f"Venues change feed unavailable: {e}")
+                self.__reset()
+                await asyncio.sleep(self.retry)
+
+    def start(self) -> None:
+        if self.__task is not None:
+            return
+        self.__task = asyncio.create_task(self.__tail())
+
+    async def stop(self) -> None:
+        if self.__task is None:
+            return
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+        self.__task = None
+        self.__reset()
@@ -1,18 +1,30 @@
-from typing import List, Tuple
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import Response, status
 
 from src.model.commons.error import Error
+from src.model.commons.breaker import ResiliencePolicy, configure_target
+from src.model.commons.hedge import HedgePolicy, configure_hedging
 from src.model.commons.caller import delete, get, post, put, recover_json_data
+from src.model.commons.cache import LRUCache
+from src.model.commons import codec
 from src.model.commons.logger import Logger
+from src.model.commons.session import primary_reads
+from src.model.venues.changes import VenueChanges
 from src.model.venues.data.base import VenuesBase
-from src.model.venues.data.location_finder import Ranker
+from src.model.venues.data.location_finder import DEFAULT_LIMIT, DEFAULT_RADIUS, IndexRanker, Ranker
 from src.model.venues.data.schema import VenueSchema
+from src.model.venues.data.spatial import GridIndex
+from src.model.venues.replica import VenueReplica
 from src.model.venues.venue import CreateInfo, Venue
 
 from src.model.venues.update import Update
 from src.model.venues.venueQuery import VenueDistanceQueryResult, VenueQuery, VenueQueryResult
 
 
+CHANGES_LIMIT = 500
+CHANGES_POLL = 1.0
+
 class VenuesProvider:
 
     async def create_venue(self, venue: CreateInfo) -> Venue:
@@ -27,7 +39,10 @@ class VenuesProvider:
     async def delete_venue(self, venue_id: str) -> None:
         raise Exception("Interface method should not be called")
 
-    async def get_venues_near_to(self, location: Tuple[str, str]) -> VenueDistanceQueryResult:
+    async def get_venues_near_to(self, location: Tuple[str, str], radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT) -> VenueDistanceQueryResult:
+        raise Exception("Interface method should not be called")
+
+    async def get_changes(self, since: Optional[int], wait: float = 0) -> VenueChanges:
         raise Exception("Interface method should not be called")
 
 class VenuesService:
@@ -65,22 +80,55 @@ class VenuesService:
         finally:
             return
 
-    async def get_venues_near_to(self, location: Tuple[str, str], response: Response) -> VenueDistanceQueryResult | Error:
+    async def get_venues_near_to(self, location: Tuple[str, str], response: Response, radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT) -> VenueDistanceQueryResult | Error:
+        try:
+            return await self.provider.get_venues_near_to(location, radius, limit)
+        except Exception as e:
+            response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            return Error.from_exception(e)
+
+    async def get_changes(self, since: Optional[int], wait: float, response: Response) -> VenueChanges | Error:
         try:
-            return await self.provider.get_venues_near_to(location)
+            return await self.provider.get_changes(since, wait)
         except Exception as e:
             response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
             return Error.from_exception(e)
 
 class HttpVenuesProvider(VenuesProvider):
-    def __init__(self, service_url: str):
+    def __init__(self, service_url: str, policy: ResiliencePolicy | None = None, hedging: HedgePolicy | None = None, cache_size: int = 256, replica_size: int = 0):
         self.url = service_url
+        self.validators: LRUCache[Tuple[str, bytes]] = LRUCache(cache_size)
+        self.replica = VenueReplica(self.get_changes, replica_size) if replica_size > 0 else None
+        configure_target(service_url, policy)
+        configure_hedging(service_url, hedging)
+
+    def start(self) -> None:
+        if self.replica is not None:
+            self.replica.start()
+
+    async def stop(self) -> None:
+        if self.replica is not None:
+            await self.replica.stop()
+
+    async def __conditional_get(self, endpoint: str, params: Dict[str, Any], hedge: bool = False) -> Any:
+        """
+            Revalidates the cached body for this request, a 304
+            answer reuses it instead of transferring it again
+        """
+        key = (endpoint, tuple(codec.encode_params(params)))
+        cached = self.validators.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = await get(f"{self.url}{endpoint}", data=headers, params=params, hedge=hedge)
+        if response.status == status.HTTP_304_NOT_MODIFIED and cached:
+            return codec.loads(cached[1])
+        etag = response.headers.get("ETag")
+        if etag and response.status == status.HTTP_200_OK:
+            self.validators.put(key, (etag, response.body))
+        return await recover_json_data(response)
 
     async def create_venue(self, venue: CreateInfo) -> Venue:
         endpoint = "/venues"
         model = venue.model_dump()
-        model['slots'] = [slot.__str__() for slot in model['slots']]
-        model['vacations'] = [vacation.__str__() for vacation in model['vacations']]
         response = await post(f"{self.url}{endpoint}", body=model)
         return await recover_json_data(response) 
         
@@ -88,68 +136,162 @@ class HttpVenuesProvider(VenuesProvider):
     async def update_venue(self, venue_id: str, venue_update: Update) -> Venue:
         endpoint = "/venues"
         model = venue_update.model_dump()
-        if model.get('slots'):
-            model['slots'] = [slot.__str__() for slot in model['slots']]
-        if model.get('vacations'):
-            model['vacations'] = [vacation.__str__() for vacation in model['vacations']]
         response = await put(f"{self.url}{endpoint}/{venue_id}", body=model)
+        if self.replica is not None:
+            self.replica.forget(venue_id)
         return await recover_json_data(response) 
         
 
     async def get_venues(self, query: VenueQuery) -> VenueQueryResult:
         endpoint = "/venues"
-        response = await get(f"{self.url}{endpoint}", params=query.model_dump(exclude_none=True))
-        return await recover_json_data(response)
+        venue_id = query.lookup_id()
+        if self.replica is None or venue_id is None:
+            return await self.__conditional_get(endpoint, query.model_dump(exclude_none=True), hedge=True)
+        fresh = query.model_copy(update={"cached": False})
+        return await self.replica.get(venue_id,
+                                      lambda: self.__conditional_get(endpoint, fresh.model_dump(exclude_none=True), hedge=True))
     
     async def delete_venue(self, venue_id: str) -> None:
         endpoint = "/venues"
         await delete(f"{self.url}{endpoint}/{venue_id}")
+        if self.replica is not None:
+            self.replica.forget(venue_id)
         return  
         
-    async def get_venues_near_to(self, location: Tuple[str, str]) -> VenueDistanceQueryResult:
+    async def get_venues_near_to(self, location: Tuple[str, str], radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT) -> VenueDistanceQueryResult:
         endpoint = "/venues/near"
-        response = await get(f"{self.url}{endpoint}", params={'location': location})
-        return await recover_json_data(response)
+        return await self.__conditional_get(endpoint, {'location': location, 'radius': radius, 'limit': limit})
+
+    async def get_changes(self, since: Optional[int], wait: float = 0) -> VenueChanges:
+        endpoint = "/venues/changes"
+        params: Dict[str, Any] = {'wait': wait} if since is None else {'since': since, 'wait': wait}
+        response = await get(f"{self.url}{endpoint}", params=params)
+        if response.status != status.HTTP_200_OK:
+            raise Exception(f"Venue changes answered {response.status}")
+        return VenueChanges(**await recover_json_data(response))
 
 class LocalVenuesProvider(VenuesProvider):
-    def __init__(self, base: VenuesBase):
+    def __init__(self, base: VenuesBase, index: Optional[GridIndex] = None, cache: Optional[LRUCache[Venue]] = None):
         self.db = base
+        self.index = index
+        self.cache = cache
+        self.__generation = 0
+        self.__changed = asyncio.Event()
+
+    def __notify(self) -> None:
+        self.__changed.set()
+        self.__changed = asyncio.Event()
+
+    async def refresh_index(self) -> int:
+        """
+            Rebuilds the spatial index from the database,
+            returns how many venues it holds
+        """
+        if self.index is None:
+            return 0
+        self.index.replace(await self.db.get_coordinates())
+        Logger.info(f"Spatial index holds {len(self.index)} venues")
+        return len(self.index)
 
     async def create_venue(self, venue: CreateInfo) -> Venue:
         Logger.info(f"Recieved request to create new venue ==> {venue}")
         persistance = venue.into_venue().persistance()
         Logger.info(f"Created id for new venue ==> {persistance.id}")
         response=Venue.from_schema(persistance)
-        self.db.store_venue(persistance)
+        await self.db.store_venue(persistance)
+        if self.index is not None:
+            self.index.add(persistance.id, persistance.lat, persistance.lon)
+        self.__notify()
         Logger.info(f"New venue ==> {response.id} created")
         return response
 
     async def update_venue(self, venue_id: str, venue_update: Update) -> Venue:
         Logger.info(f"Recieved request to update venue ==> {venue_id} with data {venue_update}")
-        schema = self.db.get_venue_by_id(venue_id)
+        with primary_reads():
+            schema = await self.db.get_venue_by_id(venue_id)
         if schema:
             Logger.info("Found venue in database")
             venue = Venue.from_schema(schema)
             venue = venue_update.modify(venue)
-            self.db.update_venue(venue.persistance())
+            persistance = venue.persistance()
+            await self.db.update_venue(persistance)
+            self.__forget(venue_id)
+            if self.index is not None:
+                self.index.add(persistance.id, persistance.lat, persistance.lon)
+            self.__notify()
             Logger.info(f"Updated venue ==> {venue_id}")
             return venue
         raise Exception("Venue does not exist")
 
+    def __forget(self, venue_id: str) -> None:
+        self.__generation += 1
+        if self.cache is not None:
+            self.cache.pop(venue_id)
+
     async def get_venues(self, query: VenueQuery) -> VenueQueryResult:
         Logger.info(f"Looking for venues with query ==> {query}")
-        return query.query(self.db)
+        venue_id = query.lookup_id()
+        if not query.cached:
+            with primary_reads():
+                return await query.query(self.db)
+        if self.cache is None or venue_id is None:
+            return await query.query(self.db)
+        cached = self.cache.get(venue_id)
+        if cached is not None:
+            return VenueQueryResult(result=[cached], total=1)
+        return await self.__refill(venue_id, query)
+
+    async def __refill(self, venue_id: str, query: VenueQuery) -> VenueQueryResult:
+        """
+            Loads a missed venue from the primary, a lagging replica
+            could still hold the version a write just replaced. It is
+            only cached when nothing was forgotten while loading it
+        """
+        generation = self.__generation
+        with primary_reads():
+            result = await query.query(self.db)
+        if result.result and generation == self.__generation and self.cache is not None:
+            self.cache.put(venue_id, result.result[0])
+        return result
     
     async def delete_venue(self, venue_id: str) -> None:
         Logger.info(f"Recieved request to delete venue ==> {venue_id}")
-        Venue.delete(venue_id, self.db)
+        await Venue.delete(venue_id, self.db)
+        self.__forget(venue_id)
+        if self.index is not None:
+            self.index.remove(venue_id)
+        self.__notify()
 
-    async def get_venues_near_to(self, location: Tuple[str, str]) -> VenueDistanceQueryResult:
-        Logger.info(f"Ranking venue around: ({location[0]},{location[1]})")
-        ranker = Ranker(self.db, location)
+    async def get_venues_near_to(self, location: Tuple[str, str], radius: int = DEFAULT_RADIUS, limit: int = DEFAULT_LIMIT) -> VenueDistanceQueryResult:
+        Logger.info(f"Ranking venue around: ({location[0]},{location[1]}) up to {radius}m")
+        ranker = IndexRanker(self.db, self.index, location, radius, limit) if self.index is not None \
+                else Ranker(self.db, location, radius, limit)
         result = await ranker.rank()
         Logger.info("Ranked venues around that location")
         return VenueDistanceQueryResult(
             result=result,
             total=len(result)
         ) 
+
+    async def get_changes(self, since: Optional[int], wait: float = 0) -> VenueChanges:
+        """
+            Changes after since, waiting up to wait seconds for one
+            when there are none yet. Writes made by this instance
+            wake the wait up, the rest are seen by polling the log
+        """
+        if since is None:
+            return VenueChanges(changes=[], version=await self.db.latest_version())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            changes = await self.db.get_changes(since, CHANGES_LIMIT)
+            if changes:
+                return VenueChanges(changes=changes, version=changes[-1].version)
+            latest = await self.db.latest_version()
+            remaining = deadline - loop.time()
+            if latest < since or remaining <= 0:
+                return VenueChanges(changes=[], version=latest)
+            try:
+                await asyncio.wait_for(self.__changed.wait(), min(remaining, CHANGES_POLL))
+            except asyncio.TimeoutError:
+                pass
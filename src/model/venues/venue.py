@@ -198,8 +198,8 @@ class Venue(BaseModel):
                     )
 
     @staticmethod
-    def delete(id: str, database: VenuesBase) -> None:
-        return database.delete_venue(id)
+    async def delete(id: str, database: VenuesBase) -> None:
+        return await database.delete_venue(id)
     
     @classmethod
     def from_schema(cls, schema: VenueSchema) -> Self:
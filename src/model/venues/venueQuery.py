@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from src.model.commons.paging import total_mode
 from src.model.venues.data.base import VenuesBase
 from src.model.venues.data.query import get_builder
 from src.model.venues.venue import Venue
@@ -16,7 +17,8 @@ class VenueDistanceQueryResult(BaseModel):
 
 class VenueQueryResult(BaseModel):
     result: List[Venue]
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class VenueQuery(BaseModel):
@@ -35,11 +37,26 @@ class VenueQuery(BaseModel):
     vacations: Optional[List[datetime.datetime]] = None
     reservationLeadTime: Optional[int] = None
     menu: Optional[str] = None
+    include_total: bool = True
+    estimate_total: bool = False
+    cursor: Optional[str] = None
+    cached: bool = True
    
 
-    def query(self, db: VenuesBase) -> VenueQueryResult:
+    def lookup_id(self) -> Optional[str]:
+        """
+            The id when the query only looks a venue up by it,
+            the rest of the filters are ignored for those
+        """
+        unsupported = [self.location, self.capacity, self.logo, self.pictures, self.slots,
+                       self.vacations, self.reservationLeadTime, self.menu]
+        if not self.id or any(value is not None for value in unsupported):
+            return None
+        return self.id
+
+    async def query(self, db: VenuesBase) -> VenueQueryResult:
         builder = get_builder(db) 
-        result, total = builder.get(self.id, self.name, self.location, self.capacity, self.logo, self.pictures, self.slots, self.characteristics, self.features, self.vacations, self.reservationLeadTime, self.menu, self.limit, self.start)
+        result, total, next_cursor = await builder.get(self.id, self.name, self.location, self.capacity, self.logo, self.pictures, self.slots, self.characteristics, self.features, self.vacations, self.reservationLeadTime, self.menu, self.limit, self.start, total_mode(self.include_total, self.estimate_total), self.cursor)
 
         result = [Venue.from_schema(value) for value in result]
-        return VenueQueryResult(result=result, total=total)
+        return VenueQueryResult(result=result, total=total, next_cursor=next_cursor)
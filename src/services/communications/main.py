@@ -1,6 +1,11 @@
+from contextlib import asynccontextmanager
 from typing import Annotated
 from fastapi import Body, FastAPI, status
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.session import PoolSettings
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 
 from src.model.commons.error import Error
 from src.model.communications.comms.messager import MockedCommunicationsMessager, TwilioCommunicationsMessager
@@ -10,7 +15,7 @@ from src.model.communications.service import CommunicationService, LocalCommunic
 from src.model.communications.user import User
 
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, PoolSettings, TracingSettings):
     db_string: str
     dev: bool = False
     twilio_sid: str = ""
@@ -18,11 +23,20 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-app = FastAPI()
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    await database.warm_up(settings.db_pool_warmup)
+    yield
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="communications", exporter=exporter_from(settings))
+instrument(app, "communications")
 comms = MockedCommunicationsMessager()
 if not settings.dev: 
     comms = TwilioCommunicationsMessager(settings.twilio_sid, settings.twilio_token)
-database = RelCommunicationsBase(settings.db_string) 
+database = RelCommunicationsBase(settings.db_string, settings) 
 service = CommunicationService(
     LocalCommunicationProvider(
         database,
@@ -1,8 +1,12 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
 from re import S
 from typing import Annotated, List, Optional, Tuple
 from fastapi import Body, Depends, FastAPI, Header, Path, Query, Response, status
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 from src.model.commons.error import Error
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -16,6 +20,7 @@ from src.model.summarizer.summary import Summary
 from src.model.users.update import UserUpdate
 from src.model.venues.venue import Venue
 from src.model.venues.venueQuery import VenueDistanceQueryResult, VenueQuery, VenueQueryResult
+from src.model.venues.data.location_finder import DEFAULT_LIMIT, DEFAULT_RADIUS
 from src.model.venues.service import HttpVenuesProvider, VenuesService
 
 from src.model.reservations.reservation import Reservation
@@ -30,19 +35,29 @@ from src.model.venues.update import Update as VUpdate
 import src.model.gateway.venues_stubs as v_stubs
 import src.model.gateway.users_stubs as u_stubs
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, TracingSettings):
     proto: str = "http://"
     users: str = "users"
     venues: str = "venues"
     reservations: str = "reservations"
     points: str = "points"
     auth_url: str = "/users/permissions"
-    auth_avoided_urls: list[str] = ["/users"]
+    auth_avoided_urls: list[str] = ["/users", "/metrics"]
     information_prefix: str = "/users"
     dev: bool = True
+    venues_replica_size: int = 0
 
 settings = Settings()
-app = FastAPI()
+
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    venues.start()
+    yield
+    await venues.stop()
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
 
 app.add_middleware(CORSMiddleware,
                    allow_origins=["*"],
@@ -55,9 +70,12 @@ app.add_middleware(AuthMiddleware,
                    avoided_urls=settings.auth_avoided_urls,
                    dev_mode=settings.dev)
 
+app.add_middleware(TracingMiddleware, service="gateway", exporter=exporter_from(settings))
+instrument(app, "gateway")
+
 security = HTTPBearer()
 users = HttpUsersProvider(f"{settings.proto}{settings.users}")
-venues = HttpVenuesProvider(f"{settings.proto}{settings.venues}")
+venues = HttpVenuesProvider(f"{settings.proto}{settings.venues}", replica_size=settings.venues_replica_size)
 reservations = HttpReservationsProvider(f"{settings.proto}{settings.reservations}")
 points = HttpPointsProvider(f"{settings.proto}{settings.points}")
 service = GatewayService(users, ReservationsService(reservations),VenuesService(venues), points)
@@ -120,7 +138,10 @@ async def get_venues(response: Response,
                            reservationLeadTime: int = Query(default=None),
                            menu: str = Query(default=None),
                            limit: int = Query(default=10),
-                           start: int = Query(default=0)
+                           start: int = Query(default=0),
+                           include_total: bool = Query(default=True),
+                           estimate_total: bool = Query(default=False),
+                           cursor: str = Query(default=None)
                            ) -> VenueQueryResult | Error:
     query = VenueQuery(
             id=id,
@@ -136,7 +157,10 @@ async def get_venues(response: Response,
             reservationLeadTime=reservationLeadTime,
             menu=menu,
             limit=limit,
-            start=start
+            start=start,
+            include_total=include_total,
+            estimate_total=estimate_total,
+            cursor=cursor
             )
     return await service.get_venues(query, response)
 
@@ -144,8 +168,10 @@ async def get_venues(response: Response,
 async def get_venues_near_to(response: Response,
                              credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
                              location: Tuple[str, str] = Query(default=("-34.594174","-58.4566507")),
+                             radius: int = Query(default=DEFAULT_RADIUS, gt=0),
+                             limit: int = Query(default=DEFAULT_LIMIT, gt=0)
                              ) -> VenueDistanceQueryResult | Error:
-    return await service.get_venues_near_to(location, response)
+    return await service.get_venues_near_to(location, response, radius, limit)
 
 @app.post("/reservations", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
 async def create_reservation(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -153,7 +179,7 @@ async def create_reservation(credentials: Annotated[HTTPAuthorizationCredentials
                              response: Response) -> Reservation | Error:
     result = await service.create_reservation(credentials, reservation, response)
     return result
-@app.put("/reservations/{reservation_id}", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
+@app.put("/reservations/{reservation_id}", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}, status.HTTP_409_CONFLICT: {"model": Error}})
 async def update_reservations(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
                               reservation: Annotated[Update, Body()],
                               reservation_id: Annotated[str, Path()],
@@ -178,7 +204,11 @@ async def get_reservations(credentials: Annotated[HTTPAuthorizationCredentials,
                            from_people: Optional[int] = Query(default=None),
                            to_people: Optional[int] = Query(default=None),
                            limit: int = Query(default=10),
-                           start: int = Query(default=0)
+                           start: int = Query(default=0),
+                           include_total: bool = Query(default=True),
+                           estimate_total: bool = Query(default=False),
+                           cursor: Optional[str] = Query(default=None),
+                           fields: Optional[List[str]] = Query(default=None)
                            ) -> ReservationQueryResponse | Error:
     query = ReservationQuery(
             id=id,
@@ -188,7 +218,11 @@ async def get_reservations(credentials: Annotated[HTTPAuthorizationCredentials,
             to_time=to_time,
             people=(from_people, to_people) if from_people != None and to_people != None else None,
             limit=limit,
-            start=start
+            start=start,
+            include_total=include_total,
+            estimate_total=estimate_total,
+            cursor=cursor,
+            fields=fields
             )
     return await service.get_reservations(credentials, query, response)
 
@@ -199,8 +233,12 @@ async def get_history(credentials: Annotated[HTTPAuthorizationCredentials, Depen
                       from_time: Optional[datetime] = Query(default=None),
                       to_time: Optional[datetime] = Query(default=None),
                       limit: int = Query(default=10),
-                      start: int = Query(default=0)) -> ReservationQueryResponse | Error:
-    return await service.get_history(credentials, from_time, to_time, limit, start, False, response)
+                      start: int = Query(default=0),
+                      cursor: Optional[str] = Query(default=None),
+                      fields: Optional[List[str]] = Query(default=None),
+                      include_total: bool = Query(default=True),
+                      estimate_total: bool = Query(default=False)) -> ReservationQueryResponse | Error:
+    return await service.get_history(credentials, from_time, to_time, limit, start, False, response, cursor, fields, include_total, estimate_total)
 
 @app.get("/reservations/venue", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
 async def get_venue_history(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -208,8 +246,12 @@ async def get_venue_history(credentials: Annotated[HTTPAuthorizationCredentials,
                             from_time: Optional[datetime] = Query(default=None),
                             to_time: Optional[datetime] = Query(default=None),
                             limit: int = Query(default=10),
-                            start: int = Query(default=0)) -> ReservationQueryResponse | Error:
-    return await service.get_history(credentials, from_time, to_time, limit, start, True, response)
+                            start: int = Query(default=0),
+                            cursor: Optional[str] = Query(default=None),
+                            fields: Optional[List[str]] = Query(default=None),
+                            include_total: bool = Query(default=True),
+                            estimate_total: bool = Query(default=False)) -> ReservationQueryResponse | Error:
+    return await service.get_history(credentials, from_time, to_time, limit, start, True, response, cursor, fields, include_total, estimate_total)
 
 @app.get("/opinions", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
 async def query_opinions(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -218,13 +260,15 @@ async def query_opinions(credentials: Annotated[HTTPAuthorizationCredentials, De
                          from_date: Optional[datetime] = Query(default=None),
                          to_date: Optional[datetime] = Query(default=None),
                          limit: int = Query(default=10),
-                         start: int = Query(default=0)) -> OpinionQueryResponse | Error:
+                         start: int = Query(default=0),
+                         cursor: Optional[str] = Query(default=None)) -> OpinionQueryResponse | Error:
     query = OpinionQuery(
         venue=venue,
         from_date=from_date,
         to_date=to_date,
         limit=limit,
-        start=start
+        start=start,
+        cursor=cursor
     )
 
     return await service.get_opinions(query, response)
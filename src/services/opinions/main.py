@@ -3,7 +3,10 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Annotated, Any, List, Optional
 from fastapi import Body, FastAPI, Path, Query
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 from src.model.opinions.data.base import MongoOpinionsDB
 from src.model.opinions.opinion import Opinion
 from src.model.opinions.opinion_query import OpinionQuery, OpinionQueryResponse
@@ -13,7 +16,7 @@ from src.model.commons.error import Error
 from src.model.summarizer.summary import Summary
 from src.model.summarizer.provider import HttpSummarizerProvider, SummarizerService
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, TracingSettings):
     conn_string: str
     summaries: str = "summaries"
     proto: str = "https://"
@@ -25,9 +28,13 @@ database = MongoOpinionsDB(settings.conn_string)
 @asynccontextmanager
 async def init_database(app: FastAPI):
     await database.init()
+    await open_client(settings)
     yield
+    await close_client()
 
-app = FastAPI(lifespan=init_database)
+app = FastAPI(lifespan=init_database, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="opinions", exporter=exporter_from(settings))
+instrument(app, "opinions")
 summaries = HttpSummarizerProvider(f"{settings.proto}{settings.summaries}")
 opinions = OpinionsService(LocalOpinionsProvider(database, summaries))
 
@@ -58,16 +65,22 @@ async def query_opinions(venue: Optional[str] = Query(default=None),
                          from_date: Optional[datetime] = Query(default=None),
                          to_date: Optional[datetime] = Query(default=None),
                          limit: int = Query(default=10),
-                         start: int = Query(default=0)) -> OpinionQueryResponse | Error:
+                         start: int = Query(default=0),
+                         cursor: Optional[str] = Query(default=None)) -> OpinionQueryResponse | Error:
     query = OpinionQuery(
         venue=venue,
         from_date=from_date,
         to_date=to_date,
         limit=limit,
-        start=start
+        start=start,
+        cursor=cursor
     )
     return await opinions.query_opinions(query)
 
+@app.post("/opinions/batch")
+async def get_opinions_by_reservations(reservations: Annotated[List[str], Body()]) -> List[Opinion]:
+    return await opinions.get_by_reservations(reservations)
+
 @app.get("/summaries/{restaurant}")
 async def get_summary(restaurant: Annotated[str, Path()],
                       limit: Annotated[int, Query()] = 3,
@@ -1,22 +1,36 @@
+from contextlib import asynccontextmanager
 from typing import Annotated
 from fastapi import Body, FastAPI, Path
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.session import PoolSettings
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 
 from src.model.points.data.base import RelPointBase
 from src.model.points.point import Point, PointResponse
 from src.model.points.provider import LocalPointsProvider
 from src.model.points.service import PointService 
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, PoolSettings, TracingSettings):
     conn_string: str = "" 
 
 settings = Settings()
 
-base = RelPointBase(settings.conn_string)
+base = RelPointBase(settings.conn_string, settings)
 provider = LocalPointsProvider(base)
 service = PointService(provider)
 
-app = FastAPI()
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    await base.warm_up(settings.db_pool_warmup)
+    yield
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="points", exporter=exporter_from(settings))
+instrument(app, "points")
 
 
 @app.get("/points/{user}")
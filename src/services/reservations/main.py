@@ -1,8 +1,13 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
 import logging
 from typing import Annotated, List, Optional, Tuple
 from fastapi import Body, FastAPI, Path, Query, Response, status
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.session import PoolSettings
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 
 from src.model.commons.error import Error
 from src.model.communications.service import HttpCommunicationProvider
@@ -14,6 +19,7 @@ from src.model.reservations.data.base import MockBase, RelBase
 from src.model.reservations.reservation import CreateInfo, Reservation
 from src.model.reservations.reservationQuery import ReservationQuery, ReservationQueryResponse
 from src.model.reservations.service import LocalReservationsProvider, ReservationsProvider, ReservationsService
+from src.model.reservations.sweeper import ExpirySweeper
 from src.model.reservations.update import Update
 from src.model.stats.provider import HttpStatsProvider
 from src.model.stats.user_data import UserStatData
@@ -23,7 +29,7 @@ from src.model.users.service import HttpUsersProvider
 from src.model.venues.service import HttpVenuesProvider
 from src.model.opinions.provider import HttpOpinionsProvider
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, PoolSettings, TracingSettings):
     db_string: str = "database_conn_string"
     venues: str = "venues"
     opinions: str = "opinions"
@@ -32,25 +38,43 @@ class Settings(BaseSettings):
     users: str = "users"
     communications: str = "communications"
     proto: str = "https://"
+    expiry_sweep_interval: float = 60
+    expiry_batch_size: int = 500
+    venues_replica_size: int = 0
 
 settings = Settings()
 
-app = FastAPI()
-database =  RelBase(settings.db_string)
-venues = HttpVenuesProvider(f"{settings.proto}{settings.venues}")
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    await database.warm_up(settings.db_pool_warmup)
+    sweeper.start()
+    venues.start()
+    yield
+    await venues.stop()
+    await sweeper.stop()
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="reservations", exporter=exporter_from(settings))
+instrument(app, "reservations")
+database =  RelBase(settings.db_string, settings)
+venues = HttpVenuesProvider(f"{settings.proto}{settings.venues}", replica_size=settings.venues_replica_size)
 opinions = HttpOpinionsProvider(f"{settings.proto}{settings.opinions}")
 stats = HttpStatsProvider(f"{settings.proto}{settings.stats}")
 points = HttpPointsProvider(f"{settings.proto}{settings.points}")
 comms = HttpCommunicationProvider(f"{settings.proto}{settings.communications}")
 users = HttpUsersProvider(f"{settings.proto}{settings.users}")
-service = ReservationsService(LocalReservationsProvider(database, venues, opinions, stats, points, users, comms))
+provider = LocalReservationsProvider(database, venues, opinions, stats, points, users, comms)
+service = ReservationsService(provider)
+sweeper = ExpirySweeper(provider, settings.expiry_sweep_interval, settings.expiry_batch_size)
 
 
 @app.post("/reservations", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
 async def create_reservation(reservation: Annotated[CreateInfo, Body()], response: Response) -> Reservation | Error:
     return await service.create_reservation(reservation, response)
 
-@app.put("/reservations/{reservation}", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}})
+@app.put("/reservations/{reservation}", responses={status.HTTP_400_BAD_REQUEST: {"model": Error}, status.HTTP_409_CONFLICT: {"model": Error}})
 async def update_reservation(reservation: Annotated[str, Path()], update: Annotated[Update, Body()], response: Response) -> Reservation | Error:
     return await service.update_reservation(reservation, update, response)
 
@@ -69,7 +93,11 @@ async def get_reservations(response: Response,
                            from_people: int = Query(default=None),
                            to_people: int = Query(default=None),
                            limit: int = Query(default=10),
-                           start: int = Query(default=0)
+                           start: int = Query(default=0),
+                           include_total: bool = Query(default=True),
+                           estimate_total: bool = Query(default=False),
+                           cursor: str = Query(default=None),
+                           fields: List[str] = Query(default=None)
                            ) -> ReservationQueryResponse | Error:
     query = ReservationQuery(
             id=id,
@@ -80,7 +108,11 @@ async def get_reservations(response: Response,
             to_time=to_time,
             people=(from_people, to_people) if from_people != None and to_people != None else None,
             limit=limit,
-            start=start
+            start=start,
+            include_total=include_total,
+            estimate_total=estimate_total,
+            cursor=cursor,
+            fields=fields
             )
     return await service.get_reservations(query, response)
 
@@ -91,13 +123,15 @@ async def query_opinions(
                          from_date: Optional[datetime] = Query(default=None),
                          to_date: Optional[datetime] = Query(default=None),
                          limit: int = Query(default=10),
-                         start: int = Query(default=0)):
+                         start: int = Query(default=0),
+                         cursor: Optional[str] = Query(default=None)):
     query = OpinionQuery(
         venue=venue,
         from_date=from_date,
         to_date=to_date,
         limit=limit,
-        start=start
+        start=start,
+        cursor=cursor
     )
     return await service.get_opinions(query, response)
 
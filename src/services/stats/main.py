@@ -1,7 +1,10 @@
 from contextlib import asynccontextmanager
 from typing import Annotated
 from fastapi import FastAPI, Path
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 
 from src.model.reservations.reservation import Reservation
 from src.model.stats.data.base import MongoStatsDB
@@ -12,7 +15,7 @@ from src.model.stats.user_data import UserStatData
 from src.model.stats.venue_data import VenueStatData
 
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, TracingSettings):
     mongo_string: str = ""
 
 settings = Settings()
@@ -22,9 +25,13 @@ database = MongoStatsDB(settings.mongo_string)
 @asynccontextmanager
 async def init_services(app: FastAPI):
     await database.init()
+    await open_client(settings)
     yield
+    await close_client()
 
-app = FastAPI(lifespan=init_services)
+app = FastAPI(lifespan=init_services, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="stats", exporter=exporter_from(settings))
+instrument(app, "stats")
 stats = StatsService(LocalStatsProvider(database))
 
 
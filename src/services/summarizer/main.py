@@ -5,7 +5,10 @@ import logging
 from typing import Annotated, List
 from fastapi import FastAPI, HTTPException, Path, Query, status
 from contextlib import asynccontextmanager
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 from src.model.commons.error import Error
 from src.model.opinions.data.base import MongoOpinionsDB
 from src.model.summarizer.process.algorithm import SummaryAlgorithm, VertexSummarizer
@@ -15,7 +18,7 @@ from src.model.summarizer.provider import SummarizerService
 from src.model.summarizer.summary import Summary
 from src.model.summarizer.summary_query import SummaryQuery
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, TracingSettings):
     conn_string: str = ""
     key_id: str = ""
     key: str = ""
@@ -39,9 +42,13 @@ async def init_services(app: FastAPI):
        except Exception as e:
           log(level=logging.CRITICAL, msg=e)
           summarizer = SummaryAlgorithm()
+    await open_client(settings)
     yield
+    await close_client()
 
-app = FastAPI(lifespan=init_services)
+app = FastAPI(lifespan=init_services, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="summarizer", exporter=exporter_from(settings))
+instrument(app, "summarizer")
 summaries = SummarizerService(LocalSummarizerProvider(database, summarizer))
 
 @app.get("/summaries")
@@ -1,5 +1,10 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Path, Response, status, Query, Body
-from pydantic_settings import BaseSettings
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.metrics import instrument
+from src.model.commons.session import PoolSettings
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
 from src.model.commons.error import Error
 from src.model.communications.service import HttpCommunicationProvider
 from src.model.users.auth_request import AuthRequest
@@ -7,20 +12,30 @@ from src.model.users.firebase.api_instance import FirebaseClient
 from src.model.users.permissions.base import DBEngine
 from src.model.users.update import UserUpdate
 from src.model.users.user_data import UserData, UserToken
-from typing import Annotated, Any, Dict
+from typing import Annotated, Any, Dict, List
 from src.model.users.service import LocalUsersProvider, UsersService
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, PoolSettings, TracingSettings):
     api_key: str = "ultraSecret"
     db_string: str = "database_conn_string"
     communications: str = "communications"
     proto: str = "https://"
 
 settings = Settings()
-app = FastAPI()
+
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    await database.warm_up(settings.db_pool_warmup)
+    yield
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="users", exporter=exporter_from(settings))
+instrument(app, "users")
 print(settings.db_string)
 authenticator = FirebaseClient(key=settings.api_key)
-database = DBEngine(conn_string=settings.db_string)
+database = DBEngine(conn_string=settings.db_string, pool=settings)
 comms = HttpCommunicationProvider(f"{settings.proto}{settings.communications}")
 service = UsersService(LocalUsersProvider(authenticator, database, comms))
 
@@ -49,6 +64,10 @@ async def update_data(auth: Annotated[UserToken, Body(embed=True, alias="auth")]
                       update: Annotated[UserUpdate, Body(embed=True, alias="update")]) -> UserData:
     return await service.update(auth, update)    
 
+@app.post("/users/batch")
+async def get_users(users: Annotated[List[str], Body()]) -> List[UserData]:
+    return await service.get_users(users)
+
 @app.get("/user/{user}")
 async def get_user(user: Annotated[str, Path()]) -> UserData:
     return await service.get_user(user)
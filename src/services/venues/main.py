@@ -1,24 +1,54 @@
+from contextlib import asynccontextmanager
 from src.model.commons.error import Error
 from src.model.venues.venueQuery import VenueDistanceQueryResult, VenueQuery, VenueQueryResult
 from src.model.venues.update import Update
-from typing import Annotated, List, Tuple
-from fastapi import Body, FastAPI, Path, Query, Response, status
-from pydantic_settings import BaseSettings
+from typing import Annotated, List, Optional, Tuple
+from fastapi import Body, FastAPI, Path, Query, Request, Response, status
+from src.model.commons.caller import ClientSettings, close_client, open_client
+from fastapi.responses import ORJSONResponse
+from src.model.commons.cache import LRUCache
+from src.model.commons.metrics import instrument, watch_cache
+from src.model.commons.session import PoolSettings
+from src.model.commons.tracing import TracingMiddleware, TracingSettings, exporter_from
+from src.model.commons.etag import conditional_response
 from src.model.venues.data.base import MockBase, RelBase
+from src.model.venues.changes import VenueChanges
 from src.model.venues.venue import CreateInfo, Venue
 from src.model.venues.venueQuery import VenueQuery
+from src.model.venues.data.location_finder import DEFAULT_LIMIT, DEFAULT_RADIUS
+from src.model.venues.data.spatial import GridIndex, IndexRefresher
 from src.model.venues.service import LocalVenuesProvider, VenuesProvider, VenuesService
 from datetime import datetime
 
 
-class Settings(BaseSettings):
+class Settings(ClientSettings, PoolSettings, TracingSettings):
     db_string: str = "database_conn_string"
+    spatial_index: bool = True
+    spatial_refresh_interval: float = 300
+    venue_cache_size: int = 1024
+    venue_cache_ttl: float = 30
 
 settings = Settings()
 
-app = FastAPI()
-database =  RelBase(settings.db_string) 
-service = VenuesService(LocalVenuesProvider(database))
+@asynccontextmanager
+async def init_client(app: FastAPI):
+    await open_client(settings)
+    await database.warm_up(settings.db_pool_warmup)
+    await provider.refresh_index()
+    refresher.start()
+    yield
+    await refresher.stop()
+    await close_client()
+
+app = FastAPI(lifespan=init_client, default_response_class=ORJSONResponse)
+app.add_middleware(TracingMiddleware, service="venues", exporter=exporter_from(settings))
+instrument(app, "venues")
+database =  RelBase(settings.db_string, settings) 
+provider = LocalVenuesProvider(database,
+                               GridIndex() if settings.spatial_index else None,
+                               watch_cache(LRUCache(settings.venue_cache_size, settings.venue_cache_ttl), "venues"))
+refresher = IndexRefresher(provider.refresh_index, settings.spatial_refresh_interval if settings.spatial_index else 0)
+service = VenuesService(provider)
 
 
 @app.post("/venues")
@@ -35,7 +65,8 @@ async def delete_venue(venue: Annotated[str, Path()]) -> None:
     return await service.delete_venue(venue)
 
 @app.get("/venues")
-async def get_venues(response: Response,
+async def get_venues(request: Request,
+                           response: Response,
                            id: str = Query(default=None),
                            name: str = Query(default=None),
                            location: str = Query(default=None),
@@ -49,7 +80,11 @@ async def get_venues(response: Response,
                            reservationLeadTime: int = Query(default=None),
                            menu: str = Query(default=None),
                            limit: int = Query(default=10),
-                           start: int = Query(default=0)
+                           start: int = Query(default=0),
+                           include_total: bool = Query(default=True),
+                           estimate_total: bool = Query(default=False),
+                           cursor: str = Query(default=None),
+                           cached: bool = Query(default=True)
                            ) -> VenueQueryResult | Error:
     query = VenueQuery(
             id=id,
@@ -65,12 +100,28 @@ async def get_venues(response: Response,
             reservationLeadTime=reservationLeadTime,
             menu=menu,
             limit=limit,
-            start=start
+            start=start,
+            include_total=include_total,
+            estimate_total=estimate_total,
+            cursor=cursor,
+            cached=cached
             )
-    return await service.get_venues(query, response)
+    result = await service.get_venues(query, response)
+    return conditional_response(request, result, response.status_code)
 
 @app.get("/venues/near")
-async def get_venues_near_to(response: Response,
-                             location: Tuple[str, str] = Query(default=("-34.594174","-58.4566507"))
+async def get_venues_near_to(request: Request,
+                             response: Response,
+                             location: Tuple[str, str] = Query(default=("-34.594174","-58.4566507")),
+                             radius: int = Query(default=DEFAULT_RADIUS, gt=0),
+                             limit: int = Query(default=DEFAULT_LIMIT, gt=0)
                              ) -> VenueDistanceQueryResult | Error:
-    return await service.get_venues_near_to(location, response)
+    result = await service.get_venues_near_to(location, response, radius, limit)
+    return conditional_response(request, result, response.status_code)
+
+@app.get("/venues/changes")
+async def get_venue_changes(response: Response,
+                            since: Optional[int] = Query(default=None),
+                            wait: float = Query(default=0, ge=0, le=8)
+                            ) -> VenueChanges | Error:
+    return await service.get_changes(since, wait, response)
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+import src.model.commons.caller as caller
+from src.model.commons.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, ResiliencePolicy, RetryBudget, Target, configure_target, targets
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_breaker_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ResiliencePolicy(failure_threshold=3), clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_breaker_half_opens_after_reset_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ResiliencePolicy(failure_threshold=1, reset_timeout=5), clock)
+    breaker.failure()
+    clock.now = 5
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == CLOSED
+
+def test_failed_probe_opens_the_breaker_again():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ResiliencePolicy(failure_threshold=1, reset_timeout=5), clock)
+    breaker.failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_retry_budget_is_bounded_by_requests():
+    clock = FakeClock()
+    budget = RetryBudget(ResiliencePolicy(retry_ratio=0.5, retries_per_second=0.1), clock)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+def test_backoff_is_capped():
+    target = Target("http://target", ResiliencePolicy(backoff_base=1, backoff_cap=3))
+    for attempt in range(10):
+        assert 0 <= target.backoff(attempt) <= 3
+
+def test_open_circuit_fails_without_calling():
+    url = "http://127.0.0.1:9"
+    configure_target(url, ResiliencePolicy(failure_threshold=1, reset_timeout=60, max_retries=0))
+    async def run():
+        with pytest.raises(Exception):
+            await caller.get(f"{url}/venues")
+        with pytest.raises(CircuitOpen):
+            await caller.get(f"{url}/venues")
+        await caller.close_client()
+    asyncio.run(run())
+    assert targets.snapshot()[url]["state"] == OPEN
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from aiohttp import web
+import src.model.commons.caller as caller
+
+
+async def start_server() -> web.AppRunner:
+    async def echo(request: web.Request) -> web.Response:
+        return web.json_response({"path": request.path, "params": dict(request.query)})
+    async def large(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(64):
+            await response.write(b"a" * 1024)
+        await response.write_eof()
+        return response
+    hits = []
+    async def slow(request: web.Request) -> web.Response:
+        hits.append(request.path)
+        await asyncio.sleep(0.05)
+        return web.json_response({"hits": len(hits)})
+    app = web.Application()
+    app.router.add_get("/slow", slow)
+    app.router.add_get("/echo", echo)
+    app.router.add_get("/large", large)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+def server_url(runner: web.AppRunner) -> str:
+    port = runner.addresses[0][1]
+    return f"http://127.0.0.1:{port}"
+
+def test_calls_share_the_same_client():
+    async def run():
+        runner = await start_server()
+        await caller.open_client()
+        first = caller.registry.get()
+        await caller.get(f"{server_url(runner)}/echo")
+        await caller.get(f"{server_url(runner)}/echo")
+        second = caller.registry.get()
+        await caller.close_client()
+        await runner.cleanup()
+        return first, second
+    first, second = asyncio.run(run())
+    assert first is second
+    assert first.closed
+
+def test_connections_are_reused_between_calls():
+    async def run():
+        runner = await start_server()
+        await caller.open_client()
+        url = server_url(runner)
+        for _ in range(5):
+            await caller.get(f"{url}/echo")
+        connector = caller.registry.get().connector
+        idle = sum(len(conns) for conns in connector._conns.values())
+        await caller.close_client()
+        await runner.cleanup()
+        return idle
+    assert asyncio.run(run()) == 1
+
+def test_response_body_is_available_after_release():
+    async def run():
+        runner = await start_server()
+        response = await caller.get(f"{server_url(runner)}/echo", params={"venue": "a"})
+        data = await caller.recover_json_data(response)
+        await caller.close_client()
+        await runner.cleanup()
+        return data
+    data = asyncio.run(run())
+    assert data == {"path": "/echo", "params": {"venue": "a"}}
+
+def test_client_is_recreated_on_a_new_loop():
+    async def run():
+        client = caller.registry.get()
+        await caller.close_client()
+        return client
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+    assert first is not second
+
+def test_chunked_bodies_are_read_completely():
+    async def run():
+        runner = await start_server()
+        response = await caller.get(f"{server_url(runner)}/large")
+        await caller.close_client()
+        await runner.cleanup()
+        return response
+    response = asyncio.run(run())
+    assert len(response.body) == 64 * 1024
+
+def test_bodies_over_the_limit_are_rejected():
+    async def run():
+        runner = await start_server()
+        await caller.open_client(caller.ClientSettings(http_max_body_size=1024))
+        try:
+            await caller.get(f"{server_url(runner)}/large")
+        finally:
+            await caller.close_client()
+            caller.registry.configure(caller.ClientSettings())
+            await runner.cleanup()
+    with pytest.raises(caller.BodyTooLarge):
+        asyncio.run(run())
+
+def test_identical_concurrent_gets_are_coalesced():
+    async def run():
+        runner = await start_server()
+        url = f"{server_url(runner)}/slow"
+        responses = await asyncio.gather(*[caller.get(url, params={"id": "a"}) for _ in range(5)])
+        data = [await caller.recover_json_data(response) for response in responses]
+        await caller.close_client()
+        await runner.cleanup()
+        return data
+    data = asyncio.run(run())
+    assert data == [{"hits": 1}] * 5
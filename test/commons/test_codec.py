@@ -0,0 +1,38 @@
+from datetime import datetime
+from uuid import UUID
+from src.model.commons import codec
+from src.model.reservations.reservation import Reservation, ReservationStatus
+
+
+def test_datetimes_and_uuids_are_encoded_natively():
+    value = {"time": datetime(2024, 6, 1, 21, 30), "id": UUID("12345678-1234-5678-1234-567812345678")}
+    result = codec.loads(codec.dumps(value))
+    assert result == {"time": "2024-06-01T21:30:00", "id": "12345678-1234-5678-1234-567812345678"}
+
+def test_pydantic_models_round_trip():
+    reservation = Reservation(id="an_id", user="a_user", venue="a_venue",
+                              time=datetime(2024, 6, 1, 21, 30), people=4, status=ReservationStatus(status="Accepted"))
+    result = Reservation(**codec.loads(codec.dumps(reservation)))
+    assert result == reservation
+
+def test_non_string_keys_are_supported():
+    assert codec.loads(codec.dumps({1: 2})) == {"1": 2}
+
+def test_params_are_flattened():
+    params = {
+            "status": ["Accepted", "Canceled"],
+            "location": ("-34.5", "-58.4"),
+            "from_time": datetime(2024, 6, 1, 21, 30),
+            "dev": True,
+            "limit": 10,
+            "venue": None
+            }
+    assert codec.encode_params(params) == [
+            ("status", "Accepted"),
+            ("status", "Canceled"),
+            ("location", "-34.5"),
+            ("location", "-58.4"),
+            ("from_time", "2024-06-01T21:30:00"),
+            ("dev", "true"),
+            ("limit", "10")
+            ]
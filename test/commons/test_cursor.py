@@ -0,0 +1,24 @@
+from datetime import datetime
+import pytest
+from src.model.commons.cursor import decode, encode, next_cursor
+
+
+def test_cursor_round_trip():
+    time = datetime(2024, 5, 17, 21, 30)
+    token = encode((time, "reservation-id"))
+    assert "=" not in token
+    assert decode(token, datetime, str) == [time, "reservation-id"]
+
+def test_foreign_tokens_are_rejected():
+    with pytest.raises(ValueError):
+        decode("not a cursor", str)
+    with pytest.raises(ValueError):
+        decode(encode(("a", "b")), str)
+    with pytest.raises(ValueError):
+        decode(encode(("yesterday",)), datetime)
+
+def test_short_pages_have_no_next_cursor():
+    rows = [1, 2, 3]
+    assert next_cursor(rows, 4, lambda row: (row,)) is None
+    assert next_cursor([], 4, lambda row: (row,)) is None
+    assert decode(next_cursor(rows, 3, lambda row: (row,)), int) == [3]
@@ -1,6 +1,6 @@
-from copy import copy
 from random import shuffle
-from src.model.commons.distance import DistanceRanker, LocalPosition, RelativeDistance
+import numpy as np
+from src.model.commons.distance import DistanceRanker, LocalPosition
 
 
 def test_distance_between_anchorage_and_centenario():
@@ -12,54 +12,42 @@ def test_distance_between_anchorage_and_centenario():
 
    assert abs(expected_distance - result) < 0.1
 
-def test_compare_distances_relative_to_a_point():
-    my_position = LocalPosition("my_position", "-34.6211119", "-58.4348481")
-    anchorage = LocalPosition("anchorage", "61.2035833", "-149.853936")
-    centenario = LocalPosition("centenario", "-34.6071389", "-58.4383249")
-    
-    to_anchorage = RelativeDistance(my_position, anchorage)
-    to_centenario = RelativeDistance(my_position, centenario)
-
-    assert to_anchorage > to_centenario
-    assert to_anchorage != to_centenario
-    assert to_centenario < to_anchorage
-    assert to_centenario <= to_anchorage
-    assert to_anchorage >= to_centenario
-
-
-def test_two_nearly_equal_distances_should_be_equal():
-    my_position = LocalPosition("my_position", "-34.6211119", "-58.4348481")
-    centenario = LocalPosition("centenario", "-34.6071389", "-58.4383249")
-    centenario_2 = LocalPosition("centenario_2", "-34.6071388", "-58.4383249")
-
-    to_centenario_1 = RelativeDistance(my_position, centenario)
-    to_centenario_2 = RelativeDistance(my_position, centenario_2)
-
-    assert  to_centenario_1 == to_centenario_2
-    assert  to_centenario_1 <= to_centenario_2
-    assert to_centenario_1 >= to_centenario_2
-
 def test_ranking_distances_without_filtering():
-    my_position = LocalPosition("my_position", "-34.6071389", "-58.4383249")
     base = (-34.6071389, -58.4383249)
-    positions = []
-    for i in range(0, 200):
-        positions.append((base[0] + 0.01 * i, base[1] + 0.01 * i))
-    places = []
-    for position in positions:
-        places.append(
-            LocalPosition(f"{position[0]},{position[1]}", position[0].__str__(), position[1].__str__())
-        )
-    ranker = DistanceRanker(my_position)
-    places_copied = copy(places)
-    shuffle(places)
-    i = 0
-    while i < len(places):
-        batch = places[i:i+10]
-        ranker.add_batch(batch)
-        i += 10
+    positions = [(base[0] + 0.01 * i, base[1] + 0.01 * i) for i in range(0, 200)]
+    ids = [f"{lat},{lon}" for lat, lon in positions]
+    order = list(range(200))
+    shuffle(order)
+    ranker = DistanceRanker(base)
+    for i in range(0, 200, 10):
+        batch = order[i:i+10]
+        ranker.add_batch([ids[j] for j in batch], np.array([positions[j] for j in batch]))
     final_result = ranker.sort()
-    print(len(final_result))
-    for i in range(0,200):
-        assert final_result[i][0] == places_copied[i] 
-    
+    for i in range(0, 200):
+        assert final_result[i][0] == ids[i]
+
+def test_batch_distances_match_the_haversine_of_each_pair():
+    my_position = LocalPosition("my_position", "-34.6211119", "-58.4348481")
+    places = [LocalPosition(f"{i}", str(-90 + i * 1.7), str(-180 + i * 3.5)) for i in range(100)]
+    by_id = {place.id: place for place in places}
+    ranker = DistanceRanker(my_position.location)
+    ranker.add_batch([place.id for place in places], np.array([place.location for place in places]))
+
+    for id, distance in ranker.sort():
+        assert distance == int(my_position.distance_to(by_id[id]) * 1000)
+
+def test_a_limited_ranking_keeps_the_closest_positions_across_batches():
+    center = (-34.6071389, -58.4383249)
+    coordinates = np.array([(center[0] + 0.01 * i, center[1] + 0.01 * i) for i in range(200)])
+    ids = [f"{i}" for i in range(200)]
+    order = np.random.permutation(200)
+    full = DistanceRanker(center)
+    limited = DistanceRanker(center, limit=15)
+    for i in range(0, 200, 10):
+        batch = order[i:i+10]
+        full.add_batch([ids[j] for j in batch], coordinates[batch])
+        limited.add_batch([ids[j] for j in batch], coordinates[batch])
+
+    assert len(limited) <= 15
+    assert limited.sort() == full.sort()[:15]
+    assert DistanceRanker(center, limit=5).sort() == []
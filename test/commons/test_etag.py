@@ -0,0 +1,66 @@
+import asyncio
+from aiohttp import web
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+import src.model.commons.caller as caller
+from src.model.commons.etag import compute_etag, conditional_response, matches
+from src.model.venues.service import HttpVenuesProvider
+from src.model.venues.venueQuery import VenueQuery
+
+
+def test_matches_handles_lists_and_weak_validators():
+    etag = compute_etag(b"{}")
+    assert matches(etag, etag)
+    assert matches(f'"other", W/{etag}', etag)
+    assert matches("*", etag)
+    assert not matches(None, etag)
+    assert not matches('"other"', etag)
+
+def test_conditional_response_answers_not_modified():
+    app = FastAPI()
+    @app.get("/venues")
+    async def venues(request: Request):
+        return conditional_response(request, {"result": [], "total": 0})
+    client = TestClient(app)
+    first = client.get("/venues")
+    assert first.status_code == 200
+    assert first.json() == {"result": [], "total": 0}
+    second = client.get("/venues", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+
+def test_errors_are_not_tagged():
+    app = FastAPI()
+    @app.get("/venues")
+    async def venues(request: Request):
+        return conditional_response(request, {"detail": "failed"}, 500)
+    response = TestClient(app).get("/venues")
+    assert response.status_code == 500
+    assert "ETag" not in response.headers
+
+def test_http_provider_reuses_cached_body_on_not_modified():
+    sent = []
+    async def venues(request: web.Request) -> web.Response:
+        body = b'{"result":[],"total":0}'
+        etag = compute_etag(body)
+        sent.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+    async def run():
+        app = web.Application()
+        app.router.add_get("/venues", venues)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        provider = HttpVenuesProvider(f"http://127.0.0.1:{runner.addresses[0][1]}")
+        first = await provider.get_venues(VenueQuery(id="a_venue"))
+        second = await provider.get_venues(VenueQuery(id="a_venue"))
+        await caller.close_client()
+        await runner.cleanup()
+        return first, second
+    first, second = asyncio.run(run())
+    assert first == second == {"result": [], "total": 0}
+    assert sent[0] is None
+    assert sent[1] == compute_etag(b'{"result":[],"total":0}')
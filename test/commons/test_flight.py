@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from src.model.commons.flight import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"total": 1}
+    async def run():
+        return await asyncio.gather(*[flight.do("key", call) for _ in range(10)])
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"total": 1} for result in results)
+    assert flight.in_flight() == 0
+
+def test_results_are_not_cached_after_completion():
+    flight = SingleFlight()
+    calls = []
+    async def call():
+        calls.append(1)
+        return len(calls)
+    async def run():
+        first = await flight.do("key", call)
+        second = await flight.do("key", call)
+        return first, second
+    assert asyncio.run(run()) == (1, 2)
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+    async def run():
+        await asyncio.gather(flight.do("a", call), flight.do("b", call))
+    asyncio.run(run())
+    assert len(calls) == 2
+
+def test_errors_are_shared_by_every_waiter():
+    flight = SingleFlight()
+    async def call():
+        await asyncio.sleep(0.01)
+        raise Exception("failed")
+    async def run():
+        return await asyncio.gather(flight.do("key", call), flight.do("key", call), return_exceptions=True)
+    results = asyncio.run(run())
+    assert all(isinstance(result, Exception) for result in results)
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight()
+    async def call():
+        await asyncio.sleep(0.02)
+        return "done"
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", call))
+        second = asyncio.ensure_future(flight.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    assert asyncio.run(run()) == "done"
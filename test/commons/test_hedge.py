@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from src.model.commons.hedge import HedgePolicy, Hedger, LatencyWindow
+
+
+def test_percentile_of_latency_window():
+    window = LatencyWindow(100)
+    for sample in range(100):
+        window.add(sample / 100)
+    assert window.percentile(0.95) == 0.95
+    assert window.percentile(0.5) == 0.5
+
+def test_delay_uses_max_delay_until_enough_samples():
+    hedger = Hedger(HedgePolicy(min_samples=5, max_delay=0.5))
+    assert hedger.delay() == 0.5
+    for _ in range(5):
+        hedger.latencies.add(0.02)
+    assert hedger.delay() == 0.02
+
+def test_fast_calls_are_not_hedged():
+    hedger = Hedger(HedgePolicy(max_delay=0.5))
+    calls = []
+    async def call():
+        calls.append(1)
+        return "done"
+    assert asyncio.run(hedger.run(call)) == "done"
+    assert len(calls) == 1
+    assert hedger.hedges == 0
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = Hedger(HedgePolicy(max_delay=0.01))
+    cancelled = []
+    attempts = []
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "slow"
+        return "fast"
+    result = asyncio.run(hedger.run(call))
+    assert result == "fast"
+    assert hedger.hedges == 1
+    assert hedger.wins == 1
+    assert cancelled == [1]
+
+def test_hedges_are_bounded_by_budget():
+    hedger = Hedger(HedgePolicy(max_delay=0.001, max_hedge_ratio=0.1, window=10))
+    async def call():
+        await asyncio.sleep(0.005)
+        return "done"
+    async def run():
+        for _ in range(20):
+            await hedger.run(call)
+    asyncio.run(run())
+    assert hedger.hedges <= 1 + 20 * 0.1
+
+def test_cancelled_slow_attempts_keep_the_delay_from_shrinking():
+    hedger = Hedger(HedgePolicy(max_delay=0.05, min_delay=0.001, min_samples=4, window=20, max_hedge_ratio=1.0))
+    attempts = []
+    async def call():
+        attempts.append(1)
+        if len(attempts) % 2 == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+    async def run():
+        for _ in range(10):
+            assert await hedger.run(call) == "fast"
+    asyncio.run(run())
+    assert hedger.hedges == 10
+    assert hedger.delay() >= 0.04
+
+def test_failed_hedge_falls_back_to_first_attempt():
+    hedger = Hedger(HedgePolicy(max_delay=0.01))
+    attempts = []
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+            return "first"
+        raise Exception("hedge failed")
+    assert asyncio.run(hedger.run(call)) == "first"
+
+def test_both_attempts_failing_raises():
+    hedger = Hedger(HedgePolicy(max_delay=0.01))
+    attempts = []
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+        raise Exception("failed")
+    with pytest.raises(Exception):
+        asyncio.run(hedger.run(call))
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from fastapi import FastAPI
+import httpx
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from src.model.commons.cache import LRUCache
+from src.model.commons.metrics import InstrumentedExecutor, instrument, observe_downstream, watch_cache, watch_engine
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def instrumented_app() -> FastAPI:
+    app = FastAPI()
+    instrument(app, "venues")
+    @app.get("/venues/{venue}")
+    async def get_venue(venue: str):
+        return {"id": venue}
+    return app
+
+async def call(app: FastAPI, *paths: str) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://venues") as client:
+        return [await client.get(path) for path in paths]
+
+def test_requests_are_timed_by_route_template():
+    labels = {"service": "venues", "method": "GET", "route": "/venues/{venue}", "status": "200"}
+    before = sample("chefcito_http_request_duration_seconds_count", labels)
+    asyncio.run(call(instrumented_app(), "/venues/1", "/venues/2"))
+    assert sample("chefcito_http_request_duration_seconds_count", labels) == before + 2
+    assert sample("chefcito_http_requests_in_flight", {"service": "venues"}) == 0
+
+def test_unknown_paths_share_a_single_series():
+    labels = {"service": "venues", "method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("chefcito_http_request_duration_seconds_count", labels)
+    asyncio.run(call(instrumented_app(), "/missing/1", "/missing/2"))
+    assert sample("chefcito_http_request_duration_seconds_count", labels) == before + 2
+
+def test_metrics_endpoint_exposes_text_format():
+    observe_downstream("GET", "http://users:8000/users/batch", 0.02, status=200)
+    [response] = asyncio.run(call(instrumented_app(), "/metrics"))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'chefcito_downstream_request_duration_seconds_count{method="GET",outcome="200",target="http://users:8000"}' in response.text
+
+def test_pool_checkouts_are_tracked(tmp_path):
+    engine = watch_engine(create_engine(f"sqlite:///{tmp_path / 'pool.db'}"), "pool")
+    connection = engine.connect()
+    connection.execute(text("select 1"))
+    assert sample("chefcito_db_connections_checked_out", {"engine": "pool"}) == 1
+    connection.close()
+    assert sample("chefcito_db_connections_checked_out", {"engine": "pool"}) == 0
+    assert sample("chefcito_db_pool_size", {"engine": "pool"}) == 5
+
+def test_executor_reports_queued_jobs():
+    executor = InstrumentedExecutor(max_workers=1)
+    started, blocker = threading.Event(), threading.Event()
+    first = executor.submit(lambda: started.set() or blocker.wait())
+    started.wait()
+    second = executor.submit(lambda: 42)
+    assert sample("chefcito_executor_queue_depth", {}) == 1
+    blocker.set()
+    assert second.result() == 42 and first.result()
+    executor.shutdown()
+    assert sample("chefcito_executor_queue_depth", {}) == 0
+    assert sample("chefcito_executor_running", {}) == 0
+
+def test_cache_counters_are_reported():
+    cache = watch_cache(LRUCache(4), "watched")
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert sample("chefcito_cache_hits_total", {"cache": "watched"}) == 1
+    assert sample("chefcito_cache_misses_total", {"cache": "watched"}) == 1
+    assert sample("chefcito_cache_entries", {"cache": "watched"}) == 1
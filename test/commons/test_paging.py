@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from sqlalchemy import Integer, String, event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from src.model.commons.paging import ESTIMATED_TOTAL, EXACT_TOTAL, NO_TOTAL, Explain, fetch_page, total_mode
+from src.model.commons.session import create_engine
+
+
+class Base(DeclarativeBase):
+    pass
+
+class Dish(Base):
+    __tablename__ = "dishes"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    venue: Mapped[str] = mapped_column(String)
+
+def page_of(tmp_path, query, limit: int, start: int, total: str):
+    pytest.importorskip("aiosqlite")
+    engine = create_engine(f"sqlite:///{tmp_path / 'paging.db'}", "paging")
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            session.add_all([Dish(id=i, venue=f"venue_{i % 2}") for i in range(25)])
+            await session.commit()
+        statements.clear()
+        async with AsyncSession(engine) as session:
+            result = await fetch_page(session, query, limit, start, total)
+        await engine.dispose()
+        return result
+
+    rows, count = asyncio.run(run())
+    return rows, count, statements
+
+def test_page_and_total_come_in_one_statement(tmp_path):
+    query = select(Dish).where(Dish.venue == "venue_0").order_by(Dish.id)
+    rows, total, statements = page_of(tmp_path, query, 5, 5, EXACT_TOTAL)
+    assert [dish.id for dish in rows] == [10, 12, 14, 16, 18]
+    assert total == 13
+    assert len(statements) == 1
+
+def test_total_can_be_skipped(tmp_path):
+    rows, total, statements = page_of(tmp_path, select(Dish).order_by(Dish.id), 10, 0, NO_TOTAL)
+    assert len(rows) == 10
+    assert total is None
+    assert len(statements) == 1
+
+def test_page_past_the_end_still_reports_the_total(tmp_path):
+    rows, total, _ = page_of(tmp_path, select(Dish).order_by(Dish.id), 10, 100, EXACT_TOTAL)
+    assert rows == []
+    assert total == 25
+
+def test_estimate_falls_back_to_count_out_of_postgres(tmp_path):
+    rows, total, _ = page_of(tmp_path, select(Dish).order_by(Dish.id), 10, 0, ESTIMATED_TOTAL)
+    assert len(rows) == 10
+    assert total == 25
+
+def test_explain_keeps_the_statement_parameters():
+    query = select(Dish).where(Dish.venue == "venue_0")
+    compiled = Explain(query).compile(dialect=postgresql.dialect())
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert compiled.params == {"venue_1": "venue_0"}
+
+def test_total_mode_from_flags():
+    assert total_mode() == EXACT_TOTAL
+    assert total_mode(include_total=False, estimate_total=True) == NO_TOTAL
+    assert total_mode(estimate_total=True) == ESTIMATED_TOTAL
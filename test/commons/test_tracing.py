@@ -0,0 +1,120 @@
+import asyncio
+import json
+from aiohttp import web
+from fastapi import FastAPI
+import httpx
+import src.model.commons.caller as caller
+from src.model.commons.tracing import REQUEST_ID_HEADER, FileSpanExporter, OTLPSpanExporter, Span, TracingMiddleware, server_timing
+
+
+async def start_downstream() -> web.AppRunner:
+    async def echo(request: web.Request) -> web.Response:
+        return web.json_response({"request_id": request.headers.get(REQUEST_ID_HEADER)})
+    app = web.Application()
+    app.router.add_get("/echo", echo)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+def traced_app(downstream: str, exporter=None) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, service="gateway", exporter=exporter)
+    @app.get("/proxy")
+    async def proxy():
+        response = await caller.get(f"{downstream}/echo")
+        return await caller.recover_json_data(response)
+    return app
+
+async def call(app: FastAPI, headers: dict = {}) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        return await client.get("/proxy", headers=headers)
+
+def test_request_id_is_generated_and_propagated(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    async def run():
+        runner = await start_downstream()
+        app = traced_app(f"http://127.0.0.1:{runner.addresses[0][1]}", FileSpanExporter(str(path)))
+        response = await call(app)
+        await asyncio.sleep(0.01)
+        await caller.close_client()
+        await runner.cleanup()
+        return response
+    response = asyncio.run(run())
+    request_id = response.headers[REQUEST_ID_HEADER]
+    assert response.json() == {"request_id": request_id}
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert 'desc="GET /echo 200"' in response.headers["Server-Timing"]
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["GET /echo", "GET /proxy"]
+    assert all(span["request_id"] == request_id for span in spans)
+
+def test_incoming_request_id_is_kept():
+    async def run():
+        runner = await start_downstream()
+        app = traced_app(f"http://127.0.0.1:{runner.addresses[0][1]}")
+        response = await call(app, headers={REQUEST_ID_HEADER: "incoming-id"})
+        await caller.close_client()
+        await runner.cleanup()
+        return response
+    response = asyncio.run(run())
+    assert response.headers[REQUEST_ID_HEADER] == "incoming-id"
+    assert response.json() == {"request_id": "incoming-id"}
+
+def test_no_export_is_scheduled_without_an_exporter():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    async def ignore(message):
+        return
+    async def run():
+        middleware = TracingMiddleware(app, service="gateway")
+        await middleware(scope, ignore, ignore)
+        return len(middleware.exports)
+    scope = {"type": "http", "method": "GET", "path": "/ping", "headers": []}
+    assert asyncio.run(run()) == 0
+
+def test_server_timing_lists_every_hop():
+    spans = [
+        Span(request_id="id", service="venues", name="GET /venues", url="http://venues/venues", status=200, start=0, duration_ms=12.34),
+        Span(request_id="id", service="users", name="POST /users/batch", url="http://users/users/batch", start=0, duration_ms=1, retries=1, error="TimeoutError")
+        ]
+    header = server_timing(spans, 0.02)
+    assert header == 'venues-0;dur=12.3;desc="GET /venues 200", users-1;dur=1.0;desc="POST /users/batch TimeoutError", total;dur=20.0'
+
+def test_otlp_payload_groups_spans_by_service():
+    spans = [
+        Span(request_id="abc", service="venues", name="GET /venues", url="http://venues/venues", status=200, start=1, duration_ms=10),
+        Span(request_id="abc", service="venues", name="GET /venues/near", url="http://venues/venues/near", status=200, start=1, duration_ms=10)
+        ]
+    payload = OTLPSpanExporter("http://collector").payload(spans)
+    assert len(payload["resourceSpans"]) == 1
+    exported = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in exported] == ["GET /venues", "GET /venues/near"]
+    assert exported[0]["endTimeUnixNano"] - exported[0]["startTimeUnixNano"] == 10_000_000
+
+def test_otlp_exporter_posts_through_the_shared_session():
+    received = []
+    async def collect(request: web.Request) -> web.Response:
+        received.append(await request.json())
+        return web.json_response({})
+    async def run():
+        app = web.Application()
+        app.router.add_post("/v1/traces", collect)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        exporter = OTLPSpanExporter(f"http://127.0.0.1:{runner.addresses[0][1]}")
+        span = Span(request_id="abc", service="venues", name="GET /venues", url="http://venues/venues", status=200, start=1, duration_ms=10)
+        session = await caller.registry.open()
+        await exporter.export([span])
+        await exporter.export([span])
+        reused = caller.registry.get() is session and not session.closed
+        await caller.close_client()
+        await runner.cleanup()
+        return reused
+    assert asyncio.run(run())
+    assert len(received) == 2
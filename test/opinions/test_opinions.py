@@ -60,3 +60,16 @@ def test_opinions_from_different_restaurants_do_not_show_up_on_the_same_query():
     assert opinion_2 in result.result
     assert opinion not in result.result
 
+
+def test_opinions_of_several_reservations_are_retrieved_at_once():
+    database = MockedOpinionsDB()
+    provider = LocalOpinionsProvider(database, None) # type: ignore
+
+    opinions = [Opinion(venue=venue, reservation=reservation, date=datetime.now(), opinion="Nice place")
+                for venue, reservation in [("Elegantland", "first"), ("FastFoodGod", "second"), ("FastFoodGod", "third")]]
+    for opinion in opinions:
+        asyncio.run(provider.create_opinion(opinion))
+
+    result = asyncio.run(provider.get_by_reservations(["first", "third", "missing"]))
+
+    assert sorted(opinion.reservation for opinion in result) == ["first", "third"]
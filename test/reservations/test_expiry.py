@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from src.model.commons.session import create_engine
+from src.model.opinions.data.base import MockedOpinionsDB
+from src.model.opinions.provider import LocalOpinionsProvider
+from src.model.points.point import Point
+from src.model.points.provider import PointsProvider
+from src.model.reservations.data.base import MockBase, RelBase
+from src.model.reservations.data.schema import ReservationSchema
+from src.model.reservations.reservation import Accepted, Expired, Reservation, Uncomfirmed
+from src.model.reservations.reservationQuery import ReservationQuery
+from src.model.reservations.service import LocalReservationsProvider
+from src.model.reservations.sweeper import ExpirySweeper
+from src.model.stats.provider import StatsProvider
+from src.model.users.permissions.base import DBMock
+from src.model.users.service import LocalUsersProvider
+from src.model.venues.service import LocalVenuesProvider
+import src.model.venues.data.base as v_base
+
+
+class RecordedStats(StatsProvider):
+
+    def __init__(self):
+        self.updates: List[Reservation] = []
+
+    async def update(self, update: Reservation) -> None:
+        self.updates.append(update)
+
+class RecordedPoints(PointsProvider):
+
+    def __init__(self):
+        self.points: List[Point] = []
+
+    async def update_points(self, points: Point, time: datetime = datetime.now()) -> None:
+        self.points.append(points)
+
+def reservation(id: str, status: str, time: datetime) -> ReservationSchema:
+    return ReservationSchema(id=id, user=f"user/user_{id}", venue="venue", time=time, people=2, status=status)
+
+def past(minutes: int) -> datetime:
+    return datetime.now() - timedelta(minutes=minutes)
+
+def provider_over(database: MockBase, stats: StatsProvider, points: PointsProvider) -> LocalReservationsProvider:
+    return LocalReservationsProvider(database,
+                                     LocalVenuesProvider(v_base.MockBase()),
+                                     LocalOpinionsProvider(MockedOpinionsDB(), None),
+                                     stats,
+                                     points,
+                                     LocalUsersProvider(None, DBMock({}, {}), None))
+
+def test_only_accepted_reservations_past_the_delay_are_expired(tmp_path):
+    pytest.importorskip("aiosqlite")
+    conn_string = f"sqlite:///{tmp_path / 'reservations.db'}"
+    database = RelBase(conn_string)
+
+    async def run():
+        engine = create_engine(conn_string, "schema")
+        async with engine.begin() as connection:
+            await connection.run_sync(ReservationSchema.metadata.create_all)
+        await engine.dispose()
+        for stored in [reservation("late_1", Accepted().get_status(), past(60)),
+                       reservation("late_2", Accepted().get_status(), past(30)),
+                       reservation("late_3", Accepted().get_status(), past(20)),
+                       reservation("recent", Accepted().get_status(), past(5)),
+                       reservation("unconfirmed", Uncomfirmed().get_status(), past(60))]:
+            await database.store_reservation(stored)
+        first = await database.transition_before(Accepted().get_status(), Expired().get_status(), past(15), 2)
+        second = await database.transition_before(Accepted().get_status(), Expired().get_status(), past(15), 2)
+        return first, second, await database.get_reservation_by_id("recent")
+
+    first, second, recent = asyncio.run(run())
+    assert [expired.id for expired in first] == ["late_1", "late_2"]
+    assert [expired.id for expired in second] == ["late_3"]
+    assert all(expired.status == Expired().get_status() and expired.version == 1 for expired in first + second)
+    assert recent.status == Accepted().get_status()
+
+def test_the_sweep_expires_in_batches_and_dispatches_every_side_effect():
+    database = MockBase()
+    for index in range(5):
+        asyncio.run(database.store_reservation(reservation(f"{index}", Accepted().get_status(), past(30 + index))))
+    asyncio.run(database.store_reservation(reservation("recent", Accepted().get_status(), past(1))))
+    stats, points = RecordedStats(), RecordedPoints()
+
+    expired = asyncio.run(provider_over(database, stats, points).expire_reservations(batch_size=2))
+
+    assert expired == 5
+    assert sorted(update.id for update in stats.updates) == ["0", "1", "2", "3", "4"]
+    assert len(points.points) == 5
+    assert [stored.status for stored in database.base].count(Expired().get_status()) == 5
+
+def test_listing_reservations_does_not_write():
+    database = MockBase()
+    asyncio.run(database.store_reservation(reservation("late", Accepted().get_status(), past(60))))
+    stats = RecordedStats()
+    provider = provider_over(database, stats, RecordedPoints())
+
+    result = asyncio.run(provider.get_reservations(ReservationQuery(venue="venue")))
+
+    assert result.result[0].status.get_status() == Expired().get_status()
+    assert database.base[0].status == Accepted().get_status()
+    assert stats.updates == []
+
+class CountingProvider:
+
+    def __init__(self):
+        self.sweeps = 0
+
+    async def expire_reservations(self, batch_size: int) -> int:
+        self.sweeps += 1
+        return 0
+
+def test_the_sweeper_runs_until_stopped():
+    provider = CountingProvider()
+    sweeper = ExpirySweeper(provider, 0.01, 10) # type: ignore
+
+    async def run():
+        sweeper.start()
+        await asyncio.sleep(0.05)
+        await sweeper.stop()
+        sweeps = provider.sweeps
+        await asyncio.sleep(0.03)
+        return sweeps
+
+    sweeps = asyncio.run(run())
+    assert sweeps >= 2
+    assert provider.sweeps == sweeps
@@ -1,11 +1,15 @@
 
 
 import asyncio
+import pytest
 from datetime import datetime
 from typing import List
 from src.model.opinions.data.base import MockedOpinionsDB
+from src.model.opinions.opinion import Opinion
 from src.model.opinions.provider import LocalOpinionsProvider
-from src.model.reservations.data.base import MockBase
+from src.model.commons.session import create_engine
+from src.model.reservations.data.base import MockBase, RelBase
+from src.model.reservations.data.query import get_builder
 from src.model.reservations.data.schema import ReservationSchema
 from src.model.reservations.reservation import Reservation, Uncomfirmed, create_reservation
 from src.model.reservations.reservationQuery import ReservationQuery, ReservationResponse
@@ -58,7 +62,7 @@ def test_get_all_by_one_user():
     database = MockBase()
     opinions = LocalOpinionsProvider(MockedOpinionsDB(), None )
     for reservation in create_reservations(9):
-        database.store_reservation(reservation)
+        asyncio.run(database.store_reservation(reservation))
     query = ReservationQuery(
             user="user_0"
             )
@@ -72,7 +76,7 @@ def test_get_all_by_one_venue():
     database = MockBase()
     opinions = LocalOpinionsProvider(MockedOpinionsDB(), None)
     for reservation in create_reservations(9):
-        database.store_reservation(reservation)
+        asyncio.run(database.store_reservation(reservation))
     query = ReservationQuery(
             venue="venue_1"
             )
@@ -84,7 +88,7 @@ def test_limiting_the_amount_of_reservations():
     database = MockBase()
     opinions = LocalOpinionsProvider(MockedOpinionsDB(), None)
     for reservation in create_reservations(9):
-        database.store_reservation(reservation)
+        asyncio.run(database.store_reservation(reservation))
     query = ReservationQuery(
             venue="venue_1",
             limit=2
@@ -97,7 +101,7 @@ def test_stepping_with_limit_the_amount_of_reservations():
     database = MockBase()
     opinions = LocalOpinionsProvider(MockedOpinionsDB(), None)
     for reservation in create_reservations(9):
-        database.store_reservation(reservation)
+        asyncio.run(database.store_reservation(reservation))
     query = ReservationQuery(
             venue="venue_1",
             limit=2
@@ -108,3 +112,138 @@ def test_stepping_with_limit_the_amount_of_reservations():
     assert result_1.total == 2
     assert result_2.total == 2
     assert all_different(result_1.result, result_2.result)
+
+class CountingUsers(LocalUsersProvider):
+
+    def __init__(self):
+        super().__init__(None, DBMock({}, {}), None) # type: ignore
+        self.batches = 0
+        self.single = 0
+
+    async def get_users(self, users):
+        self.batches += 1
+        return await super().get_users(users)
+
+    async def get_user(self, user):
+        self.single += 1
+        return await super().get_user(user)
+
+def test_users_are_recovered_in_one_batch():
+    database = MockBase()
+    opinions = LocalOpinionsProvider(MockedOpinionsDB(), None)
+    for reservation in create_reservations(9):
+        asyncio.run(database.store_reservation(reservation))
+    users = CountingUsers()
+    result = asyncio.run(ReservationQuery(limit=9).query(database, opinions, users))
+    assert len(result.result) == 9
+    assert users.batches == 1
+    assert users.single == 0
+    assert all(reservation.user.id.startswith("user_") for reservation in result.result)
+
+def test_cursor_pages_walk_every_reservation_once(tmp_path):
+    pytest.importorskip("aiosqlite")
+    conn_string = f"sqlite:///{tmp_path / 'reservations.db'}"
+    engine = create_engine(conn_string, "schema")
+    database = RelBase(conn_string)
+    builder = get_builder(database)
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(ReservationSchema.metadata.create_all)
+        await engine.dispose()
+        for reservation in create_reservations(12):
+            reservation.time = datetime(2024, 1, 1 + int(reservation.id) // 6)
+            await database.store_reservation(reservation)
+        pages = [await builder.get(None, None, None, "venue_0", None, None, 4, 0)]
+        while pages[-1].next_cursor:
+            pages.append(await builder.get(None, None, None, "venue_0", None, None, 4, 0, cursor=pages[-1].next_cursor))
+        return pages
+
+    pages = asyncio.run(run())
+    ids = [reservation.id for page in pages for reservation in page.result]
+    assert pages[0].total == 6
+    assert all(page.total is None for page in pages[1:])
+    assert sorted(ids) == sorted(f"{i}" for i in range(0, 12, 2))
+    assert len(ids) == len(set(ids))
+
+def test_attendance_of_a_page_is_counted_in_one_grouped_query(tmp_path):
+    pytest.importorskip("aiosqlite")
+    conn_string = f"sqlite:///{tmp_path / 'reservations.db'}"
+    engine = create_engine(conn_string, "schema")
+    database = RelBase(conn_string)
+    statuses = ["Assisted", "Assisted", "Expired", "Accepted", "Assisted", "Expired"]
+    users = ["user/a", "user/a", "user/a", "user/a", "user/b", "user/a"]
+    venues = ["venue_0", "venue_0", "venue_0", "venue_0", "venue_0", "venue_1"]
+
+    async def run():
+        async with engine.begin() as connection:
+            await connection.run_sync(ReservationSchema.metadata.create_all)
+        await engine.dispose()
+        for index, (user, venue, status) in enumerate(zip(users, venues, statuses)):
+            await database.store_reservation(ReservationSchema(id=f"{index}", user=user, venue=venue, time=datetime(2024, 1, index + 1), people=2, status=status))
+        return await database.count_by_status([("user/a", "venue_0"), ("user/b", "venue_0"), ("user/c", "venue_0")], ["Assisted", "Expired"])
+
+    counts = asyncio.run(run())
+    assert counts == {
+        ("user/a", "venue_0"): {"Assisted": 2, "Expired": 1},
+        ("user/b", "venue_0"): {"Assisted": 1}
+    }
+
+class CountingBase(MockBase):
+
+    def __init__(self):
+        super().__init__()
+        self.aggregates = 0
+
+    async def count_by_status(self, pairs, statuses):
+        self.aggregates += 1
+        return await super().count_by_status(pairs, statuses)
+
+def test_query_enriches_the_page_with_one_aggregate():
+    database = CountingBase()
+    opinions = LocalOpinionsProvider(MockedOpinionsDB(), None)
+    for reservation in create_reservations(9):
+        reservation.status = "Assisted"
+        asyncio.run(database.store_reservation(reservation))
+    query = ReservationQuery(venue="venue_1", limit=10)
+    result = asyncio.run(query.query(database, opinions, get_mocked_users()))
+    assert database.aggregates == 1
+    assert len(result.result) == 4
+
+class CountingOpinions(LocalOpinionsProvider):
+
+    def __init__(self):
+        super().__init__(MockedOpinionsDB(), None) # type: ignore
+        self.calls = 0
+
+    async def get_by_reservations(self, reservations: List[str]) -> List[Opinion]:
+        self.calls += 1
+        return await super().get_by_reservations(reservations)
+
+def test_the_opinions_of_a_page_are_recovered_with_one_call():
+    database = MockBase()
+    opinions = CountingOpinions()
+    for reservation in create_reservations(6):
+        asyncio.run(database.store_reservation(reservation))
+    for reservation in ["0", "2"]:
+        asyncio.run(opinions.create_opinion(Opinion(venue="venue_0", reservation=reservation, date=datetime.now(), opinion="Good")))
+
+    result = asyncio.run(ReservationQuery(venue="venue_0").query(database, opinions, get_mocked_users()))
+
+    assert opinions.calls == 1
+    assert sorted(result.opinions.keys()) == ["0", "2"]
+
+def test_a_listing_without_user_and_opinions_fields_skips_their_lookups():
+    database = MockBase()
+    opinions = CountingOpinions()
+    users = CountingUsers()
+    for reservation in create_reservations(4):
+        asyncio.run(database.store_reservation(reservation))
+
+    result = asyncio.run(ReservationQuery(venue="venue_0", fields=["id", "time"]).query(database, opinions, users))
+
+    assert len(result.result) == 2
+    assert all(reservation.user is None for reservation in result.result)
+    assert result.opinions == {}
+    assert opinions.calls == 0
+    assert users.batches == 0 and users.single == 0
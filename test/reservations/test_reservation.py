@@ -3,11 +3,14 @@ from datetime import datetime,timezone
 import pytest
 from src.model.opinions.data.base import MockedOpinionsDB
 from src.model.opinions.provider import LocalOpinionsProvider
-from src.model.reservations.data.base import MockBase
+from fastapi import Response, status
+from src.model.commons.error import Error
+from src.model.commons.session import create_engine
+from src.model.reservations.data.base import MockBase, RelBase
 from src.model.reservations.reservation import CreateInfo
 from src.model.reservations.data.schema import ReservationSchema
 from src.model.reservations.reservation import Accepted, Canceled, Reservation, Uncomfirmed, create_reservation
-from src.model.reservations.service import LocalReservationsProvider
+from src.model.reservations.service import LocalReservationsProvider, ReservationsService
 from src.model.reservations.update import Update
 from src.model.reservations.reservationQuery import ReservationQuery
 from src.model.stats.data.base import MockedStatsDB
@@ -71,8 +74,8 @@ def test_after_persisting_a_reservation_it_can_be_recovered_with_its_id():
     reservation = create_reservation("user", "venue", datetime.now(), 9)
     base = MockBase()
 
-    base.store_reservation(reservation.persistance())
-    result = base.get_reservation_by_id(reservation.id)
+    asyncio.run(base.store_reservation(reservation.persistance()))
+    result = asyncio.run(base.get_reservation_by_id(reservation.id))
     assert result != None
     assert result.id == reservation.id
 
@@ -80,11 +83,11 @@ def test_after_persisting_a_reservation_it_can_be_recovered_with_its_id():
 def test_after_deleting_a_reservation_it_can_no_longer_be_recovered():
     reservation = create_reservation("user", "venue", datetime.now(), 2)
     base = MockBase()
-    base.store_reservation(reservation.persistance())
+    asyncio.run(base.store_reservation(reservation.persistance()))
 
     #Deleting the reservation
-    Reservation.delete(reservation.id, base)
-    assert base.get_reservation_by_id(reservation.id) == None
+    asyncio.run(Reservation.delete(reservation.id, base))
+    assert asyncio.run(base.get_reservation_by_id(reservation.id)) == None
 
 def test_a_reservation_cannot_be_done_if_the_venue_does_not_exists():
     database = MockBase()
@@ -132,3 +135,43 @@ def test_a_reservation_is_done_if_the_venue_does_exist():
     reservation_venue_id = asyncio.run(service.get_reservations(ReservationQuery())).result.pop().venue
 
     assert reservation_venue_id == id
+
+def test_updates_only_apply_over_the_version_they_read(tmp_path):
+    pytest.importorskip("aiosqlite")
+    conn_string = f"sqlite:///{tmp_path / 'reservations.db'}"
+    database = RelBase(conn_string)
+    reservation = create_reservation("user", "venue", datetime(2024, 5, 17, 21), 4).persistance()
+
+    async def run():
+        engine = create_engine(conn_string, "schema")
+        async with engine.begin() as connection:
+            await connection.run_sync(ReservationSchema.metadata.create_all)
+        await engine.dispose()
+        await database.store_reservation(reservation)
+        accepted = ReservationSchema(id=reservation.id, user="user", venue="venue", time=reservation.time, people=4, status=Accepted().get_status())
+        canceled = ReservationSchema(id=reservation.id, user="user", venue="venue", time=reservation.time, people=4, status=Canceled().get_status())
+        first = await database.update_reservation(accepted, 0)
+        stale = await database.update_reservation(canceled, 0)
+        return first, stale, await database.get_reservation_by_id(reservation.id)
+
+    first, stale, stored = asyncio.run(run())
+    assert first.status == Accepted().get_status()
+    assert first.version == 1
+    assert stale is None
+    assert stored.status == Accepted().get_status()
+
+class ConcurrentBase(MockBase):
+
+    async def update_reservation(self, reservation: ReservationSchema, version: int) -> ReservationSchema | None:
+        return None
+
+def test_a_conflicting_update_is_reported_as_a_conflict():
+    database = ConcurrentBase()
+    stats = MockedStatsDB()
+    reservation = create_reservation("user", "venue", datetime.now(), 2).persistance()
+    asyncio.run(database.store_reservation(reservation))
+    provider = LocalReservationsProvider(database, None, None, LocalStatsProvider(stats), None, get_mocked_users()) # type: ignore
+    response = Response()
+    result = asyncio.run(ReservationsService(provider).update_reservation(reservation.id, Update(cancel=True, user="user/user"), response))
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert isinstance(result, Error)
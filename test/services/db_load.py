@@ -8,7 +8,7 @@ from sqlalchemy import ForeignKey, UniqueConstraint
 import yaml
 from sqlalchemy import String, ARRAY, DateTime
 import datetime
-from typing import List
+from typing import List, Optional
 TYPES_KEY = 'usertypes'
 ENDPOINTS_KEY = 'endpoints'
 
@@ -40,6 +40,8 @@ class VenueSchema(Base):
     reservationLeadTime: Mapped[int] = mapped_column()
     menu: Mapped[str] = mapped_column()
     status: Mapped[str] = mapped_column()
+    lat: Mapped[Optional[float]] = mapped_column(nullable=True)
+    lon: Mapped[Optional[float]] = mapped_column(nullable=True)
 
     def __repr__(self) -> str:
         return (f"Venue(id={self.id}, name={self.name}, location={self.location}, "
@@ -48,6 +50,22 @@ class VenueSchema(Base):
                 f"characteristics={self.characteristics}), features={self.features}),vacations={self.vacations}), "
                 f"reservationLeadTime={self.reservationLeadTime}), menu={self.menu},status={self.status}")
 
+class VenueChangeSchema(Base):
+    __tablename__ = "venue_changes"
+
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    venue_id: Mapped[str] = mapped_column()
+    op: Mapped[str] = mapped_column()
+    at: Mapped[datetime.datetime] = mapped_column(DateTime)
+
+
+class VenueVersionSchema(Base):
+    __tablename__ = "venue_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column()
+
+
 class ReservationSchema(Base):
     __tablename__ = "reservations"
 
@@ -57,6 +75,7 @@ class ReservationSchema(Base):
     time: Mapped[str] = mapped_column()
     people: Mapped[int] = mapped_column()
     status: Mapped[str] = mapped_column()
+    version: Mapped[int] = mapped_column(default=0)
 
     def __repr__(self) -> str:
         return f"{self.id}:{self.user}:{self.venue}/at:{self.time}/for:{self.people}/{self.status}"
@@ -26,8 +26,8 @@ async def test_reservation_persistance():
         run('db_config.yaml', connection=postgres.get_connection_url())
         reservation = create_reservation(user="user",venue="venus",time=datetime.now(),people=3)
         database = RelBase(conn_string=postgres.get_connection_url())
-        database.store_reservation(reservation.persistance())
-        result = database.get_reservation_by_id(reservation.id)
+        await database.store_reservation(reservation.persistance())
+        result = await database.get_reservation_by_id(reservation.id)
         assert result != None
         assert result.id == reservation.id
 
@@ -37,13 +37,13 @@ async def test_reservation_update():
         run('db_config.yaml', connection=postgres.get_connection_url())
         reservation = create_reservation(user="user", venue="venue",time=datetime.now(),people=4)
         database = RelBase(conn_string=postgres.get_connection_url())
-        database.store_reservation(reservation.persistance())
+        await database.store_reservation(reservation.persistance())
         update = Update(user="user/venue", advance_forward=True)
         stats = LocalStatsProvider(MockedStatsDB())
         points = LocalPointsProvider(MockedPointBase())
         reservation = await update.modify(reservation, stats, points)
-        database.update_reservation(reservation.persistance())
-        result = database.get_reservation_by_id(reservation.id)
+        await database.update_reservation(reservation.persistance(), 0)
+        result = await database.get_reservation_by_id(reservation.id)
         assert result != None
         assert result.status == Accepted().get_status()
 
@@ -53,10 +53,10 @@ async def test_reservation_deletion():
         run('db_config.yaml', connection=postgres.get_connection_url())
         reservation = create_reservation(user="user", venue="venue",time=datetime.now(),people=4)
         database = RelBase(conn_string=postgres.get_connection_url())
-        database.store_reservation(reservation.persistance())
+        await database.store_reservation(reservation.persistance())
 
-        Reservation.delete(reservation.id, database)
-        assert database.get_reservation_by_id(reservation.id) == None
+        await Reservation.delete(reservation.id, database)
+        assert await database.get_reservation_by_id(reservation.id) == None
 
 @pytest.mark.asyncio
 async def test_reservation_pagination():
@@ -66,7 +66,7 @@ async def test_reservation_pagination():
         opinions = LocalOpinionsProvider(MockedOpinionsDB(), None) #type: ignore
         database = RelBase(conn_string=postgres.get_connection_url())
         for reservation in reservations:
-            database.store_reservation(reservation)
+            await database.store_reservation(reservation)
 
         query = ReservationQuery(
                 user="user_1",
@@ -91,7 +91,7 @@ async def test_reservation_query_by_various_states():
         database = RelBase(conn_string=postgres.get_connection_url())
         opinions = LocalOpinionsProvider(MockedOpinionsDB(), None) #type: ignore
         for reservation in reservations:
-            database.store_reservation(reservation)
+            await database.store_reservation(reservation)
         query = ReservationQuery(
             user="user_1",
             venue="venue_1",
@@ -101,11 +101,11 @@ async def test_reservation_query_by_various_states():
         result = await query.query(database, opinions, get_mocked_users())
         for reservation in result.result:
             reservation.status = Accepted()
-            database.update_reservation(reservation.into_reservation().persistance())
+            await database.update_reservation(reservation.into_reservation().persistance(), 0)
         result = await query.query(database, opinions, get_mocked_users())
         for reservation in result.result:
             reservation.status = Assisted()
-            database.update_reservation(reservation.into_reservation().persistance())
+            await database.update_reservation(reservation.into_reservation().persistance(), 0)
 
         query_final = ReservationQuery(
             venue="venue_1",
@@ -21,17 +21,30 @@ async def test_postgres():
 
        users_service = LocalUsersProvider(firebase, database, None) # type: ignore
        assert await users_service.is_allowed(AuthRequest(endpoint="/docs", id_token="anonymous")) == status.HTTP_200_OK
-       database.insert_user(User(uid="User_1", email="user1@mail.com", user_type="client"),
+       await database.insert_user(User(uid="User_1", email="user1@mail.com", user_type="client"),
                             AssociatedData(uid="User_1", name="User One", phone_number="123456789"))
        update = UserUpdate(
                 name="jaimito suarez",
                 phone="87654321"
                 )
        await database.update_data("User_1", update)
-       _, updated = database.get_user("User_1")
+       _, updated = await database.get_user("User_1")
        assert updated.name == "jaimito suarez" #type: ignore
        assert updated.phone_number == "87654321" #type: ignore
         
 
 
 
+
+@pytest.mark.asyncio
+async def test_get_users_in_batch():
+    with PostgresContainer('postgres:16') as postgres:
+       Base.metadata.create_all(create_engine(postgres.get_connection_url()))
+       run('db_config.yaml', connection=postgres.get_connection_url()) 
+       database = DBEngine(conn_string=postgres.get_connection_url())
+       for i in range(3):
+           await database.insert_user(User(uid=f"User_{i}", email=f"user{i}@mail.com", user_type="client"),
+                                AssociatedData(uid=f"User_{i}", name=f"User {i}", phone_number="123456789"))
+       result = await database.get_users(["User_0", "User_2", "Missing"])
+       assert sorted(user.uid for user, _ in result) == ["User_0", "User_2"]
+       assert all(user.uid == data.uid for user, data in result)
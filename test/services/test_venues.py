@@ -15,8 +15,8 @@ async def test_venue_persistance():
         venue = create_venue(name="La Pizzerias", location="126 Main St", capacity=51, logo="foto.url", pictures = ["foto1", "foto2"], slots=[datetime.now()], characteristics= ["Arepas", "Cafeteria"], features= ["Estacionamiento"], vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url")
         database = RelBase(conn_string=postgres.get_connection_url())
         venue_with_id=venue.persistance()
-        database.store_venue(venue_with_id)
-        result = database.get_venue_by_id(venue.id)
+        await database.store_venue(venue_with_id)
+        result = await database.get_venue_by_id(venue.id)
         assert result != None
         assert result.id == venue.id
 
@@ -27,12 +27,12 @@ async def test_venue_update():
         venue = create_venue(name="La Pizzerias", location="126 Main St", capacity=51, logo="foto.url", pictures = ["foto1", "foto2"],slots=[datetime.now(),datetime.now()], characteristics= ["Arepas", "Cafeteria"], features= ["Estacionamiento"], vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url")
         database = RelBase(conn_string=postgres.get_connection_url())
         venue_with_id=venue.persistance()
-        database.store_venue(venue_with_id)
+        await database.store_venue(venue_with_id)
         update = Update(name="La Pizzeria Updated")
         venue = update.modify(venue)
         venue_with_id=venue.persistance()
-        database.update_venue(venue_with_id)
-        result = database.get_venue_by_id(venue_with_id.id)
+        await database.update_venue(venue_with_id)
+        result = await database.get_venue_by_id(venue_with_id.id)
         assert result != None
         assert result.id == venue_with_id.id
         assert result.name == "La Pizzeria Updated"
@@ -46,16 +46,16 @@ async def test_venue_pagination():
         venues = create_venues(99) 
         database = RelBase(conn_string=postgres.get_connection_url())
         for venue in venues:
-            database.store_venue(venue)
+            await database.store_venue(venue)
 
         query = VenueQuery(
                 limit=5
                 )
-        result_1 = query.query(database)
+        result_1 = await query.query(database)
         query.start=5
-        result_2 = query.query(database)
+        result_2 = await query.query(database)
         query.start=10
-        result_3= query.query(database)
+        result_3= await query.query(database)
         assert result_1.total == result_2.total == result_3.total == 99
         assert len(result_1.result) == len(result_2.result) == len(result_3.result) == 5
         assert all_different(result_1.result, result_2.result)
@@ -68,10 +68,10 @@ async def test_venue_deletion():
         run('db_config.yaml', connection=postgres.get_connection_url()) 
         venue = create_venue("La Pizzerias", "126 Main St", 51, logo="foto.url", pictures = ["foto1", "foto2"], slots=[datetime.now()], characteristics= ["Arepas", "Cafeteria"], features= ["Estacionamiento"], vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url")
         database = RelBase(conn_string=postgres.get_connection_url())
-        database.store_venue(venue.persistance())
-        assert database.get_venue_by_id(venue.id) != None
-        Venue.delete(venue.id, database)
-        assert database.get_venue_by_id(venue.id) == None
+        await database.store_venue(venue.persistance())
+        assert await database.get_venue_by_id(venue.id) != None
+        await Venue.delete(venue.id, database)
+        assert await database.get_venue_by_id(venue.id) == None
 
 @pytest.mark.asyncio
 async def test_venue_filter():
@@ -80,7 +80,7 @@ async def test_venue_filter():
         venues = create_venues(99) 
         database = RelBase(conn_string=postgres.get_connection_url())
         for venue in venues:
-            database.store_venue(venue)
+            await database.store_venue(venue)
 
         query = VenueQuery(
                 name="name_1",
@@ -88,7 +88,7 @@ async def test_venue_filter():
                 features= ["Estacionamiento"], 
                 
                 )
-        result_1 = query.query(database)
+        result_1 = await query.query(database)
         
         assert result_1.total ==  33
         
@@ -74,23 +74,23 @@ def get_mocked_auth() -> fb.FirebaseAuth:
 async def test_unregistered_user_is_anonymous():
     data = ud.UserData(localid='someId', email='mail@mail.com', name="", phone_number="")
     db = get_mocked_base()
-    assert data.get_type(db) == 'anonymous'
+    assert await data.get_type(db) == 'anonymous'
 
 @pytest.mark.asyncio
 async def test_registered_user_is_not_anonymous():
    auth = get_mocked_auth()
    db = get_mocked_base()
    data = await ud.recover_data('user_1', auth, db)
-   assert data.get_type(db) != 'anonymous'
+   assert await data.get_type(db) != 'anonymous'
 
 @pytest.mark.asyncio
 async def test_registering_a_new_valid_user_makes_it_no_longer_anonymous():
     auth = get_mocked_auth()
     db = get_mocked_base()
     data = await ud.recover_data('user_not_in_base', auth, db)
-    assert data.get_type(db) == 'anonymous'
-    data.insert_into('client', db)
-    assert data.get_type(db) == 'client'
+    assert await data.get_type(db) == 'anonymous'
+    await data.insert_into('client', db)
+    assert await data.get_type(db) == 'client'
 
 @pytest.mark.asyncio
 async def test_anonymous_user_canot_call_a_non_anonymous_endpoint():
@@ -98,9 +98,9 @@ async def test_anonymous_user_canot_call_a_non_anonymous_endpoint():
     auth = get_mocked_auth()
     data = await ud.recover_data('user_not_in_base', auth, db)
     
-    assert not data.allowed_to('/restaurant-allowed', db)
-    assert not data.allowed_to('/client-allowed', db)
-    assert not data.allowed_to('/both-allowed', db)
+    assert not await data.allowed_to('/restaurant-allowed', db)
+    assert not await data.allowed_to('/client-allowed', db)
+    assert not await data.allowed_to('/both-allowed', db)
 
 @pytest.mark.asyncio
 async def test_client_user_canot_call_restaurant_endpoint():
@@ -108,7 +108,7 @@ async def test_client_user_canot_call_restaurant_endpoint():
     auth = get_mocked_auth()
     data = await ud.recover_data('user_2', auth, db)
 
-    assert not data.allowed_to('/restaurant-allowed', db)
+    assert not await data.allowed_to('/restaurant-allowed', db)
 
 @pytest.mark.asyncio
 async def test_restaurant_user_cannot_call_client_endpoint():
@@ -116,7 +116,7 @@ async def test_restaurant_user_cannot_call_client_endpoint():
     auth = get_mocked_auth()
     data = await ud.recover_data('user_1', auth, db)
 
-    assert not data.allowed_to('/client-allowed', db)
+    assert not await data.allowed_to('/client-allowed', db)
 
 @pytest.mark.asyncio
 async def test_all_allowed_to_anonymous_endpoints():
@@ -126,9 +126,9 @@ async def test_all_allowed_to_anonymous_endpoints():
     restaurant = await ud.recover_data('user_1', auth, db)
     anonymous = await ud.recover_data('user_not_in_base', auth, db)
 
-    assert client.allowed_to('/all-allowed', db)
-    assert restaurant.allowed_to('/all-allowed', db)
-    assert anonymous.allowed_to('/all-allowed', db)
+    assert await client.allowed_to('/all-allowed', db)
+    assert await restaurant.allowed_to('/all-allowed', db)
+    assert await anonymous.allowed_to('/all-allowed', db)
    
 @pytest.mark.asyncio
 async def test_client_and_restaurant_can_call_both_endpoint():
@@ -137,8 +137,8 @@ async def test_client_and_restaurant_can_call_both_endpoint():
     client = await ud.recover_data('user_2', auth, db)
     restaurant = await ud.recover_data('user_1', auth, db)
     
-    assert client.allowed_to('/both-allowed', db)
-    assert restaurant.allowed_to('/both-allowed', db)
+    assert await client.allowed_to('/both-allowed', db)
+    assert await restaurant.allowed_to('/both-allowed', db)
 
 @pytest.mark.asyncio
 async def test_updating_user_data():
@@ -160,3 +160,10 @@ async def test_updating_user_data():
     assert recovered.name == new_name
     assert recovered.phone_number == new_phone
 
+
+def test_get_users_returns_every_requested_user_once():
+    from src.model.users.service import LocalUsersProvider
+    provider = LocalUsersProvider(get_mocked_auth(), get_mocked_base(), None) # type: ignore
+    result = asyncio.run(provider.get_users(["user_1", "user_2", "user_1"]))
+    assert [user.localid for user in result] == ["user_1", "user_2"]
+    assert result[0].name == "User One"
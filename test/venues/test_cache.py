@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from src.model.commons.cache import LRUCache
+from src.model.commons.session import reads_primary
+from src.model.venues.data.base import MockBase
+from src.model.venues.data.schema import VenueSchema
+from src.model.venues.service import LocalVenuesProvider
+from src.model.venues.update import Update
+from src.model.venues.venue import CreateInfo, Venue
+from src.model.venues.venueQuery import VenueQuery
+
+
+class CountingBase(MockBase):
+
+    def __init__(self):
+        super().__init__()
+        self.lookups: List[str] = []
+
+    async def get_venue_by_id(self, id: str) -> Optional[VenueSchema]:
+        self.lookups.append(id)
+        return await super().get_venue_by_id(id)
+
+def venue_info() -> CreateInfo:
+    return CreateInfo(id="", name="La Pizzeria", location="-34.6,-58.45", capacity=50, logo="foto.url", pictures=["foto1"],
+                      slots=[datetime.now()], characteristics=["Arepas"], features=["Estacionamiento"],
+                      vacations=[datetime.now()], reservationLeadTime=10, menu="comidas.url")
+
+def cached_provider() -> LocalVenuesProvider:
+    return LocalVenuesProvider(CountingBase(), cache=LRUCache[Venue](8, ttl=60))
+
+def test_repeated_lookups_by_id_are_served_from_the_cache():
+    provider = cached_provider()
+    venue = asyncio.run(provider.create_venue(venue_info()))
+
+    first = asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+    second = asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+
+    assert first == second
+    assert second.total == 1
+    assert provider.db.lookups == [venue.id] # type: ignore
+    assert (provider.cache.hits, provider.cache.misses) == (1, 1) # type: ignore
+
+def test_updates_and_deletes_invalidate_the_cached_venue():
+    provider = cached_provider()
+    venue = asyncio.run(provider.create_venue(venue_info()))
+    asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+
+    asyncio.run(provider.update_venue(venue.id, Update(name="La Trattoria")))
+    renamed = asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+    asyncio.run(provider.delete_venue(venue.id))
+    deleted = asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+
+    assert renamed.result[0].name == "La Trattoria"
+    assert deleted.result == [] and deleted.total == 0
+
+def test_missing_venues_are_not_cached():
+    provider = cached_provider()
+    asyncio.run(provider.get_venues(VenueQuery(id="missing")))
+    assert len(provider.cache) == 0 # type: ignore
+
+class PrimaryTrackingBase(MockBase):
+
+    def __init__(self):
+        super().__init__()
+        self.primary: List[bool] = []
+
+    async def get_venue_by_id(self, id: str) -> Optional[VenueSchema]:
+        self.primary.append(reads_primary())
+        return await super().get_venue_by_id(id)
+
+def test_updates_read_the_venue_from_the_primary():
+    provider = LocalVenuesProvider(PrimaryTrackingBase())
+    venue = asyncio.run(provider.create_venue(venue_info()))
+    asyncio.run(provider.update_venue(venue.id, Update(name="La Trattoria")))
+    asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+    assert provider.db.primary == [True, False] # type: ignore
+
+class PausingBase(PrimaryTrackingBase):
+
+    def __init__(self):
+        super().__init__()
+        self.pause: Optional[asyncio.Event] = None
+
+    async def get_venue_by_id(self, id: str) -> Optional[VenueSchema]:
+        schema = await super().get_venue_by_id(id)
+        pause, self.pause = self.pause, None
+        if pause is not None:
+            await pause.wait()
+        return schema
+
+def test_cache_misses_are_loaded_from_the_primary():
+    provider = LocalVenuesProvider(PrimaryTrackingBase(), cache=LRUCache[Venue](8, ttl=60))
+    venue = asyncio.run(provider.create_venue(venue_info()))
+    asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+    asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+    assert provider.db.primary == [True] # type: ignore
+
+def test_a_lookup_raced_by_an_update_is_not_cached():
+    provider = LocalVenuesProvider(PausingBase(), cache=LRUCache[Venue](8, ttl=60))
+    venue = asyncio.run(provider.create_venue(venue_info()))
+
+    async def run():
+        provider.db.pause = asyncio.Event() # type: ignore
+        paused = provider.db.pause # type: ignore
+        lookup = asyncio.create_task(provider.get_venues(VenueQuery(id=venue.id)))
+        await asyncio.sleep(0.01)
+        await provider.update_venue(venue.id, Update(name="La Trattoria"))
+        paused.set()
+        return await lookup
+
+    stale = asyncio.run(run())
+    fresh = asyncio.run(provider.get_venues(VenueQuery(id=venue.id)))
+
+    assert stale.result[0].name == "La Pizzeria"
+    assert fresh.result[0].name == "La Trattoria"
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Tuple
+from src.model.venues.changes import CREATED, DELETED, UPDATED, VenueChange, VenueChanges
+from src.model.venues.data.base import MockBase
+from src.model.venues.replica import VenueReplica
+from src.model.venues.service import LocalVenuesProvider
+from src.model.venues.update import Update
+from src.model.venues.venue import CreateInfo
+from src.model.venues.venueQuery import VenueQueryResult
+
+
+def venue_info() -> CreateInfo:
+    return CreateInfo(id="", name="La Pizzeria", location="-34.6,-58.45", capacity=50, logo="foto.url", pictures=["foto1"],
+                      slots=[datetime.now()], characteristics=["Arepas"], features=["Estacionamiento"],
+                      vacations=[datetime.now()], reservationLeadTime=10, menu="comidas.url")
+
+class StaticFeed:
+
+    def __init__(self, version: int):
+        self.version = version
+        self.calls: List[Tuple[Optional[int], float]] = []
+
+    async def __call__(self, since: Optional[int], wait: float) -> VenueChanges:
+        self.calls.append((since, wait))
+        await asyncio.sleep(wait)
+        return VenueChanges(changes=[], version=self.version)
+
+def found(name: str) -> VenueQueryResult:
+    return VenueQueryResult(result=[], total=1, next_cursor=name)
+
+def test_every_write_records_a_change_in_order():
+    provider = LocalVenuesProvider(MockBase())
+
+    async def run():
+        venue = await provider.create_venue(venue_info())
+        await provider.update_venue(venue.id, Update(name="La Trattoria"))
+        await provider.delete_venue(venue.id)
+        return venue, await provider.get_changes(1), await provider.get_changes(None)
+
+    venue, after_create, latest = asyncio.run(run())
+
+    assert after_create.changes == [VenueChange(version=2, venue_id=venue.id, op=UPDATED),
+                                    VenueChange(version=3, venue_id=venue.id, op=DELETED)]
+    assert after_create.version == 3
+    assert latest == VenueChanges(changes=[], version=3)
+    assert provider.db.changes[0].op == CREATED # type: ignore
+
+def test_a_waiting_reader_is_woken_up_by_a_write():
+    provider = LocalVenuesProvider(MockBase())
+
+    async def run():
+        waiting = asyncio.create_task(provider.get_changes(0, wait=5))
+        await asyncio.sleep(0.01)
+        venue = await provider.create_venue(venue_info())
+        return venue, await asyncio.wait_for(waiting, 1)
+
+    venue, feed = asyncio.run(run())
+
+    assert feed.changes == [VenueChange(version=1, venue_id=venue.id, op=CREATED)]
+
+def test_an_idle_feed_answers_the_current_version_after_the_wait():
+    provider = LocalVenuesProvider(MockBase())
+    feed = asyncio.run(provider.get_changes(0, wait=0.05))
+    assert feed == VenueChanges(changes=[], version=0)
+
+def test_the_replica_is_bypassed_until_it_follows_the_feed():
+    replica = VenueReplica(StaticFeed(3), 8)
+    loads = []
+
+    async def load():
+        loads.append("venue")
+        return found("first")
+
+    asyncio.run(replica.get("venue", load))
+    replica.apply(VenueChanges(changes=[], version=3))
+    asyncio.run(replica.get("venue", load))
+    cached = asyncio.run(replica.get("venue", load))
+
+    assert loads == ["venue", "venue"]
+    assert cached == found("first")
+
+def test_changing_a_returned_venue_does_not_change_the_replica():
+    replica = VenueReplica(StaticFeed(3), 8)
+    replica.apply(VenueChanges(changes=[], version=3))
+
+    async def load():
+        return {"result": [{"name": "La Pizzeria"}], "total": 1}
+
+    loaded = asyncio.run(replica.get("venue", load))
+    loaded["result"].pop()
+    hit = asyncio.run(replica.get("venue", load))
+    hit["result"].pop()
+    again = asyncio.run(replica.get("venue", load))
+
+    assert again == {"result": [{"name": "La Pizzeria"}], "total": 1}
+
+def test_changes_in_the_feed_invalidate_the_replica():
+    replica = VenueReplica(StaticFeed(3), 8)
+    replica.apply(VenueChanges(changes=[], version=3))
+    asyncio.run(replica.get("venue", lambda: asyncio.sleep(0, found("first"))))
+
+    replica.apply(VenueChanges(changes=[VenueChange(version=4, venue_id="venue", op=UPDATED)], version=4))
+    reloaded = asyncio.run(replica.get("venue", lambda: asyncio.sleep(0, found("second"))))
+
+    assert reloaded == found("second")
+    assert replica.version == 4
+
+def test_a_load_raced_by_a_change_is_not_kept():
+    replica = VenueReplica(StaticFeed(3), 8)
+    replica.apply(VenueChanges(changes=[], version=3))
+
+    async def stale():
+        replica.apply(VenueChanges(changes=[VenueChange(version=4, venue_id="venue", op=UPDATED)], version=4))
+        return found("stale")
+
+    asyncio.run(replica.get("venue", stale))
+
+    assert len(replica.cache) == 0
+
+def test_a_feed_that_goes_back_drops_the_replica():
+    replica = VenueReplica(StaticFeed(3), 8)
+    replica.apply(VenueChanges(changes=[], version=7))
+    asyncio.run(replica.get("venue", lambda: asyncio.sleep(0, found("first"))))
+
+    replica.apply(VenueChanges(changes=[], version=2))
+
+    assert len(replica.cache) == 0
+    assert replica.version == 2
+
+def test_the_replica_tails_the_feed_once_started():
+    feed = StaticFeed(3)
+    replica = VenueReplica(feed, 8, wait=0.01)
+
+    async def run():
+        replica.start()
+        await asyncio.sleep(0.05)
+        following = replica.version
+        await replica.stop()
+        return following
+
+    assert asyncio.run(run()) == 3
+    assert feed.calls[0] == (None, 0)
+    assert feed.calls[1] == (3, 0.01)
+    assert replica.version is None
@@ -1,3 +1,4 @@
+import asyncio
 from typing import List
 from src.model.venues.data.base import MockBase  
 from src.model.venues.data.schema import VenueSchema 
@@ -60,11 +61,11 @@ def test_get_all_by_same_name():
     """
     database = MockBase()
     for venue in create_venues(9):
-        database.store_venue(venue)
+        asyncio.run(database.store_venue(venue))
     query = VenueQuery(
         name="name_1"  
     )
-    result = query.query(database)
+    result = asyncio.run(query.query(database))
     assert result.total == len(result.result) == 3  #should be 3
     assert all_same_name("name_1", result.result)
 
@@ -87,26 +88,26 @@ def test_get_all_by_same_name():
 def test_limiting_the_amount_of_venues():
     database = MockBase()
     for venue in create_venues(9):
-        database.store_venue(venue)
+        asyncio.run(database.store_venue(venue))
     query = VenueQuery(
             name="name_1",
             limit=2
             )
-    result = query.query(database)
+    result = asyncio.run(query.query(database))
     assert len(result.result) == result.total == 2
     # assert all_same_venue("venue_1", result)
 
 def test_stepping_with_limit_the_amount_of_venues():
     database = MockBase()
     for venue in create_venues(9):
-        database.store_venue(venue)
+        asyncio.run(database.store_venue(venue))
     query = VenueQuery(
             name="name_1",
             limit=2
             )
-    result_1 = query.query(database)
+    result_1 = asyncio.run(query.query(database))
     query.start = 2
-    result_2 = query.query(database)
+    result_2 = asyncio.run(query.query(database))
     assert len(result_1.result) == result_1.total == 2
     assert len(result_2.result) == result_2.total == 1
     assert all_different(result_1.result, result_2.result)
\ No newline at end of file
@@ -0,0 +1,64 @@
+import asyncio
+import random
+from datetime import datetime
+import haversine as hs
+from src.model.venues.data.base import MockBase
+from src.model.venues.data.spatial import GridIndex
+from src.model.venues.service import LocalVenuesProvider
+from src.model.venues.update import Update
+from src.model.venues.venue import CreateInfo
+
+
+def venue_at(location: str) -> CreateInfo:
+    return CreateInfo(id="", name="La Pizzeria", location=location, capacity=50, logo="foto.url", pictures=["foto1"],
+                      slots=[datetime.now()], characteristics=["Arepas"], features=["Estacionamiento"],
+                      vacations=[datetime.now()], reservationLeadTime=10, menu="comidas.url")
+
+def test_the_nearest_venues_match_a_full_scan():
+    generator = random.Random(7)
+    points = [(f"{i}", generator.uniform(-35, -34), generator.uniform(-59, -58)) for i in range(2000)]
+    index = GridIndex()
+    index.replace(points)
+    center = (-34.5, -58.5)
+
+    expected = sorted((hs.haversine(center, (lat, lon)), id) for id, lat, lon in points)
+    nearest = index.nearest(center, 10)
+    within = index.within(center, 5)
+
+    assert [id for id, _ in nearest] == [id for _, id in expected[:10]]
+    assert [id for id, _ in within] == [id for distance, id in expected if distance <= 5]
+
+def test_moved_and_removed_venues_leave_their_cells():
+    index = GridIndex()
+    index.add("venue", -34.6, -58.4)
+    index.add("venue", 40.4, -3.7)
+    index.add("other", -34.6, -58.4)
+    index.remove("other")
+    index.add("nowhere", None, None)
+
+    assert len(index) == 1
+    assert index.within((-34.6, -58.4), 50) == []
+    assert [id for id, _ in index.within((40.4, -3.7), 1)] == ["venue"]
+    assert len(index.cells) == 1
+
+def test_the_provider_keeps_the_index_in_line_with_its_venues():
+    index = GridIndex()
+    provider = LocalVenuesProvider(MockBase(), index)
+
+    near = asyncio.run(provider.create_venue(venue_at("-34.6,-58.45")))
+    far = asyncio.run(provider.create_venue(venue_at("-34.9,-58.9")))
+    asyncio.run(provider.update_venue(far.id, Update(location="-34.61,-58.45")))
+    ranked = asyncio.run(provider.get_venues_near_to(("-34.6", "-58.45"), radius=5_000))
+    asyncio.run(provider.delete_venue(near.id))
+
+    assert [value.venue.id for value in ranked.result] == [near.id, far.id]
+    assert ranked.result[1].venue.location == "-34.61,-58.45"
+    assert list(index.points) == [far.id]
+
+def test_a_refresh_rebuilds_the_index_from_the_database():
+    database = MockBase()
+    asyncio.run(LocalVenuesProvider(database).create_venue(venue_at("-34.6,-58.45")))
+    provider = LocalVenuesProvider(database, GridIndex())
+
+    assert asyncio.run(provider.refresh_index()) == 1
+    assert len(asyncio.run(provider.get_venues_near_to(("-34.6", "-58.45"))).result) == 1
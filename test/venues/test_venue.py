@@ -2,7 +2,8 @@ import asyncio
 from random import shuffle
 from typing import List
 import pytest
-from src.model.commons.distance import LocalPosition
+import haversine as hs
+from src.model.commons.distance import LocalPosition, bounding_box
 from src.model.venues.data.location_finder import Ranker
 from src.model.venues.venue import create_venue, Available, Closed, Unconfirmed, Occupied, Venue
 from src.model.venues.update import Update
@@ -66,17 +67,17 @@ def test_after_persisting_a_venue_it_can_be_recovered_with_its_id():
     venue = create_venue("La Pizzeria", "123 Main St", 50, logo="foto.url", pictures = ["foto1", "foto2"], slots=[datetime.now()], characteristics= ["Arepas", "Cafeteria"], features= ["Estacionamiento"],vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url")
     base = MockBase()
     venue_with_id=venue.persistance()
-    base.store_venue(venue_with_id)
-    assert base.get_venue_by_id(venue_with_id.id) == venue_with_id
+    asyncio.run(base.store_venue(venue_with_id))
+    assert asyncio.run(base.get_venue_by_id(venue_with_id.id)) == venue_with_id
 
 def test_after_deleting_a_venue_it_can_no_longer_be_recovered():
     venue = create_venue("La Pizzerias", "126 Main St", 51, logo="foto.url", pictures = ["foto1", "foto2"], slots=[datetime.now()], characteristics= ["Arepas", "Cafeteria"], features= ["Estacionamiento"],vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url")
     base = MockBase()
-    base.store_venue(venue.persistance())
-    assert base.get_venue_by_id(venue.id) != None
+    asyncio.run(base.store_venue(venue.persistance()))
+    assert asyncio.run(base.get_venue_by_id(venue.id)) != None
     #Deleting the reservation
-    Venue.delete(venue.id, base)
-    assert base.get_venue_by_id(venue.id) == None
+    asyncio.run(Venue.delete(venue.id, base))
+    assert asyncio.run(base.get_venue_by_id(venue.id)) == None
 
 def get_locations() -> List[str]:
     return ["-34.694174,-58.5566507", "-34.794174,-58.6566507", "-34.894174,-58.7566507", "-34.994174,-58.8566507", "-35.094174,-58.9566507"] 
@@ -98,7 +99,7 @@ def test_venue_ranking_by_distance():
     base = MockBase()
 
     for venue in create_venues_by_distance():
-        base.store_venue(venue.persistance())
+        asyncio.run(base.store_venue(venue.persistance()))
     ranker = Ranker(base, my_location)
     result = [value.venue.location for value in asyncio.run(ranker.rank())]
     locations = get_locations()
@@ -107,3 +108,31 @@ def test_venue_ranking_by_distance():
         zip(result, locations)
     ))
     assert len(all_equal) == len(locations) #This means all locations are equal (and get_locations returns locations unsorted)
+
+def test_ranking_only_keeps_the_closest_venues_inside_the_radius():
+    my_location = ("-34.594174","-58.4566507")
+    base = MockBase()
+
+    for venue in create_venues_by_distance():
+        asyncio.run(base.store_venue(venue.persistance()))
+    ranker = Ranker(base, my_location, radius=30_000, limit=1)
+    result = asyncio.run(ranker.rank())
+
+    assert [value.venue.location for value in result] == get_locations()[:1]
+    assert Ranker(base, my_location, radius=1_000).limit == 50
+    assert asyncio.run(Ranker(base, my_location, radius=1_000).rank()) == []
+
+def test_venues_without_coordinates_are_not_ranked():
+    base = MockBase()
+    asyncio.run(base.store_venue(create_venue("La Pizzeria", "123 Main St", 50, logo="foto.url", pictures = ["foto1"], slots=[datetime.now()], characteristics= ["Arepas"], features= ["Estacionamiento"], vacations=[datetime.now()], reservationLeadTime=10,menu="comidas.url").persistance()))
+
+    assert asyncio.run(Ranker(base, ("-34.594174","-58.4566507")).rank()) == []
+
+def test_the_bounding_box_holds_the_whole_radius():
+    center = (-34.594174, -58.4566507)
+    south, west, north, east = bounding_box(center, 10)
+
+    for corner in [(south, center[1]), (north, center[1]), (center[0], west), (center[0], east)]:
+        assert hs.haversine(center, corner) >= 9.999
+    assert bounding_box((89.99, 0), 10)[1:4:2] == (-180.0, 180.0)
+    assert bounding_box((0, 179.99), 10)[1:4:2] == (-180.0, 180.0)